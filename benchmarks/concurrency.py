@@ -0,0 +1,60 @@
+'''Measures how the Kitchen scales over threads in concurrent mode.
+
+Every thread adds Ingredients to a Plate and takes small Portions from a Bowl, either each with Utensils of its own or
+all with the same ones. With Utensils of their own, the threads never wait for each other's locks, so the throughput
+should not drop as threads are added. With shared Utensils, every operation waits for the same locks. Afterwards, the
+shared Bowl must have handed out exactly all of its contents.
+
+    python benchmarks/concurrency.py [operations per thread]
+'''
+
+import os
+import sys
+import threading
+import time
+from fractions import Fraction
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from kitchen.Concurrency import Concurrency
+from kitchen.Kitchen import KitchenException
+from kitchen.utensils import Bowl, Plate
+from kitchen.ingredients import Flour, Sugar
+
+def cook(plate: Plate, bowl: Bowl, operations: int, portion: str, taken: list):
+    for _ in range(operations):
+        plate.add(Sugar.take(grams=10))
+        taken.append(bowl.take(portion).portion)
+
+def kitchen(threads: int, operations: int, shared: bool) -> float:
+    utensils = []
+    for thread in range(threads):
+        if shared and utensils:
+            utensils.append(utensils[0])
+            continue
+        bowl = Bowl.use(name='dough')
+        bowl.add(Flour.take(grams=500))
+        utensils.append((Plate.use(), bowl))
+    # Every Bowl holds exactly enough for all the Portions taken from it.
+    portion = f'1/{operations * threads}' if shared else f'1/{operations}'
+    taken = [[] for _ in range(threads)]
+    workers = [threading.Thread(target=cook, args=(*utensils[thread], operations, portion, taken[thread]))
+               for thread in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    seconds = time.perf_counter() - start
+    if shared and sum(sum(portions, Fraction(0)) for portions in taken) != 1:
+        raise KitchenException('The shared bowl handed out more or less than it held!')
+    return threads * operations / seconds
+
+if __name__ == '__main__':
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with Concurrency():
+        print(f'{"threads":>7} {"own utensils ops/s":>20} {"shared utensils ops/s":>22}')
+        for threads in (1, 2, 4, 8):
+            own, shared = kitchen(threads, operations, False), kitchen(threads, operations, True)
+            print(f'{threads:>7} {own:>20,.0f} {shared:>22,.0f}')
@@ -0,0 +1,299 @@
+'''Runs the benchmark suite and fails when an operation has become slower than in the stored baseline.
+
+Every operation is timed in several rounds, each long enough to rise above the resolution of the clock, and is
+summarized by the mean time per call and its 95% confidence interval. An operation has regressed when its mean is
+more than the threshold slower than the baseline and the two confidence intervals, widened by that threshold, do not
+overlap, so that noise alone does not fail the gate. A comparison table for every operation is written as well.
+
+Right before every round, a fixed amount of plain Python work that does not use the kitchen is timed as well, and the
+operations are compared by their times relative to it, round by round, so that a machine that is busier or slower than
+the one that stored the baseline does not fail the gate. A baseline is only compared on the same kind of machine and
+the same Python, which is stored with it; other differences between them are not calibrated away.
+
+    python benchmarks/gate.py                      compare with benchmarks/baseline.json
+    python benchmarks/gate.py --update             store the results as the new baseline
+    python benchmarks/gate.py --only plate,hash    run only the operations whose names contain these
+'''
+
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from kitchen.Diff import diff
+from kitchen.Executor import _cook_script
+from kitchen.Rendering import render
+from kitchen.utensils import Bowl, Fridge, Pan, Plate
+from kitchen.ingredients import Butter, Egg, Flour, Sugar
+from kitchen.ingredients.Collections import Mixture
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SCRIPTS = ('Pancakes.py', 'ChocoChip_Cookies.py', 'Bonus_Challenge.py', 'Super_Bonus_Challenge.py', 'omelette.chef.py')
+
+# The t-values for a 95% confidence interval, by degrees of freedom.
+_T95 = {1: 12.71, 2: 4.30, 3: 3.18, 4: 2.78, 5: 2.57, 6: 2.45, 7: 2.36, 8: 2.31, 9: 2.26, 10: 2.23, 15: 2.13, 20: 2.09,
+        30: 2.04}
+
+def _t95(degrees: int) -> float:
+    return _T95[max(known for known in _T95 if known <= degrees)] if degrees < 60 else 1.96
+
+def _plating():
+    plate = Plate.use()
+    for grams in range(1000):
+        plate.add(Sugar.take(grams=grams % 50))
+
+def _bowl():
+    bowl = Bowl.use(name='batter')
+    for _ in range(200):
+        bowl.add(Flour.take(grams=50))
+        bowl.add(Egg.take())
+        bowl.mix()
+    bowl.divide(8)
+
+def _pan():
+    pan = Pan.use(name='pancakes')
+    for _ in range(200):
+        pan.add(Butter.take('slice'))
+        pan.cook(minutes=1)
+        pan.flip()
+        pan.take()
+
+def _fridge():
+    fridge = Fridge.use()
+    bowls = [Bowl.use(name=f'dough {number}') for number in range(100)]
+    for bowl in bowls:
+        bowl.add(Flour.take(grams=100))
+        fridge.add(bowl)
+    for number in range(100):
+        fridge.take(f'dough {number}')
+
+_ingredients = [Sugar.take(grams=grams % 200) for grams in range(5000)] + [Egg.take() for _ in range(1000)]
+
+def _hash_ingredients():
+    for item in _ingredients:
+        hash(item)
+
+def _add_many():
+    Plate.use().add_many(_ingredients)
+
+def _mixture(number: int) -> Mixture:
+    mixture = Mixture(f'mixture {number}')
+    mixture._add_many(_ingredients[number:number + 100])
+    return mixture
+
+def _hash_collections():
+    for number in range(50):
+        hash(_mixture(number))
+
+def _render():
+    plate = Plate.use()
+    for number in range(50):
+        plate.add(_mixture(number))
+    render(plate)
+
+def _diff():
+    before, after = Plate.use(), Plate.use()
+    for number in range(50):
+        before.add(_mixture(number))
+        after.add(_mixture(number))
+    after.add(Egg.take())
+    diff(before, after)
+
+def _calibration():
+    table = {}
+    total = 0
+    for number in range(20000):
+        table[number % 97] = str(number)
+        total += len(table[number % 97])
+    return total
+
+def environment() -> Dict[str, str]:
+    '''Returns what a baseline has to be compared on: the kind of machine and the Python, with its version.
+
+    Returns:
+        Dict[str, str]: the machine, operating system and Python.
+    '''
+
+    return {'machine': platform.machine(), 'system': platform.system(),
+            'python': f'{platform.python_implementation()} {platform.python_version()}'}
+
+def _script(name: str) -> Callable:
+    path = os.path.join(ROOT, name)
+
+    def run():
+        with redirect_stdout(io.StringIO()):
+            _cook_script(path)
+    return run
+
+OPERATIONS: Dict[str, Callable] = {
+    'plate.add': _plating,
+    'bowl.add/mix/divide': _bowl,
+    'pan.cook/flip/take': _pan,
+    'fridge.add/take': _fridge,
+    'hash.ingredients': _hash_ingredients,
+    'hash.collections': _hash_collections,
+    'add_many': _add_many,
+    'render': _render,
+    'diff': _diff,
+    **{f'script.{name}': _script(name) for name in SCRIPTS},
+}
+'''The operations of the suite, by name.'''
+
+def _round(operation: Callable, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        operation()
+    return (time.perf_counter() - start) / calls
+
+def _calls(operation: Callable, seconds: float) -> int:
+    operation()
+    calls = 1
+    while True:
+        elapsed = _round(operation, calls) * calls
+        if elapsed >= seconds:
+            return calls
+        calls = max(calls * 2, int(calls * seconds / max(elapsed, 1e-9)))
+
+def _summary(samples: List[float]) -> Tuple[float, float]:
+    mean = statistics.fmean(samples)
+    spread = _t95(len(samples) - 1) * statistics.stdev(samples) / math.sqrt(len(samples)) if len(samples) > 1 else mean
+    return mean, spread
+
+def measure(operation: Callable, rounds: int, seconds: float, calibration: Callable = None) -> Dict[str, float]:
+    '''Times the given operation in the given number of rounds, each calling it repeatedly for about the given time.
+
+    Args:
+        operation (Callable): the operation to time.
+        rounds (int): the number of rounds.
+        seconds (float): the least time a round takes.
+        calibration (Callable): an operation to time right before every round as well, to measure the operation
+            relative to. Optional.
+
+    Returns:
+        Dict[str, float]: the mean time per call in seconds, the half-width of its 95% confidence interval, and the
+            number of calls per round. With a calibration, the mean time per call of the calibration as well, and the
+            mean and confidence interval of the time of the operation relative to it, round by round.
+    '''
+
+    calls = _calls(operation, seconds)
+    if calibration is not None:
+        calibration_calls = _calls(calibration, seconds)
+    samples, relative, calibrations = [], [], []
+    for _ in range(rounds):
+        if calibration is not None:
+            calibrations.append(_round(calibration, calibration_calls))
+        samples.append(_round(operation, calls))
+        if calibration is not None:
+            relative.append(samples[-1] / calibrations[-1])
+    mean, spread = _summary(samples)
+    result = {'mean': mean, 'ci': spread, 'calls': calls, 'rounds': len(samples)}
+    if calibration is not None:
+        result['calibration'] = statistics.fmean(calibrations)
+        result['relative'], result['relative_ci'] = _summary(relative)
+    return result
+
+def _milliseconds(result: Dict[str, float]) -> str:
+    return f'{result["mean"] * 1e3:.3f}±{result["ci"] * 1e3:.3f}'
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> Tuple[List[str], List[str]]:
+    '''Compares results with a baseline.
+
+    Args:
+        results (Dict[str, Dict[str, float]]): the results, by operation, as returned by measure.
+        baseline (Dict[str, Dict[str, float]]): the baseline, in the same form.
+        threshold (float): the fraction by which an operation may become slower, e.g. 0.1 for 10%.
+
+    Returns:
+        Tuple[List[str], List[str]]: the lines of the comparison table, and the names of the regressed operations.
+            Times measured relative to the calibration are shown in the time the calibration takes now.
+    '''
+
+    lines = [f'| {"operation":<32} | {"baseline ms":>15} | {"current ms":>15} | {"change":>8} | {"verdict":<10} |',
+             f'|{"-" * 34}|{"-" * 17}|{"-" * 17}|{"-" * 10}|{"-" * 12}|']
+    regressed = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        current = _milliseconds(result)
+        if before is None:
+            lines.append(f'| {name:<32} | {"":>15} | {current:>15} | {"":>8} | {"new":<10} |')
+            continue
+        if 'relative' in before and 'relative' in result:
+            # Both are compared relative to the calibration, in the time it takes now.
+            scale = result['calibration']
+            before = {'mean': before['relative'] * scale, 'ci': before['relative_ci'] * scale}
+            result = {'mean': result['relative'] * scale, 'ci': result['relative_ci'] * scale}
+            current = _milliseconds(result)
+        change = result['mean'] / before['mean'] - 1
+        if change > threshold and result['mean'] - result['ci'] > (before['mean'] + before['ci']) * (1 + threshold):
+            verdict = 'REGRESSED'
+            regressed.append(name)
+        elif change < -threshold and result['mean'] + result['ci'] < (before['mean'] - before['ci']) * (1 - threshold):
+            verdict = 'faster'
+        else:
+            verdict = 'same'
+        lines.append(f'| {name:<32} | {_milliseconds(before):>15} | {current:>15} | {change:>+8.1%} | {verdict:<10} |')
+    return lines, regressed
+
+def main(arguments: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Compares the kitchen benchmarks with a stored baseline.')
+    parser.add_argument('--baseline', default=BASELINE, help='the baseline JSON file')
+    parser.add_argument('--threshold', type=float, default=.1, help='the slowdown allowed, as a fraction')
+    parser.add_argument('--rounds', type=int, default=7, help='the number of timed rounds per operation')
+    parser.add_argument('--seconds', type=float, default=.05, help='the least time of a round')
+    parser.add_argument('--only', default='', help='comma-separated parts of the names of the operations to run')
+    parser.add_argument('--table', help='a file to write the comparison table to, as Markdown')
+    parser.add_argument('--update', action='store_true', help='store the results as the new baseline')
+    options = parser.parse_args(arguments)
+
+    baseline = None
+    if os.path.exists(options.baseline):
+        with open(options.baseline) as file:
+            baseline = json.load(file)
+    if not options.update:
+        if baseline is None:
+            print(f'No baseline at {options.baseline}; run with --update first.')
+            return 2
+        if baseline.get('environment') != environment():
+            print(f'The baseline at {options.baseline} was stored on {baseline.get("environment")}, not on '
+                  f'{environment()}; run with --update on this machine first.')
+            return 2
+    parts = [part for part in options.only.split(',') if part]
+    results = {}
+    for name, operation in OPERATIONS.items():
+        if not parts or any(part in name for part in parts):
+            results[name] = measure(operation, options.rounds, options.seconds, _calibration)
+    if options.update:
+        # Only the operations that were run are replaced, in a baseline stored on the same kind of machine.
+        stored = {}
+        if parts and baseline is not None and baseline.get('environment') == environment():
+            stored = baseline['operations']
+        stored.update(results)
+        with open(options.baseline, 'w') as file:
+            json.dump({'environment': environment(), 'operations': stored}, file, indent=2, sort_keys=True)
+            file.write('\n')
+        print(f'Stored {len(results)} operations in {options.baseline}')
+        return 0
+    lines, regressed = compare(results, baseline['operations'], options.threshold)
+    table = '\n'.join(lines)
+    print(table)
+    if options.table:
+        with open(options.table, 'w') as file:
+            file.write(table + '\n')
+    if regressed:
+        print(f'\n{len(regressed)} operations regressed by more than {options.threshold:.0%}: {", ".join(regressed)}')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
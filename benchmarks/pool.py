@@ -0,0 +1,80 @@
+'''Measures what pooling Utensils saves on a high rate of small orders.
+
+Every order uses a Bowl, a Pan and a Plate, either new ones from use() or ones acquired from a UtensilPool and
+released afterwards. The table shows the time per order, the KitchenObjects created per order, as counted by
+Instrumentation, and the garbage collections run per thousand orders. Utensils hold no reference cycles, so thrown away
+ones are freed as soon as they are dropped, and neither way should trigger collections.
+
+    python benchmarks/pool.py [orders]
+'''
+
+import gc
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from kitchen.Instrumentation import Instrumentation
+from kitchen.utensils import Bowl, Pan, Plate
+from kitchen.utensils.Pool import UtensilPool
+from kitchen.ingredients import Butter, Egg, Flour
+
+def order(bowl: Bowl, pan: Pan, plate: Plate):
+    bowl.add(Egg.take())
+    bowl.add(Flour.take(grams=50))
+    bowl.mix()
+    pan.add(Butter.take('slice'))
+    pan.add(bowl.take())
+    pan.cook(minutes=1)
+    pan.flip()
+    pan.cook(minutes=1)
+    plate.add(pan.take())
+
+def unpooled(orders: int):
+    for _ in range(orders):
+        order(Bowl.use(name='batter'), Pan.use(name='pancake'), Plate.use())
+
+def pooled(orders: int, pool: UtensilPool):
+    for _ in range(orders):
+        bowl = pool.acquire(Bowl, name='batter')
+        pan = pool.acquire(Pan, name='pancake')
+        plate = pool.acquire(Plate)
+        order(bowl, pan, plate)
+        pool.release(plate)
+        pool.release(pan)
+        pool.release(bowl)
+
+def measure(function, *args) -> tuple:
+    collections = [0]
+
+    def count(phase, info):
+        if phase == 'start':
+            collections[0] += 1
+    gc.collect()
+    gc.callbacks.append(count)
+    try:
+        start = time.perf_counter()
+        function(*args)
+        seconds = time.perf_counter() - start
+    finally:
+        gc.callbacks.remove(count)
+    return seconds, collections[0]
+
+if __name__ == '__main__':
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    pool = UtensilPool()
+    with Instrumentation() as instrumentation:
+        unpooled(1000)
+    unpooled_allocations = instrumentation.allocations / 1000
+    with Instrumentation() as instrumentation:
+        pooled(1000, pool)
+    pooled_allocations = instrumentation.allocations / 1000
+    print(f'{"utensils":<9} {"us/order":>9} {"objects/order":>14} {"collections/1000 orders":>24}')
+    for name, function, args, allocations in (('new', unpooled, (orders,), unpooled_allocations),
+                                              ('pooled', pooled, (orders, pool), pooled_allocations)):
+        seconds, collections = measure(function, *args)
+        print(f'{name:<9} {seconds / orders * 1e6:>9.2f} {allocations:>14.1f} {collections / orders * 1000:>24.2f}')
+    print()
+    print(pool.report())
@@ -0,0 +1,33 @@
+'''Measures how the Kitchen scales with the size of generated recipe programs.
+
+Every row runs a Workload with more dishes and a larger fanout than the one before, and reports the number of
+operations in the program, the number of Ingredients on the served Plate, and the time per operation. The time per
+operation should stay flat as the programs grow; a row where it jumps is a scaling cliff, which can be looked at with
+
+    python -m kitchen.Workload <seed> <dishes> <depth> <fanout> > workload.py
+    python -m kitchen.Instrumentation workload.py
+
+    python benchmarks/workload.py [seed] [depth]
+'''
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from kitchen.Workload import Workload
+
+if __name__ == '__main__':
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(f'{"dishes":>6} {"fanout":>6} {"operations":>10} {"ingredients":>12} {"seconds":>8} {"us/operation":>12}')
+    for dishes, fanout in ((1, 2), (4, 4), (16, 4), (16, 8), (64, 8), (64, 16)):
+        workload = Workload(seed=seed, dishes=dishes, depth=depth, fanout=fanout)
+        start = time.perf_counter()
+        plate = workload.run()
+        seconds = time.perf_counter() - start
+        operations = len(workload.lines)
+        print(f'{dishes:>6} {fanout:>6} {operations:>10,} {plate._statistics().items:>12,} {seconds:>8.3f} '
+              f'{seconds / operations * 1e6:>12.1f}')
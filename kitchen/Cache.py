@@ -0,0 +1,201 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import zlib
+from fractions import Fraction
+from functools import wraps
+from types import BuiltinFunctionType, CodeType, FunctionType
+from typing import Any, Callable, Optional
+from kitchen.Executor import _cook
+from kitchen.Kitchen import KitchenObject
+
+_version: Optional[str] = None
+
+def version() -> str:
+    '''Returns the version stamp of the kitchen package: a digest of its source code. Any change to the kitchen changes
+    the stamp, so dishes cached by an earlier kitchen are no longer found.
+
+    Returns:
+        str: the version stamp.
+    '''
+
+    global _version
+    if _version is None:
+        digest = hashlib.sha256()
+        root = os.path.dirname(os.path.abspath(__file__))
+        for directory, directories, files in os.walk(root):
+            directories[:] = sorted(d for d in directories if d != '__pycache__')
+            for file in sorted(f for f in files if f.endswith('.py')):
+                path = os.path.join(directory, file)
+                digest.update(os.path.relpath(path, root).encode())
+                with open(path, 'rb') as source:
+                    digest.update(source.read())
+        _version = digest.hexdigest()
+    return _version
+
+class _Unknown(Exception):
+    # Raised for a value that cannot be described the same way in every process.
+    pass
+
+def _contents(cell) -> Any:
+    try:
+        return cell.cell_contents
+    except ValueError:
+        # A variable of the enclosing function that is not assigned yet.
+        return _Empty
+
+class _Empty:
+    pass
+
+def _canonical(value: Any, active: frozenset = frozenset()) -> str:
+    # A description of the value that is the same in every process. Sets are sorted, as their order depends on the
+    # hash seed, and so are the keys of dictionaries. Code is described by its bytecode, names and constants, and
+    # functions by their code, defaults and the contents of their closures.
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        return f'{type(value).__name__}:{value!r}'
+    if isinstance(value, Fraction):
+        return f'Fraction:{value}'
+    if isinstance(value, CodeType):
+        return f'code({value.co_code.hex()},{value.co_names!r},{_canonical(value.co_consts, active)})'
+    if id(value) in active:
+        # A closure can refer back to its own function, or a container to itself.
+        return 'recursive'
+    active = active | {id(value)}
+    if isinstance(value, (tuple, list)):
+        return f'{type(value).__name__}({",".join(_canonical(item, active) for item in value)})'
+    if isinstance(value, (set, frozenset)):
+        return f'{type(value).__name__}({",".join(sorted(_canonical(item, active) for item in value))})'
+    if isinstance(value, dict):
+        items = (f'{_canonical(key, active)}={_canonical(item, active)}' for key, item in value.items())
+        return f'dict({",".join(sorted(items))})'
+    if isinstance(value, type):
+        return f'type:{value.__module__}.{value.__qualname__}'
+    if isinstance(value, FunctionType):
+        cells = tuple(_contents(cell) for cell in value.__closure__ or ())
+        return f'function:{value.__module__}.{value.__qualname__}({_canonical(value.__code__, active)},' \
+               f'{_canonical(value.__defaults__, active)},{_canonical(value.__kwdefaults__, active)},' \
+               f'{_canonical(cells, active)})'
+    if isinstance(value, BuiltinFunctionType):
+        return f'builtin:{value.__module__}.{value.__qualname__}'
+    if isinstance(value, KitchenObject):
+        # KitchenObjects are described by their class and the state they would be pickled with.
+        kind = type(value)
+        return f'{kind.__module__}.{kind.__qualname__}({_canonical(value.__getstate__(), active)})'
+    raise _Unknown(type(value).__qualname__)
+
+def fingerprint(recipe: Callable, args: tuple, kwargs: dict) -> Optional[str]:
+    '''Returns the fingerprint of running the given recipe with the given arguments, from the recipe's name, code,
+    defaults and closure, the arguments and the version stamp of the kitchen. Moving the recipe around in its file
+    keeps the fingerprint, changing what it does does not. Changes to other functions that the recipe calls are not
+    noticed.
+
+    Args:
+        recipe (Callable): the recipe function.
+        args (tuple): the positional arguments of the recipe.
+        kwargs (dict): the keyword arguments of the recipe.
+
+    Returns:
+        Optional[str]: the fingerprint, as a hexadecimal string, or None when the recipe or one of its arguments is
+            something that cannot be described the same way every time, such as an open file.
+    '''
+
+    try:
+        described = _canonical(recipe) + _canonical((args, kwargs))
+    except _Unknown:
+        return None
+    digest = hashlib.sha256(version().encode())
+    digest.update(described.encode())
+    return digest.hexdigest()
+
+class RecipeCache:
+    '''A cache of served dishes on local disk, keyed by the fingerprint of the recipe and its arguments. On a hit the
+    recipe is not run at all. Recipes are run as by KitchenExecutor: serving hands the dish back instead of exiting.
+    Dishes are stored pickled and compressed, one file per dish. When the cache grows past its size, the dishes that
+    were used longest ago are removed. It can be used as a decorator:
+
+        cache = RecipeCache()
+
+        @cache
+        def pancake(n_pancakes):
+            ...
+            Rosemary.serve(plate)
+
+        plate = pancake(16)
+    '''
+
+    def __init__(self, directory: str = None, size: int = 1 << 26):
+        self.directory = directory or os.path.join(os.path.expanduser('~'), '.cache', 'kitchen')
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def cook(self, recipe: Callable, *args, **kwargs) -> Any:
+        '''Returns the dish served by the given recipe with the given arguments, from the cache if it is there.
+
+        Args:
+            recipe (Callable): the recipe function to run.
+
+        Returns:
+            Any: the served dish, or the return value of a recipe that does not serve.
+        '''
+
+        key = fingerprint(recipe, args, kwargs)
+        if key is None:
+            # What cannot be fingerprinted is not cached.
+            self.misses += 1
+            return _cook(recipe, args, kwargs)
+        path = os.path.join(self.directory, key + '.dish')
+        try:
+            with open(path, 'rb') as entry:
+                dish = pickle.loads(zlib.decompress(entry.read()))
+        except (OSError, EOFError, zlib.error, pickle.UnpicklingError):
+            pass
+        else:
+            self.hits += 1
+            # The modification time records when a dish was last used, for eviction.
+            os.utime(path)
+            return dish
+        self.misses += 1
+        dish = _cook(recipe, args, kwargs)
+        self._store(path, zlib.compress(pickle.dumps(dish, protocol=pickle.HIGHEST_PROTOCOL)))
+        return dish
+
+    def __call__(self, recipe: Callable) -> Callable:
+        @wraps(recipe)
+        def cached(*args, **kwargs):
+            return self.cook(recipe, *args, **kwargs)
+        return cached
+
+    def _store(self, path: str, data: bytes):
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as entry:
+            entry.write(data)
+        os.replace(temporary, path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.dish'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        '''Removes every dish from the cache.'''
+
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.dish'):
+                os.remove(entry.path)
@@ -0,0 +1,384 @@
+import heapq
+import math
+import os
+import sys
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from kitchen.Kitchen import KitchenException
+from kitchen.Executor import _cook, _cook_script
+from kitchen.utensils.Utensil import Utensil, UtensilHook
+
+KINDS = ('Bowl', 'Fridge', 'Pan', 'Oven')
+'''The kinds of Utensil a CapacityPlanner sizes, in the order they are reported.'''
+
+ROOM_TEMPERATURE = 20
+
+class Job:
+    '''The time one Utensil is used for by a recipe: a Bowl prepared, a Bowl chilled in the Fridge, a dish cooked in a
+    Pan between being added and taken, or a container baked in the Oven at one temperature.'''
+
+    __slots__ = ('kind', 'minutes', 'degrees')
+
+    def __init__(self, kind: str, minutes: float, degrees: Optional[int] = None):
+        self.kind = kind
+        self.minutes = minutes
+        self.degrees = degrees
+
+    def __repr__(self):
+        return f'Job({self.kind!r}, {self.minutes!r}' + (f', degrees={self.degrees!r})' if self.degrees else ')')
+
+class RecipeTimings:
+    '''The Jobs of one recipe, as recorded by timings() or script_timings(), in stages. A stage is a run of Jobs on the
+    same kind of Utensil, such as the pancakes of one batter, which can be done at once on as many Utensils as there
+    are; every stage starts when the one before it is done.'''
+
+    def __init__(self, name: str, stages: List[List[Job]]):
+        self.name = name
+        self.stages = stages
+
+    def busy(self, kind: str) -> float:
+        '''Returns the minutes the recipe keeps Utensils of the given kind busy, without preheating.
+
+        Args:
+            kind (str): the kind of Utensil, e.g. 'Pan'.
+
+        Returns:
+            float: the minutes.
+        '''
+
+        return sum(job.minutes for stage in self.stages for job in stage if job.kind == kind)
+
+    def critical_minutes(self, heating: float) -> float:
+        '''Returns the least time the recipe takes with as many Utensils as it can use, and Ovens that start cold.
+
+        Args:
+            heating (float): the degrees an Oven heats or cools per minute.
+
+        Returns:
+            float: the minutes.
+        '''
+
+        return sum(max(_duration(job, ROOM_TEMPERATURE, heating) for job in stage) for stage in self.stages)
+
+    def __repr__(self):
+        return f'RecipeTimings({self.name!r}, {self.stages!r})'
+
+def _duration(job: Job, degrees: int, heating: float) -> float:
+    if job.degrees is None:
+        return job.minutes
+    return abs(job.degrees - degrees) / heating + job.minutes
+
+class _Recorder(UtensilHook):
+    # Records the Jobs of a recipe while it is cooked, as a hook into the Utensils used by the thread cooking it.
+
+    def __init__(self, bowl_minutes: float, chill_minutes: float):
+        self.bowl_minutes = bowl_minutes
+        self.chill_minutes = chill_minutes
+        self.jobs: List[Job] = []
+        self._open: Dict[int, Job] = {}
+
+    def _use_bowl(self, name: Optional[str], lazy: bool) -> None:
+        self.jobs.append(Job('Bowl', self.bowl_minutes))
+        return None
+
+    def _used(self, utensil: Utensil, action: str, minutes: float = 0):
+        if action == 'cook':
+            self._job(utensil, 'Pan', None).minutes += minutes
+        elif action == 'bake':
+            self._job(utensil, 'Oven', utensil.degrees).minutes += minutes
+        elif action == 'take':
+            self._open.pop(id(utensil), None)
+        elif action == 'chill':
+            self.jobs.append(Job('Fridge', self.chill_minutes))
+
+    def _job(self, utensil, kind: str, degrees: Optional[int]) -> Job:
+        job = self._open.get(id(utensil))
+        # Baking on at another temperature is another Job, as the Oven has to be heated for it.
+        if job is None or job.degrees != degrees:
+            job = self._open[id(utensil)] = Job(kind, 0, degrees)
+            self.jobs.append(job)
+        return job
+
+    def timings(self, name: str) -> RecipeTimings:
+        stages: List[List[Job]] = []
+        for job in self.jobs:
+            if job.minutes <= 0:
+                continue
+            if stages and stages[-1][0].kind == job.kind:
+                stages[-1].append(job)
+            else:
+                stages.append([job])
+        return RecipeTimings(name, stages)
+
+def timings(recipe: Callable, *args, bowl_minutes: float = 5, chill_minutes: float = 30, **kwargs) -> RecipeTimings:
+    '''Cooks the given recipe once, and records the time it uses every Utensil for: the minutes given to Pan.cook and
+    Oven.bake, at the temperature the Oven was preheated to. Preparing a Bowl and chilling it in the Fridge are not
+    timed by the recipes, so they take the given numbers of minutes.
+
+    Args:
+        recipe (Callable): the recipe function, which is cooked as by KitchenExecutor.
+        bowl_minutes (float): the minutes it takes to prepare a Bowl. Defaults to 5.
+        chill_minutes (float): the minutes a Bowl is chilled for in the Fridge. Defaults to 30.
+
+    Returns:
+        RecipeTimings: the recorded timings, named after the recipe.
+    '''
+
+    with _Recorder(bowl_minutes, chill_minutes) as recorder:
+        _cook(recipe, args, kwargs)
+    return recorder.timings(recipe.__name__)
+
+def script_timings(path: str, bowl_minutes: float = 5, chill_minutes: float = 30) -> RecipeTimings:
+    '''Runs the given recipe script, such as Pancakes.py, once, and records its timings as timings() does. Whatever the
+    script prints is printed.
+
+    Args:
+        path (str): the path of the recipe script.
+        bowl_minutes (float): the minutes it takes to prepare a Bowl. Defaults to 5.
+        chill_minutes (float): the minutes a Bowl is chilled for in the Fridge. Defaults to 30.
+
+    Returns:
+        RecipeTimings: the recorded timings, named after the script.
+    '''
+
+    with _Recorder(bowl_minutes, chill_minutes) as recorder:
+        _cook_script(path)
+    return recorder.timings(os.path.basename(path))
+
+class Assignment:
+    '''A Job of an order assigned to one Utensil, numbered from 0 within its kind, from a start to an end minute. For
+    an Oven, the start includes heating it to the temperature of the Job.'''
+
+    __slots__ = ('order', 'recipe', 'kind', 'utensil', 'start', 'end')
+
+    def __init__(self, order: int, recipe: str, kind: str, utensil: int, start: float, end: float):
+        self.order = order
+        self.recipe = recipe
+        self.kind = kind
+        self.utensil = utensil
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f'<order {self.order} {self.recipe}: {self.kind} {self.utensil} {self.start:g}-{self.end:g}>'
+
+class Schedule:
+    '''The Utensils a service needs and what each of them does when, as planned by a CapacityPlanner.'''
+
+    def __init__(self, window: float, utensils: Dict[str, int], assignments: List[Assignment], finished: List[float],
+                 fridge_slots: int = 8):
+        self.window = window
+        self.utensils = utensils
+        self.assignments = assignments
+        self.finished = finished
+        self.fridge_slots = fridge_slots
+
+    @property
+    def makespan(self) -> float:
+        '''The minute the last order is ready.'''
+
+        return max(self.finished, default=0)
+
+    @property
+    def throughput(self) -> float:
+        '''The orders made per hour, over the time it takes to make them all.'''
+
+        return len(self.finished) * 60 / self.makespan if self.makespan else 0
+
+    def utilization(self, kind: str) -> float:
+        '''Returns the share of the time until the last order is ready that Utensils of the given kind are busy. A
+        Fridge is only fully busy when all of its slots are.
+
+        Args:
+            kind (str): the kind of Utensil, e.g. 'Oven'.
+
+        Returns:
+            float: the share, from 0 to 1.
+        '''
+
+        count = self.utensils.get(kind, 0)
+        if not count or not self.makespan:
+            return 0
+        busy = sum(assignment.end - assignment.start for assignment in self.assignments if assignment.kind == kind)
+        return busy / (count * (self.fridge_slots if kind == 'Fridge' else 1) * self.makespan)
+
+    def report(self) -> str:
+        '''Returns a text report of the Utensils needed, how busy they are, and the predicted throughput.
+
+        Returns:
+            str: the report.
+        '''
+
+        lines = [f'{"utensil":<8}  {"count":>6}  {"busy":>6}']
+        for kind, count in self.utensils.items():
+            lines.append(f'{kind:<8}  {count:>6}  {self.utilization(kind):>6.0%}')
+        lines.append(f'{len(self.finished)} orders ready by minute {self.makespan:g} of {self.window:g}, '
+                     f'{self.throughput:.1f} orders per hour')
+        return '\n'.join(lines)
+
+Order = Union[str, Tuple[str, float]]
+
+class CapacityPlanner:
+    '''Works out how many Bowls, Fridges, Pans and Ovens a service needs to make a list of orders within a window of
+    minutes, and which Utensil does what when, from the recorded timings of the recipes:
+
+        planner = CapacityPlanner({'Pancakes.py': script_timings('Pancakes.py')}, window=240)
+        schedule = planner.plan(['Pancakes.py'] * 1000)
+        print(schedule.report())
+
+    A Pan cooks one dish at a time, and an Oven bakes one container at a time, after heating or cooling to its
+    temperature at the given rate; it keeps that temperature for the next one. A Fridge chills up to the given number of
+    Bowls at once. Orders are started from the minute they arrive, the ones with the most left to do first, and every
+    Job goes to the Utensil that can finish it first.
+
+    The counts start from the fewest Utensils that could do all the Jobs in the window, and the kind that the late
+    orders waited longest for is added to until every order is ready in time. Every count is then brought down again as
+    far as it goes without an order being late.
+    '''
+
+    def __init__(self, recipes: Dict[str, RecipeTimings], window: float, heating: float = 10, fridge_slots: int = 8):
+        self.recipes = recipes
+        self.window = window
+        self.heating = heating
+        self.fridge_slots = fridge_slots
+
+    def plan(self, orders: Iterable[Order]) -> Schedule:
+        '''Plans the given orders.
+
+        Args:
+            orders (Iterable[Order]): the orders, each the name of a recipe, or a pair of the name and the minute the
+                order arrives, which is 0 otherwise.
+
+        Raises:
+            KitchenException: when a recipe is unknown, or an order cannot be ready within the window however many
+                Utensils there are.
+
+        Returns:
+            Schedule: the Schedule, with the Utensils needed.
+        '''
+
+        orders = [(order, 0) if isinstance(order, str) else tuple(order) for order in orders]
+        jobs = dict.fromkeys(KINDS, 0)
+        busy = dict.fromkeys(KINDS, 0.0)
+        critical: Dict[str, float] = {}
+        for name, arrival in orders:
+            recipe = self.recipes.get(name)
+            if recipe is None:
+                raise KitchenException(f'The kitchen does not know how to make {name}!')
+            if name not in critical:
+                critical[name] = recipe.critical_minutes(self.heating)
+            if arrival + critical[name] > self.window:
+                raise KitchenException(f'A {name} ordered at minute {arrival:g} cannot be ready in time!')
+            for stage in recipe.stages:
+                for job in stage:
+                    jobs[job.kind] += 1
+                    busy[job.kind] += job.minutes
+        # More Utensils than Jobs cannot help, and neither can more Fridges than it takes to chill every Bowl at once.
+        most = {kind: jobs[kind] if kind != 'Fridge' else math.ceil(jobs[kind] / self.fridge_slots) for kind in KINDS}
+        slots = {kind: self.fridge_slots if kind == 'Fridge' else 1 for kind in KINDS}
+        counts = {kind: min(most[kind], max(1, math.ceil(busy[kind] / slots[kind] / self.window))) for kind in KINDS
+                  if jobs[kind]}
+        least = dict(counts)
+        while True:
+            finished, waited = self._schedule(orders, counts)
+            if max(finished, default=0) <= self.window:
+                break
+            growable = [kind for kind in counts if counts[kind] < most[kind]]
+            if not growable:
+                raise KitchenException('The orders cannot be ready in time!')
+            # The kind added to is the one the late orders waited for longest.
+            late = [number for number, minute in enumerate(finished) if minute > self.window]
+            kind = max(growable, key=lambda kind: sum(waited[kind][number] for number in late))
+            counts[kind] = min(most[kind], counts[kind] + max(1, counts[kind] // 4))
+        for kind in counts:
+            low, high = least[kind], counts[kind]
+            while low < high:
+                counts[kind] = (low + high) // 2
+                if max(self._schedule(orders, counts)[0], default=0) <= self.window:
+                    high = counts[kind]
+                else:
+                    low = counts[kind] + 1
+            counts[kind] = high
+        assignments: List[Assignment] = []
+        finished, _ = self._schedule(orders, counts, assignments)
+        return Schedule(self.window, {kind: counts[kind] for kind in KINDS if kind in counts}, assignments, finished,
+                        self.fridge_slots)
+
+    def _schedule(self, orders: Sequence[Tuple[str, float]], counts: Dict[str, int],
+                  assignments: Optional[List[Assignment]] = None) -> Tuple[List[float], Dict[str, List[float]]]:
+        heating = self.heating
+        recipes = self.recipes
+        # The minutes from the start of every stage of a recipe to its end, with as many Utensils as it can use.
+        remaining = {}
+        for name, recipe in recipes.items():
+            tail = [0.0]
+            for stage in reversed(recipe.stages):
+                tail.append(tail[-1] + max(_duration(job, ROOM_TEMPERATURE, heating) for job in stage))
+            remaining[name] = tail[::-1]
+        # Free Utensils are kept in heaps of (free from, number): Fridges as one entry per slot, and Ovens by
+        # temperature.
+        free = {kind: [(0, number) for number in range(count * (self.fridge_slots if kind == 'Fridge' else 1))]
+                for kind, count in counts.items() if kind != 'Oven'}
+        ovens: Dict[int, list] = {ROOM_TEMPERATURE: [(0, number) for number in range(counts.get('Oven', 0))]}
+        # The minutes every order waited for every kind of Utensil.
+        waited = {kind: [0.0] * len(orders) for kind in counts}
+        finished = [0.0] * len(orders)
+        # Stages are started in the order they become ready, so no Utensil stands idle while a stage waits for one. Of
+        # the stages ready at once, the ones with the most left to do after them go first.
+        ready_stages = [(arrival, -remaining[name][0], number, 0) for number, (name, arrival) in enumerate(orders)]
+        heapq.heapify(ready_stages)
+        while ready_stages:
+            ready, _, number, index = heapq.heappop(ready_stages)
+            name = orders[number][0]
+            stages = recipes[name].stages
+            if index == len(stages):
+                finished[number] = ready
+                continue
+            done = ready
+            for job in stages[index]:
+                if job.kind == 'Oven':
+                    best = None
+                    for degrees, heap in ovens.items():
+                        if heap:
+                            start = max(ready, heap[0][0])
+                            end = start + abs(job.degrees - degrees) / heating + job.minutes
+                            if best is None or end < best[0]:
+                                best = (end, start, degrees)
+                    end, start, degrees = best
+                    utensil = heapq.heappop(ovens[degrees])[1]
+                    heapq.heappush(ovens.setdefault(job.degrees, []), (end, utensil))
+                    waited['Oven'][number] += max(0, end - ready - _duration(job, ROOM_TEMPERATURE, heating))
+                else:
+                    heap = free[job.kind]
+                    available, slot = heap[0]
+                    start = max(ready, available)
+                    end = start + job.minutes
+                    heapq.heapreplace(heap, (end, slot))
+                    utensil = slot // self.fridge_slots if job.kind == 'Fridge' else slot
+                    waited[job.kind][number] += start - ready
+                if assignments is not None:
+                    assignments.append(Assignment(number, name, job.kind, utensil, start, end))
+                done = max(done, end)
+            heapq.heappush(ready_stages, (done, -remaining[name][index + 1], number, index + 1))
+        return finished, waited
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print('usage: python -m kitchen.Capacity <window minutes> <recipe.py>=<orders> ...')
+        sys.exit(2)
+    window = float(sys.argv[1])
+    wanted = []
+    for argument in sys.argv[2:]:
+        path, _, count = argument.partition('=')
+        wanted.append((path, int(count or 1)))
+    recipes = {}
+    for path, _ in wanted:
+        sys.stdout, printed = open(os.devnull, 'w'), sys.stdout
+        try:
+            recipes[path] = script_timings(path)
+        finally:
+            sys.stdout.close()
+            sys.stdout = printed
+    # Orders for different recipes are interleaved, as they would come in.
+    orders = [path for round in range(max(count for _, count in wanted)) for path, count in wanted if round < count]
+    schedule = CapacityPlanner(recipes, window).plan(orders)
+    print(schedule.report())
@@ -0,0 +1,111 @@
+import threading
+import weakref
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+from kitchen.Kitchen import KitchenObject, KitchenException, subclasses
+from kitchen.Instrumentation import operations
+from kitchen.ingredients.Collections import CompositeIngredient
+from kitchen.utensils.Utensil import Utensil
+
+_locks: Dict[int, threading.RLock] = {}
+_guard = threading.Lock()
+
+def lock(kitchen_object: KitchenObject) -> threading.RLock:
+    '''Returns the lock of the given KitchenObject, creating it the first time. The lock is dropped along with the
+    KitchenObject, and is not part of its state, so it is never copied or pickled.
+
+    Args:
+        kitchen_object (KitchenObject): the KitchenObject to return the lock of.
+
+    Returns:
+        threading.RLock: the lock of the KitchenObject.
+    '''
+
+    key = id(kitchen_object)
+    found = _locks.get(key)
+    if found is None:
+        with _guard:
+            found = _locks.get(key)
+            if found is None:
+                found = _locks[key] = threading.RLock()
+                weakref.finalize(kitchen_object, _locks.pop, key, None)
+    return found
+
+def _guarded() -> List[Tuple[type, str]]:
+    found = operations()
+    for cls in subclasses(CompositeIngredient):
+        if '_invalidate' in vars(cls):
+            found.append((cls, '_invalidate'))
+    for cls in subclasses(Utensil):
+        # Observing the contents of a Bowl applies its pending operations, which must not happen twice.
+        for name in ('contents', '_materialize'):
+            if name in vars(cls):
+                found.append((cls, name))
+    return found
+
+class Concurrency:
+    '''Makes the Kitchen safe to use from several threads at once while enabled, by giving every Utensil, Collection
+    and Portion a lock of its own that its operations hold. Threads working with different Utensils do not wait for
+    each other; only operations on the same object are serialized. For example, taking a Portion checks and subtracts
+    what is left in one step, so two threads taking from the same Bowl can no longer both take the last of it.
+
+    A Collection being changed also holds the locks of the Collections it is part of, from the inside out, while their
+    cached descriptions and Stats are invalidated, so that these are never left out of date.
+
+    Like Instrumentation, enabling replaces the operation methods on their classes, and disabling puts the original
+    methods back, so there is no cost at all outside of concurrent mode. When both are enabled, they should be
+    disabled in the reverse order. It can also be used as a context manager:
+
+        with Concurrency():
+            ...
+    '''
+
+    _active: Optional['Concurrency'] = None
+
+    def __init__(self):
+        self._originals: List[Tuple[type, str, object]] = []
+
+    def enable(self) -> 'Concurrency':
+        '''Starts concurrent mode.
+
+        Raises:
+            KitchenException: when concurrent mode is already enabled.
+
+        Returns:
+            Concurrency: this Concurrency.
+        '''
+
+        if Concurrency._active is not None:
+            raise KitchenException('Concurrent mode is already enabled!')
+        Concurrency._active = self
+        for cls, name in _guarded():
+            original = vars(cls)[name]
+            self._originals.append((cls, name, original))
+            if isinstance(original, property):
+                setattr(cls, name, property(_locked(original.fget), original.fset and _locked(original.fset)))
+            else:
+                setattr(cls, name, _locked(original))
+        return self
+
+    def disable(self):
+        '''Stops concurrent mode, and restores the original operation methods.'''
+
+        if Concurrency._active is not self:
+            return
+        for cls, name, original in reversed(self._originals):
+            setattr(cls, name, original)
+        self._originals.clear()
+        Concurrency._active = None
+
+    def __enter__(self) -> 'Concurrency':
+        return self.enable()
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+def _locked(method: Callable) -> Callable:
+    @wraps(method)
+    def locked(kitchen_object, *args, **kwargs):
+        with lock(kitchen_object):
+            return method(kitchen_object, *args, **kwargs)
+    return locked
@@ -0,0 +1,118 @@
+from typing import Any, Dict, List, Tuple
+from kitchen.Kitchen import KitchenObject
+from kitchen.ingredients.Ingredient import Ingredient
+from kitchen.ingredients.Collections import CompositeIngredient
+
+class Difference:
+    '''One difference between two dishes: a node that was added, removed or changed, or an attribute or amount that
+    changed, at a path such as 'Plate[0]/pancakes[3].cooked'. Every step of the path names an entry by its name or
+    class and by its position among the entries of its parent.'''
+
+    __slots__ = ('kind', 'path', 'before', 'after')
+
+    def __init__(self, kind: str, path: str, before: Any, after: Any):
+        self.kind = kind
+        self.path = path
+        self.before = before
+        self.after = after
+
+    def __eq__(self, other):
+        return isinstance(other, Difference) and (self.kind, self.path, self.before, self.after) == \
+               (other.kind, other.path, other.before, other.after)
+
+    def __hash__(self):
+        # Attributes such as cooked are lists, which are hashed as the tuples they are equal to.
+        before, after = (tuple(value) if isinstance(value, list) else value for value in (self.before, self.after))
+        return hash((self.kind, self.path, before, after))
+
+    def __repr__(self):
+        if self.kind == 'added':
+            return f'added {self.path}: {self.after}'
+        if self.kind == 'removed':
+            return f'removed {self.path}: {self.before}'
+        return f'changed {self.path}: {self.before} -> {self.after}'
+
+def diff(before: KitchenObject, after: KitchenObject) -> List[Difference]:
+    '''Returns the differences between two dishes, such as the same recipe served twice.
+
+    Subtrees are compared by their fingerprints first, which Collections keep up to date as they are changed, so
+    identical subtrees are skipped without being visited and the cost depends on the size of the differences rather
+    than on the size of the dishes. Entries are matched in order, then by fingerprint, then by name, so that an entry
+    that moved is not reported, and an entry that changed is reported by what changed inside it.
+
+    Args:
+        before (KitchenObject): the first dish.
+        after (KitchenObject): the second dish.
+
+    Returns:
+        List[Difference]: the differences, in the order of the dishes.
+    '''
+
+    differences = []
+    _diff(before, after, f'{_label(after)}[0]', differences)
+    return differences
+
+def _label(kitchen_object: KitchenObject) -> str:
+    return getattr(kitchen_object, 'name', None) or type(kitchen_object).__name__
+
+def _diff(before: KitchenObject, after: KitchenObject, path: str, differences: List[Difference]):
+    if before is after or before._fingerprint() == after._fingerprint():
+        return
+    if type(before) is not type(after) or isinstance(before, Ingredient) and not isinstance(before, CompositeIngredient):
+        differences.append(Difference('changed', path, before, after))
+        return
+    attributes = before._attributes()
+    for key, value in after._attributes().items():
+        if attributes.get(key) != value:
+            differences.append(Difference('changed', f'{path}.{key}', attributes.get(key), value))
+    _diff_entries(list(before._entries()), list(after._entries()), path, differences)
+
+def _same(before: Tuple[KitchenObject, int], after: Tuple[KitchenObject, int]) -> bool:
+    return before[1] == after[1] and (before[0] is after[0] or before[0]._fingerprint() == after[0]._fingerprint())
+
+def _diff_entries(before: List[Tuple[KitchenObject, int]], after: List[Tuple[KitchenObject, int]], path: str,
+                  differences: List[Difference]):
+    # Entries that are the same at the start and the end are skipped first, as most edits leave them in place.
+    start, shortest = 0, min(len(before), len(after))
+    while start < shortest and _same(before[start], after[start]):
+        start += 1
+    before_end, after_end = len(before), len(after)
+    while before_end > start and after_end > start and _same(before[before_end - 1], after[after_end - 1]):
+        before_end -= 1
+        after_end -= 1
+    remaining: Dict[int, List[int]] = {}
+    for index in range(start, before_end):
+        remaining.setdefault(before[index][0]._fingerprint(), []).append(index)
+    unmatched = []
+    for index in range(start, after_end):
+        child, amount = after[index]
+        indices = remaining.get(child._fingerprint())
+        if indices:
+            previous = indices.pop(0)
+            if before[previous][1] != amount:
+                differences.append(Difference('changed', f'{path}/{_label(child)}[{index}].amount',
+                                              before[previous][1], amount))
+        else:
+            unmatched.append(index)
+    # What is left was changed, if an entry of the same name is left on both sides, or else removed and added.
+    named: Dict[str, List[int]] = {}
+    for index in sorted(index for indices in remaining.values() for index in indices):
+        named.setdefault(_label(before[index][0]), []).append(index)
+    added = []
+    for index in unmatched:
+        child, amount = after[index]
+        indices = named.get(_label(child))
+        if indices:
+            previous = indices.pop(0)
+            step = f'{path}/{_label(child)}[{index}]'
+            if before[previous][1] != amount:
+                differences.append(Difference('changed', f'{step}.amount', before[previous][1], amount))
+            _diff(before[previous][0], child, step, differences)
+        else:
+            added.append(index)
+    for indices in named.values():
+        for index in indices:
+            differences.append(Difference('removed', f'{path}/{_label(before[index][0])}[{index}]',
+                                          before[index][0], None))
+    for index in added:
+        differences.append(Difference('added', f'{path}/{_label(after[index][0])}[{index}]', None, after[index][0]))
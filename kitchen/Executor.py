@@ -0,0 +1,124 @@
+import runpy
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+from kitchen.Kitchen import KitchenObject
+from kitchen.Rosemary import Rosemary, Served
+from kitchen.Transfer import SharedDish, _discard, _hand_over, share
+
+def _cook(recipe: Callable, args: tuple, kwargs: dict) -> Any:
+    with Rosemary.capture():
+        try:
+            return recipe(*args, **kwargs)
+        except Served as served:
+            return served.dish
+
+def _cook_script(path: str) -> Optional[KitchenObject]:
+    with Rosemary.capture():
+        try:
+            runpy.run_path(path, run_name='__main__')
+        except Served as served:
+            return served.dish
+    return None
+
+def _cook_shared(recipe: Callable, args: tuple, kwargs: dict) -> str:
+    return _hand_over(share(_cook(recipe, args, kwargs)))
+
+def _cook_many(recipe: Callable, arguments: Tuple[tuple, ...]) -> list:
+    return [_cook(recipe, args, {}) for args in arguments]
+
+class KitchenExecutor:
+    '''Runs recipes in a pool of worker processes, which are reused between recipes so the kitchen is only imported once
+    per worker.
+
+    A recipe is a function, or a script, that ends by serving a dish through Rosemary.serve. In the workers, serving
+    does not exit but hands the dish back. Dishes are sent back without the descriptions, Stats and parent references
+    cached on them, which are rebuilt here. Recipes that return instead of serving have their return value handed back.
+    Recipe functions have to be importable by the workers, so they should be defined at the top level of a module.
+    '''
+
+    def __init__(self, workers: Optional[int] = None):
+        self._pool = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(self, recipe: Callable, *args, **kwargs) -> 'Future[KitchenObject]':
+        '''Schedules the given recipe to be run with the given arguments.
+
+        Args:
+            recipe (Callable): the recipe function to run.
+
+        Returns:
+            Future[KitchenObject]: a Future for the served dish.
+        '''
+
+        return self._pool.submit(_cook, recipe, args, kwargs)
+
+    def submit_shared(self, recipe: Callable, *args, **kwargs) -> 'Future[SharedDish]':
+        '''Schedules the given recipe to be run with the given arguments, and the served dish to be sent back through
+        shared memory instead of being pickled, for large dishes. The dish is read in place and only built once it is
+        used.
+
+        Args:
+            recipe (Callable): the recipe function to run.
+
+        Returns:
+            Future[SharedDish]: a Future for the SharedDish, which should be closed once the dish has been built.
+        '''
+
+        shared = Future()
+
+        def done(future: Future):
+            # An error here would be lost in the pool's thread, leaving the Future waited on forever.
+            try:
+                if future.exception() is not None:
+                    shared.set_exception(future.exception())
+                else:
+                    shared.set_result(SharedDish(future.result()))
+            except BaseException as error:
+                if future.exception() is None:
+                    _discard(future.result())
+                shared.set_exception(error)
+        self._pool.submit(_cook_shared, recipe, args, kwargs).add_done_callback(done)
+        return shared
+
+    def submit_script(self, path: str) -> 'Future[KitchenObject]':
+        '''Schedules the given recipe script, such as Pancakes.py, to be run.
+
+        Args:
+            path (str): the path of the recipe script to run.
+
+        Returns:
+            Future[KitchenObject]: a Future for the served dish.
+        '''
+
+        return self._pool.submit(_cook_script, path)
+
+    def map(self, recipe: Callable, *iterables: Iterable, chunksize: int = 16) -> Iterator[KitchenObject]:
+        '''Runs the given recipe once for every set of arguments taken from the given iterables, like the built-in map.
+        Orders are sent to the workers in chunks, so that many small orders do not each pay for a round trip.
+
+        Args:
+            recipe (Callable): the recipe function to run.
+            chunksize (int): the number of orders to send to a worker at once. Defaults to 16.
+
+        Returns:
+            Iterator[KitchenObject]: the served dishes, in the order of the arguments.
+        '''
+
+        orders = list(zip(*iterables))
+        chunks = [tuple(orders[start:start + chunksize]) for start in range(0, len(orders), chunksize)]
+        results = self._pool.map(_cook_many, [recipe] * len(chunks), chunks)
+        return (result for chunk in results for result in chunk)
+
+    def shutdown(self, wait: bool = True):
+        '''Shuts the worker processes down once they have finished their current recipes.
+
+        Args:
+            wait (bool): whether to wait for the workers to finish. Defaults to True.
+        '''
+
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self) -> 'KitchenExecutor':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
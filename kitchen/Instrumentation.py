@@ -0,0 +1,245 @@
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+import weakref
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+from kitchen.Kitchen import KitchenObject, KitchenException, subclasses
+from kitchen.utensils.Utensil import Utensil
+from kitchen.ingredients.Collections import Collection, Portion
+
+MUTATORS = ('_add', '_add_many', '_take', '_mix', '_cook', '_flip', '_bake')
+'''The names of the private methods through which Collections and Portions are changed.'''
+
+def operations() -> List[Tuple[type, str]]:
+    '''Returns every (class, method name) pair that counts as a Kitchen operation: the public methods of every Utensil,
+    and the mutators of every Collection and Portion. Only methods defined on the class itself are listed, so inherited
+    methods appear once, under the class that defines them.
+
+    Returns:
+        List[Tuple[type, str]]: the operations, as pairs of the defining class and the method name.
+    '''
+
+    found = []
+    for cls in subclasses(Utensil):
+        for name, member in vars(cls).items():
+            if callable(member) and not isinstance(member, (staticmethod, classmethod)) and not name.startswith('_'):
+                found.append((cls, name))
+    for cls in subclasses(Collection) + subclasses(Portion):
+        for name in MUTATORS:
+            if callable(vars(cls).get(name)):
+                found.append((cls, name))
+    return found
+
+class OperationStats:
+    '''The call count, cumulative wall time and KitchenObject allocations recorded for one operation.'''
+
+    def __init__(self):
+        self.calls = 0
+        self.nanoseconds = 0
+        self.allocations = 0
+
+    def _record(self, nanoseconds: int, allocations: int):
+        self.calls += 1
+        self.nanoseconds += nanoseconds
+        self.allocations += allocations
+
+    @property
+    def milliseconds(self) -> float:
+        '''The cumulative wall time spent in this operation, in milliseconds.'''
+
+        return self.nanoseconds / 1e6
+
+class Instrumentation:
+    '''Records every Kitchen operation while enabled, per operation type and per utensil or collection instance.
+
+    Enabling replaces the operation methods on their classes with timing wrappers, and disabling puts the original
+    methods back, so there is no cost at all while no Instrumentation is enabled. Only one Instrumentation can be
+    enabled at a time. It can also be used as a context manager:
+
+        with Instrumentation(trace=True) as instrumentation:
+            ...
+        print(instrumentation.report())
+        instrumentation.write_trace('trace.json')
+    '''
+
+    _active: Optional['Instrumentation'] = None
+
+    def __init__(self, trace: bool = False):
+        self.trace = trace
+        self.operations: Dict[str, OperationStats] = {}
+        self.instances: Dict[Tuple[str, str], OperationStats] = {}
+        self.events: List[dict] = []
+        self.allocations = 0
+        self._labels: Dict[int, Tuple[weakref.ref, str]] = {}
+        self._numbers: Dict[str, int] = {}
+        self._originals: List[Tuple[type, str, Callable]] = []
+        self._start = 0
+
+    def enable(self) -> 'Instrumentation':
+        '''Starts recording Kitchen operations.
+
+        Raises:
+            KitchenException: when another Instrumentation is already enabled.
+
+        Returns:
+            Instrumentation: this Instrumentation.
+        '''
+
+        if Instrumentation._active is not None:
+            raise KitchenException('Instrumentation is already enabled!')
+        Instrumentation._active = self
+        self._start = time.perf_counter_ns()
+        for cls, name in operations():
+            original = vars(cls)[name]
+            self._originals.append((cls, name, original))
+            setattr(cls, name, self._wrap(original, name))
+        for cls in subclasses(KitchenObject):
+            if '__init__' in vars(cls):
+                original = vars(cls)['__init__']
+                self._originals.append((cls, '__init__', original))
+                setattr(cls, '__init__', self._count(original))
+        return self
+
+    def disable(self):
+        '''Stops recording Kitchen operations, and restores the original operation methods.'''
+
+        if Instrumentation._active is not self:
+            return
+        for cls, name, original in reversed(self._originals):
+            setattr(cls, name, original)
+        self._originals.clear()
+        Instrumentation._active = None
+
+    def __enter__(self) -> 'Instrumentation':
+        return self.enable()
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def _label(self, kitchen_object: KitchenObject) -> str:
+        key = id(kitchen_object)
+        entry = self._labels.get(key)
+        if entry is not None and entry[0]() is kitchen_object:
+            return entry[1]
+        kind = type(kitchen_object).__name__
+        number = self._numbers[kind] = self._numbers.get(kind, 0) + 1
+        if isinstance(kitchen_object, Utensil):
+            # Read the attribute directly, as observing the contents of a Bowl would apply its pending operations.
+            state = vars(kitchen_object)
+            name = getattr(state.get('contents', state.get('_contents')), 'name', None)
+        else:
+            name = getattr(kitchen_object, 'name', None)
+        label = f'{kind}#{number}' + (f' "{name}"' if name is not None else '')
+        labels = self._labels
+        self._labels[key] = (weakref.ref(kitchen_object, lambda ref: labels.pop(key, None)), label)
+        return label
+
+    def _wrap(self, method: Callable, name: str) -> Callable:
+        instrumentation = self
+        clock = time.perf_counter_ns
+
+        @wraps(method)
+        def instrumented(kitchen_object, *args, **kwargs):
+            allocations = instrumentation.allocations
+            start = clock()
+            try:
+                return method(kitchen_object, *args, **kwargs)
+            finally:
+                instrumentation._record(kitchen_object, name, start, clock() - start, instrumentation.allocations - allocations)
+        return instrumented
+
+    def _count(self, init: Callable) -> Callable:
+        instrumentation = self
+
+        @wraps(init)
+        def counted(kitchen_object, *args, **kwargs):
+            # Only the outermost __init__ counts, not the ones it reaches through super().
+            if type(kitchen_object).__init__ is counted:
+                instrumentation.allocations += 1
+            return init(kitchen_object, *args, **kwargs)
+        return counted
+
+    def _record(self, kitchen_object: KitchenObject, name: str, start: int, nanoseconds: int, allocations: int):
+        operation = f'{type(kitchen_object).__name__}.{name}'
+        label = self._label(kitchen_object)
+        stats = self.operations.get(operation)
+        if stats is None:
+            stats = self.operations[operation] = OperationStats()
+        stats._record(nanoseconds, allocations)
+        stats = self.instances.get((label, name))
+        if stats is None:
+            stats = self.instances[(label, name)] = OperationStats()
+        stats._record(nanoseconds, allocations)
+        if self.trace:
+            self.events.append({
+                'name': operation,
+                'cat': 'utensil' if isinstance(kitchen_object, Utensil) else 'collection',
+                'ph': 'X',
+                'ts': (start - self._start) / 1e3,
+                'dur': nanoseconds / 1e3,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': {'instance': label, 'allocations': allocations},
+            })
+
+    def report(self) -> str:
+        '''Returns a text report of the recorded operations, per operation type and per instance, slowest first.
+        Times and allocations are inclusive: the cost of an operation includes the operations it calls.
+
+        Returns:
+            str: the text report.
+        '''
+
+        def table(title: str, rows: Dict[str, OperationStats]) -> List[str]:
+            width = max([len(title)] + [len(key) for key in rows])
+            lines = [f'{title:<{width}}  {"calls":>8}  {"total ms":>10}  {"mean us":>10}  {"allocs":>8}']
+            for key, stats in sorted(rows.items(), key=lambda row: -row[1].nanoseconds):
+                lines.append(f'{key:<{width}}  {stats.calls:>8}  {stats.milliseconds:>10.3f}  '
+                             f'{stats.nanoseconds / stats.calls / 1e3:>10.2f}  {stats.allocations:>8}')
+            return lines
+
+        return '\n'.join(table('operation', self.operations) + ['']
+                         + table('instance', {f'{label}.{name}': stats for (label, name), stats in self.instances.items()}))
+
+    def write_trace(self, path: str):
+        '''Writes the recorded operations to a Chrome trace-event JSON file, which can be opened in chrome://tracing or
+        Perfetto. Operations are only recorded as events when this Instrumentation was created with trace=True.
+
+        Args:
+            path (str): the path of the JSON file to write.
+        '''
+
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, file)
+
+def run(path: str, trace: bool = False) -> Instrumentation:
+    '''Runs the given recipe script with Instrumentation enabled. Serving the dish ends the script as usual, but not the
+    interpreter.
+
+    Args:
+        path (str): the path of the recipe script to run.
+        trace (bool): whether to also record trace events. Defaults to False.
+
+    Returns:
+        Instrumentation: the Instrumentation holding the recorded operations.
+    '''
+
+    with Instrumentation(trace=trace) as instrumentation:
+        try:
+            runpy.run_path(path, run_name='__main__')
+        except SystemExit:
+            pass
+    return instrumentation
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3):
+        print('usage: python -m kitchen.Instrumentation <recipe.py> [trace.json]')
+        sys.exit(2)
+    instrumentation = run(sys.argv[1], trace=len(sys.argv) == 3)
+    print(instrumentation.report())
+    if len(sys.argv) == 3:
+        instrumentation.write_trace(sys.argv[2])
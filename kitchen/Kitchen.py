@@ -1,11 +1,119 @@
+from fractions import Fraction
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+DIGEST_MASK = (1 << 64) - 1
+'''The mask that keeps the digests of the contents of KitchenObjects to 64 bits.'''
+
 class KitchenException(Exception):
     '''An Exception raised in Rosemary's Kitchen when things go very, very wrong.'''
     
     def __init__(self, message: str, *args, **kwargs):
         Exception.__init__(self, 'The kitchen exploded!! '.upper() + message, *args, **kwargs)
 
+class Stats:
+    '''Statistics about the Ingredients inside a KitchenObject: the number of entries directly inside it, counting
+    repeated entries, the number of plain Ingredients anywhere inside it, the total quantity of every kind of
+    Ingredient, keyed by name and unit, and the number of Ingredients of every Ingredient class. Quantities and numbers
+    inside a Portion are scaled by the size of the Portion.'''
+
+    __slots__ = ('entries', 'items', 'quantities', 'counts')
+
+    def __init__(self, entries: int = 0, items: int = 0, quantities: Dict[Tuple[str, Optional[str]], Fraction] = None,
+                 counts: Dict[type, Fraction] = None):
+        self.entries = entries
+        self.items = items
+        self.quantities = quantities if quantities is not None else {}
+        self.counts = counts if counts is not None else {}
+
+    def _include(self, other: 'Stats', times: Union[Fraction, int] = 1, entries: int = 1):
+        self.entries += entries
+        self.items += other.items * entries
+        quantities = self.quantities
+        for key, quantity in other.quantities.items():
+            quantities[key] = quantities.get(key, 0) + quantity * times
+        counts = self.counts
+        for kind, count in other.counts.items():
+            counts[kind] = counts.get(kind, 0) + count * times
+
+    def _merge(self, delta: 'Stats'):
+        # Applies a change to these Stats, given as the Stats of what was added, negative for what was taken.
+        self.entries += delta.entries
+        self.items += delta.items
+        quantities = self.quantities
+        for key, quantity in delta.quantities.items():
+            quantities[key] = quantities.get(key, 0) + quantity
+        counts = self.counts
+        for kind, count in delta.counts.items():
+            counts[kind] = counts.get(kind, 0) + count
+
 class KitchenObject:
     '''An object is Rosemary's Kitchen, such as an Ingredient or Utensil.'''
+
+    __slots__ = ()
+
+    def _children(self) -> Iterable['KitchenObject']:
+        return ()
+
+    def _entries(self) -> Iterable[Tuple['KitchenObject', int]]:
+        return ((child, 1) for child in self._children())
+
+    def _attributes(self) -> Dict[str, Any]:
+        return {key: value for key, value in vars(self).items() if not key.startswith('_') and key != 'contents'}
+
+    def _state(self) -> tuple:
+        return tuple((key, tuple(value) if isinstance(value, list) else value) for key, value in self._attributes().items())
+
+    def _fingerprint(self) -> int:
+        # The contents are summed, as a multiset, so that their order does not matter.
+        contents = sum(child._fingerprint() * amount for child, amount in self._entries()) & DIGEST_MASK
+        return hash((type(self).__name__, self._state(), contents))
+
+    def _statistics(self) -> Stats:
+        stats = Stats()
+        for child in self._children():
+            stats._include(child._statistics())
+        return stats
+
+    def count(self, ingredient: type) -> Union[Fraction, int]:
+        '''Returns the number of Ingredients of the given kind anywhere inside this KitchenObject, read from its Stats,
+        so the cost does not depend on how deeply they are nested. Ingredients inside a Portion count in proportion to
+        the size of the Portion.
+
+        Args:
+            ingredient (type): the Ingredient class, e.g. Egg. Ingredients of its subclasses count as well.
+
+        Returns:
+            Union[Fraction, int]: the number of Ingredients of the given kind.
+        '''
+
+        return sum((count for kind, count in self._statistics().counts.items() if issubclass(kind, ingredient)), 0)
+
+    def contains(self, ingredient: type) -> bool:
+        '''Returns whether there is any Ingredient of the given kind anywhere inside this KitchenObject.
+
+        Args:
+            ingredient (type): the Ingredient class, e.g. Cinnamon. Ingredients of its subclasses count as well.
+
+        Returns:
+            bool: whether this KitchenObject contains the given kind of Ingredient.
+        '''
+
+        return self.count(ingredient) > 0
     
     def __repr__(self):
         return str(self)
+
+def subclasses(cls: type) -> List[type]:
+    '''Returns the given class and all of its subclasses, however deep, each once, as they are defined right now.
+
+    Args:
+        cls (type): the class, e.g. Utensil.
+
+    Returns:
+        List[type]: the class, followed by its subclasses.
+    '''
+
+    found = [cls]
+    for subclass in cls.__subclasses__():
+        found.extend(s for s in subclasses(subclass) if s not in found)
+    return found
@@ -0,0 +1,278 @@
+from fractions import Fraction
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+from kitchen.Kitchen import KitchenException
+from kitchen.Executor import _cook
+from kitchen.ingredients.Ingredient import Ingredient
+from kitchen.ingredients.Collections import Mixture, Portion
+from kitchen.utensils.Utensil import Bowl, UtensilHook
+
+class Preparation:
+    '''A Mixture that several orders prepare the same way: with the same name, the same Ingredients added in the same
+    amounts, and mixed or not, before they first take from it or divide it.
+
+    It is made once, at the scale of one order, with one addition per kind of Ingredient, and every order using it
+    gets a whole Portion of it as its share, so that its dish is described as if it had been cooked on its own.
+    '''
+
+    def __init__(self, name: Optional[str], contents: Dict[Ingredient, int], mixed: bool):
+        self.name = name
+        self.contents = contents
+        self.mixed = mixed
+        self.orders = 0
+        self.mixture: Optional[Mixture] = None
+        self._shares: List[Portion] = []
+
+    def _make(self):
+        mixture = Mixture(self.name)
+        for item, amount in self.contents.items():
+            mixture._add(item, amount)
+        if self.mixed:
+            mixture._mix()
+        self.mixture = mixture
+        self._shares = [Portion(mixture) for _ in range(self.orders)]
+
+    def _share(self) -> Portion:
+        return self._shares.pop()
+
+class PlannedBowl(Bowl):
+    '''A Bowl used by an order while a MenuPlanner cooks it. Adding and mixing are only recorded until the order first
+    takes from the Bowl or divides it. Then the Bowl gets the order's share of the Preparation made the same way, if
+    the planner made one, and takes from that share in proportion. If the contents are looked at before that, such as
+    by tasting them, or there is no Preparation, the recorded Ingredients are added to a Mixture of the Bowl's own,
+    and it works as any other Bowl.
+    '''
+
+    def __init__(self, planner: 'MenuPlanner', name: str = None):
+        super().__init__(name)
+        self._planner = planner
+        self._name = name
+        self._recipe: Optional[Dict[Ingredient, int]] = {}
+        self._mixed = False
+        self._scale: Optional[Fraction] = None
+        self._number = planner._number_bowl()
+
+    @property
+    def contents(self):
+        '''The current contents of the Bowl: its own Mixture, or its share of a Preparation once it has been used.'''
+
+        if self._recipe is not None:
+            self._keep()
+        return super().contents
+
+    @contents.setter
+    def contents(self, contents):
+        # Contents put in the Bowl from outside, such as by a Fridge, are used as they are.
+        self._recipe = None
+        self._scale = None
+        self._contents = contents
+        self._mixing = False
+
+    def _keep(self):
+        recipe, self._recipe = self._recipe, None
+        mixture = self._contents
+        for item, amount in recipe.items():
+            mixture._add(item, amount)
+        self._planner.additions_made += len(recipe)
+        self._mixing = self._mixed
+
+    def _settle(self):
+        share = self._planner._settle(self._number, (self._name, tuple(self._recipe.items()), self._mixed))
+        if share is None:
+            self._keep()
+        else:
+            self.contents = share
+            self._scale = share.portion
+
+    def add(self, item: Ingredient):
+        '''Adds the given item to the Bowl.
+
+        Args:
+            item (Ingredient): the item, which should be an Ingredient, to add to the Bowl.
+
+        Raises:
+            KitchenException: when you try to add anything after using your mixture.
+        '''
+
+        if self._recipe is None:
+            super().add(item)
+            self._planner.additions += 1
+            self._planner.additions_made += 1
+            return
+        if not isinstance(item, Ingredient):
+            raise KitchenException('Can only add edible things')
+        self._recipe[item] = self._recipe.get(item, 0) + 1
+        self._planner.additions += 1
+
+    def add_many(self, items: Iterable[Ingredient]):
+        '''Adds the given items to the Bowl, checking them all first and then adding them at once.
+
+        Args:
+            items (Iterable[Ingredient]): the items, which should be Ingredients, to add to the Bowl.
+
+        Raises:
+            KitchenException: when you try to add anything after using your mixture, in which case nothing is added.
+        '''
+
+        items = list(items)
+        if self._recipe is None:
+            super().add_many(items)
+            self._planner.additions += len(items)
+            self._planner.additions_made += len(items)
+            return
+        for item in items:
+            if not isinstance(item, Ingredient):
+                raise KitchenException('Can only add edible things')
+        recipe = self._recipe
+        for item in items:
+            recipe[item] = recipe.get(item, 0) + 1
+        self._planner.additions += len(items)
+
+    def mix(self):
+        '''Mixes the current contents of the Bowl.
+
+        Raises:
+            KitchenException: when you try to mix after using your mixture.
+        '''
+
+        if self._recipe is None:
+            return super().mix()
+        self._mixed = True
+
+    def take(self, portion: str = '1') -> Portion:
+        '''Returns a given portion of the current contents of the Bowl. The Mixture cannot be further altered after having taken part of it.
+
+        Args:
+            portion (str): the fraction of the current contents of the Bowl to return, as a string (e.g. '1/4'). Defaults to '1'.
+
+        Returns:
+            Portion: the given portion of the current contents of the Bowl.
+        '''
+
+        if self._recipe is not None:
+            self._settle()
+        if self._scale is not None:
+            return self._contents._take(Fraction(portion) * self._scale)
+        return super().take(portion)
+
+    def divide(self, portions: int) -> List[Portion]:
+        '''Returns a list with a given number of equally divided portions of the current contents of the Bowl.
+
+        Args:
+            portions (int): the number of desired portions to divide the current contents of the Bowl into.
+
+        Raises:
+            KitchenException: when you try to divide the contents after having already taken part of them.
+
+        Returns:
+            List[Portion]: a list of equally divided portions of the current contents of the Bowl.
+        '''
+
+        if self._recipe is not None:
+            self._settle()
+        if self._scale is None:
+            return super().divide(portions)
+        if self._contents.portion != self._scale:
+            raise KitchenException('You can only divide bowl contents before using your mixture in another way!')
+        return [self.take(f'1/{portions}') for i in range(portions)]
+
+class MenuPlanner(UtensilHook):
+    '''Cooks a batch of orders, making every Mixture that several orders prepare the same way only once, and giving
+    each of them a whole Portion of it. When 200 orders for pancakes each mix the same batter, the batter is mixed
+    once, with one addition per kind of Ingredient, instead of 200 times.
+
+    Orders are recipe functions, which get PlannedBowls from Bowl.use while they are cooked, in the thread cooking
+    them only. Recipes are run as by KitchenExecutor: serving hands the dish back instead of exiting. The first order
+    of every recipe and arguments is cooked on its own, to find out what it prepares; recipes are expected to prepare
+    the same every time they are cooked with the same arguments. The Preparations are then made for the other orders,
+    which are cooked with their shares.
+
+        planner = MenuPlanner()
+        dishes = planner.cook([(pancake, 16)] * 200)
+        print(planner.report())
+    '''
+
+    def __init__(self):
+        self.preparations: Dict[tuple, Preparation] = {}
+        self.additions = 0
+        self.additions_made = 0
+        self._plan: List[Optional[tuple]] = []
+        self._planning = False
+        self._bowls = 0
+
+    def cook(self, orders: Iterable[Sequence]) -> List[Any]:
+        '''Cooks the given orders, sharing the Mixtures they prepare the same way.
+
+        Args:
+            orders (Iterable[Sequence]): the orders, each a recipe function followed by its arguments, e.g. (pancake, 16).
+
+        Returns:
+            List[Any]: the served dishes, in the order of the orders.
+        '''
+
+        orders = [tuple(order) for order in orders]
+        kinds: Dict[Hashable, List[int]] = {}
+        for number, order in enumerate(orders):
+            try:
+                kinds.setdefault(order, []).append(number)
+            except TypeError:
+                kinds[number] = [number]
+        dishes: List[Any] = [None] * len(orders)
+        plans: Dict[Hashable, List[Optional[tuple]]] = {}
+        with self:
+            self._planning = True
+            for kind, numbers in kinds.items():
+                dishes[numbers[0]] = self._cook(orders[numbers[0]], [])
+                plans[kind] = self._plan
+                for key in self._plan:
+                    if key is not None and len(numbers) > 1:
+                        self.preparations[key].orders += len(numbers) - 1
+            self._planning = False
+            for preparation in self.preparations.values():
+                if preparation.orders:
+                    preparation._make()
+                    self.additions_made += len(preparation.contents)
+            for kind, numbers in kinds.items():
+                for number in numbers[1:]:
+                    dishes[number] = self._cook(orders[number], plans[kind])
+        return dishes
+
+    def _cook(self, order: Tuple, plan: List[Optional[tuple]]) -> Any:
+        self._plan = plan if not self._planning else []
+        self._bowls = 0
+        return _cook(order[0], order[1:], {})
+
+    def _use_bowl(self, name: Optional[str], lazy: bool) -> Bowl:
+        return PlannedBowl(self, name)
+
+    def _number_bowl(self) -> int:
+        number = self._bowls
+        self._bowls += 1
+        if self._planning:
+            self._plan.append(None)
+        return number
+
+    def _settle(self, number: int, key: tuple) -> Optional[Portion]:
+        if self._planning:
+            self._plan[number] = key
+            self.preparations.setdefault(key, Preparation(key[0], dict(key[1]), key[2]))
+            return None
+        # An order that prepares something else than planned makes it in its own Bowl.
+        if number < len(self._plan) and self._plan[number] == key:
+            return self.preparations[key]._share()
+        return None
+
+    def report(self) -> str:
+        '''Returns a text report of the Preparations that were shared, and of the additions of Ingredients saved.
+
+        Returns:
+            str: the report.
+        '''
+
+        lines = []
+        for preparation in self.preparations.values():
+            if not preparation.orders:
+                continue
+            lines.append(f'{preparation.name or "mixture"}: {len(preparation.contents)} kinds of ingredient, '
+                         f'shared by {preparation.orders} orders')
+        lines.append(f'{self.additions_made} additions of ingredients made for {self.additions} asked for')
+        return '\n'.join(lines)
@@ -0,0 +1,245 @@
+import threading
+from fractions import Fraction
+from typing import Dict, List, Optional, Union
+from kitchen.Kitchen import KitchenException
+from kitchen.ingredients.Ingredient import Ingredient, UncountableIngredient
+
+Quantity = Union[int, Fraction]
+
+class Stock:
+    '''The stock of one kind of Ingredient in a Pantry: how much is left, in which unit, and below which level it is
+    running low. Countable Ingredients, such as Eggs, have no unit and are counted.'''
+
+    __slots__ = ('ingredient', 'name', 'unit', 'level', 'low')
+
+    def __init__(self, ingredient: type, name: str, unit: Optional[str], level: Quantity, low: Quantity):
+        self.ingredient = ingredient
+        self.name = name
+        self.unit = unit
+        self.level = level
+        self.low = low
+
+    def __repr__(self):
+        return f'{self.level} {self.unit} of {self.name}' if self.unit else f'{self.level}x {self.name}'
+
+def _name(ingredient: type) -> str:
+    # The name of an Ingredient is only known from an instance, so one is taken in a nominal amount.
+    item = ingredient.take('1') if issubclass(ingredient, UncountableIngredient) else ingredient.take()
+    return item.name
+
+def _quantity(stock: Stock, item: Union[Ingredient, List[Ingredient]]) -> Quantity:
+    if isinstance(item, list):
+        return len(item)
+    _, unit, quantity = item._quantity()
+    if unit != stock.unit:
+        raise KitchenException(f'The pantry keeps {stock.name} in {stock.unit or "pieces"}, not in {unit or "pieces"}!')
+    return quantity
+
+class Pantry:
+    '''The stock of Ingredients that recipes take from, instead of taking Ingredients from nothing. Stocks are found by
+    their Ingredient class or by name in one lookup, and the stocks running low are kept in an index as they change,
+    so taking and asking what is running low do not depend on the number of stocks.
+
+    Taking and reserving are safe to use from several threads at once.
+
+        pantry = Pantry()
+        pantry.stock(Flour, 1000, 'g', low=200)
+        pantry.stock(Egg, 12, low=4)
+        with pantry.reserve({Flour: 250, Egg: 2}) as reservation:
+            bowl.add(reservation.take(Flour, grams=250))
+    '''
+
+    def __init__(self):
+        self._stocks: Dict[Union[type, str], Stock] = {}
+        self._low: Dict[str, Stock] = {}
+        self._lock = threading.Lock()
+
+    def stock(self, ingredient: type, level: Quantity, unit: str = None, low: Quantity = 0) -> Stock:
+        '''Adds the given amount of the given kind of Ingredient to the Pantry.
+
+        Args:
+            ingredient (type): the Ingredient class, e.g. Flour.
+            level (Quantity): the amount to add, in the given unit.
+            unit (str): the unit the Ingredient is kept in, e.g. 'g'. Defaults to None, for countable Ingredients.
+            low (Quantity): the level at or below which the Ingredient is running low. Defaults to 0.
+
+        Raises:
+            KitchenException: when the level or the low level is negative, or the Ingredient is already kept in another
+                unit.
+
+        Returns:
+            Stock: the Stock of the Ingredient.
+        '''
+
+        if level < 0 or low < 0:
+            raise KitchenException(f'Cannot stock {ingredient.__name__} at a negative level!')
+        with self._lock:
+            stock = self._stocks.get(ingredient)
+            if stock is None:
+                name = _name(ingredient)
+                stock = Stock(ingredient, name, unit, 0, low)
+                self._stocks[ingredient] = self._stocks[name] = stock
+            elif stock.unit != unit:
+                raise KitchenException(f'The pantry keeps {stock.name} in {stock.unit or "pieces"}, '
+                                       f'not in {unit or "pieces"}!')
+            else:
+                stock.low = low
+            stock.level += level
+            self._index(stock)
+        return stock
+
+    def level(self, ingredient: Union[type, str]) -> Quantity:
+        '''Returns how much of the given kind of Ingredient is left.
+
+        Args:
+            ingredient (Union[type, str]): the Ingredient class, or its name.
+
+        Returns:
+            Quantity: the amount left, in the unit the Ingredient is kept in.
+        '''
+
+        return self._find(ingredient).level
+
+    def take(self, ingredient: Union[type, str], *args, **kwargs) -> Union[Ingredient, List[Ingredient]]:
+        '''Takes an Ingredient from the Pantry, with the same arguments as its take method.
+
+        Args:
+            ingredient (Union[type, str]): the Ingredient class, or its name.
+
+        Raises:
+            KitchenException: when there is not enough of the Ingredient left.
+
+        Returns:
+            Union[Ingredient, List[Ingredient]]: the Ingredient, or a list of countable Ingredients.
+        '''
+
+        stock = self._find(ingredient)
+        item = stock.ingredient.take(*args, **kwargs)
+        quantity = _quantity(stock, item)
+        with self._lock:
+            if quantity > stock.level:
+                raise KitchenException(f'Not enough {stock.name} left!')
+            stock.level -= quantity
+            if stock.level <= stock.low:
+                self._low[stock.name] = stock
+        return item
+
+    def reserve(self, quantities: Dict[Union[type, str], Quantity]) -> 'Reservation':
+        '''Reserves the given amounts of Ingredients for a recipe, all at once or not at all.
+
+        Args:
+            quantities (Dict[Union[type, str], Quantity]): the amount of each Ingredient, by class or name, in the unit
+                it is kept in.
+
+        Raises:
+            KitchenException: when an amount is not positive, or there is not enough of one of the Ingredients left, in
+                which case nothing is reserved.
+
+        Returns:
+            Reservation: the Reservation, to take the Ingredients from.
+        '''
+
+        # The same Stock can be asked for by class and by name, so the amounts are added up per Stock first.
+        totals: Dict[str, Quantity] = {}
+        stocks: Dict[str, Stock] = {}
+        for ingredient, quantity in quantities.items():
+            stock = self._find(ingredient)
+            # An amount given back this way would be added to the Pantry, and a Reservation of nothing is a mistake.
+            if quantity <= 0:
+                raise KitchenException(f'Cannot reserve {quantity} of {stock.name}!')
+            stocks[stock.name] = stock
+            totals[stock.name] = totals.get(stock.name, 0) + quantity
+        with self._lock:
+            for name, quantity in totals.items():
+                if quantity > stocks[name].level:
+                    raise KitchenException(f'Not enough {name} left!')
+            for name, quantity in totals.items():
+                stocks[name].level -= quantity
+                self._index(stocks[name])
+        return Reservation(self, totals)
+
+    def low_stock(self) -> List[Stock]:
+        '''Returns the Stocks that are running low.
+
+        Returns:
+            List[Stock]: the Stocks at or below their low level.
+        '''
+
+        with self._lock:
+            return list(self._low.values())
+
+    def _find(self, ingredient: Union[type, str]) -> Stock:
+        stock = self._stocks.get(ingredient)
+        if stock is None:
+            raise KitchenException(f'The pantry has no {getattr(ingredient, "__name__", ingredient)}!')
+        return stock
+
+    def _index(self, stock: Stock):
+        if stock.level <= stock.low:
+            self._low[stock.name] = stock
+        else:
+            self._low.pop(stock.name, None)
+
+    def _return(self, quantities: Dict[str, Quantity]):
+        with self._lock:
+            for name, quantity in quantities.items():
+                stock = self._stocks[name]
+                stock.level += quantity
+                self._index(stock)
+
+class Reservation:
+    '''Amounts of Ingredients reserved in a Pantry for one recipe. Ingredients are taken from the Reservation instead
+    of from the Pantry. Releasing the Reservation returns what was not taken. Used as a context manager, it is
+    released when the recipe is done, and rolled back when the recipe fails, returning everything it reserved.'''
+
+    def __init__(self, pantry: Pantry, quantities: Dict[str, Quantity]):
+        self.pantry = pantry
+        self.reserved = dict(quantities)
+        self.left = dict(quantities)
+        self._open = True
+
+    def take(self, ingredient: Union[type, str], *args, **kwargs) -> Union[Ingredient, List[Ingredient]]:
+        '''Takes a reserved Ingredient, with the same arguments as its take method.
+
+        Args:
+            ingredient (Union[type, str]): the Ingredient class, or its name.
+
+        Raises:
+            KitchenException: when more of the Ingredient is taken than was reserved.
+
+        Returns:
+            Union[Ingredient, List[Ingredient]]: the Ingredient, or a list of countable Ingredients.
+        '''
+
+        stock = self.pantry._find(ingredient)
+        if not self._open or stock.name not in self.left:
+            raise KitchenException(f'No {stock.name} was reserved!')
+        item = stock.ingredient.take(*args, **kwargs)
+        quantity = _quantity(stock, item)
+        if quantity > self.left[stock.name]:
+            raise KitchenException(f'Not enough {stock.name} reserved!')
+        self.left[stock.name] -= quantity
+        return item
+
+    def release(self):
+        '''Returns the Ingredients that were reserved but not taken to the Pantry.'''
+
+        if self._open:
+            self._open = False
+            self.pantry._return(self.left)
+
+    def rollback(self):
+        '''Returns everything that was reserved to the Pantry, including the Ingredients that were taken.'''
+
+        if self._open:
+            self._open = False
+            self.pantry._return(self.reserved)
+
+    def __enter__(self) -> 'Reservation':
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.release()
+        else:
+            self.rollback()
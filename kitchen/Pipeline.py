@@ -0,0 +1,254 @@
+import json
+import queue
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+from kitchen.Kitchen import KitchenException
+from kitchen.Executor import _cook
+from kitchen.Rendering import Renderer
+
+STAGES = ('parse', 'resolve', 'cook', 'serve')
+'''The names of the stages of a Pipeline, in the order orders go through them.'''
+
+class Order:
+    '''One order going through a Pipeline: the line it came from, the recipe and arguments it asks for, and the dish
+    that was served, or the error that stopped it.'''
+
+    __slots__ = ('number', 'line', 'id', 'recipe', 'args', 'kwargs', 'dish', 'error', 'received')
+
+    def __init__(self, number: int, line: str):
+        self.number = number
+        self.line = line
+        self.id = number
+        self.recipe: Any = None
+        self.args: list = []
+        self.kwargs: dict = {}
+        self.dish: Any = None
+        self.error: Optional[BaseException] = None
+        self.received = time.perf_counter()
+
+class StageStats:
+    '''The counters of one stage of a Pipeline.'''
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.orders = 0
+        self.errors = 0
+        self.busy = 0.
+        self.slowest = 0.
+        self._lock = threading.Lock()
+
+    def _record(self, seconds: float, failed: bool):
+        with self._lock:
+            self.orders += 1
+            self.errors += failed
+            self.busy += seconds
+            if seconds > self.slowest:
+                self.slowest = seconds
+
+    @property
+    def latency(self) -> float:
+        '''The average time the stage spent on an order, in seconds.'''
+
+        return self.busy / self.orders if self.orders else 0.
+
+class _Stopped(Exception):
+    pass
+
+_END = object()
+
+class Pipeline:
+    '''Cooks a stream of orders, given as JSON lines such as {"id": 1, "recipe": "pancake", "args": [16]}, in four
+    stages: parse the line, resolve the recipe, cook it and serve the dish to a sink. Each stage runs on its own
+    threads, and the stages are connected by bounded queues: when a stage falls behind, the stages before it wait, down
+    to reading the input, so the memory used does not depend on the length of the input.
+
+    Recipes are only found by name in the given dictionary, so that orders cannot run any other code: every recipe to
+    serve is registered there. They are run as by KitchenExecutor: serving hands the dish back instead of exiting.
+    Dishes are written to the sink one per line, as Rosemary would serve them. An error reading the lines stops the
+    Pipeline once the orders read before it are done, and is raised from stream and run.
+
+        pipeline = Pipeline({'pancake': pancake}, workers={'cook': 4})
+        pipeline.run(open('orders.jsonl'), sys.stdout)
+        print(pipeline.report())
+    '''
+
+    def __init__(self, recipes: Dict[str, Callable] = None, workers: Dict[str, int] = None, queue_size: int = 64):
+        self.recipes = dict(recipes or {})
+        self.workers = {stage: 1 for stage in STAGES}
+        self.workers.update(workers or {})
+        self.queue_size = queue_size
+        self.stats: Dict[str, StageStats] = {}
+        self.seconds = 0.
+        self._sink: Optional[TextIO] = None
+        self._sink_lock = threading.Lock()
+
+    def stream(self, lines: Iterable[str], sink: Optional[TextIO] = None) -> Iterator[Order]:
+        '''Cooks the orders from the given lines, yielding every Order once it has been served, in the order they are
+        finished. Stopping early stops the Pipeline.
+
+        Args:
+            lines (Iterable[str]): the JSON lines of the orders, read only as fast as they are cooked.
+            sink (TextIO): the file-like object to serve the dishes to. Defaults to None, for not writing them.
+
+        Raises:
+            Exception: the error raised by the lines, or any error other than an Exception raised by a stage, once the
+                Orders before it have been yielded.
+
+        Returns:
+            Iterator[Order]: the served Orders, with either a dish or an error.
+        '''
+
+        self._sink = sink
+        self._failure: Optional[BaseException] = None
+        self.stats = {stage: StageStats(stage, self.workers[stage]) for stage in STAGES}
+        queues = [queue.Queue(self.queue_size) for _ in range(len(STAGES) + 1)]
+        stopped = threading.Event()
+        threads = [threading.Thread(target=self._feed, args=(lines, queues[0], stopped), daemon=True)]
+        for index, stage in enumerate(STAGES):
+            remaining = [self.workers[stage]]
+            function = getattr(self, f'_{stage}')
+            for _ in range(self.workers[stage]):
+                threads.append(threading.Thread(
+                    target=self._work, daemon=True,
+                    args=(stage, function, queues[index], queues[index + 1], remaining, stopped)))
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                order = queues[-1].get()
+                if order is _END:
+                    break
+                yield order
+            if self._failure is not None:
+                raise self._failure
+        finally:
+            stopped.set()
+            self.seconds = time.perf_counter() - start
+
+    def run(self, lines: Iterable[str], sink: TextIO = sys.stdout) -> Dict[str, StageStats]:
+        '''Cooks every order from the given lines, serving the dishes to the given sink.
+
+        Args:
+            lines (Iterable[str]): the JSON lines of the orders.
+            sink (TextIO): the file-like object to serve the dishes to. Defaults to standard output.
+
+        Returns:
+            Dict[str, StageStats]: the counters of every stage.
+        '''
+
+        for _ in self.stream(lines, sink):
+            pass
+        return self.stats
+
+    def _feed(self, lines: Iterable[str], output: queue.Queue, stopped: threading.Event):
+        try:
+            for number, line in enumerate(lines):
+                if line.strip():
+                    _put(output, Order(number, line), stopped)
+        except _Stopped:
+            return
+        except BaseException as error:
+            self._failure = error
+        # The stages are told to finish however the lines ended, or stream would wait for them forever.
+        try:
+            for _ in range(self.workers[STAGES[0]]):
+                _put(output, _END, stopped)
+        except _Stopped:
+            pass
+
+    def _work(self, stage: str, function: Callable, input: queue.Queue, output: queue.Queue, remaining: List[int],
+              stopped: threading.Event):
+        stats = self.stats[stage]
+        clock = time.perf_counter
+        try:
+            while True:
+                order = _get(input, stopped)
+                if order is _END:
+                    break
+                if order.error is None:
+                    start = clock()
+                    try:
+                        function(order)
+                    except Exception as error:
+                        order.error = error
+                    stats._record(clock() - start, order.error is not None)
+                _put(output, order, stopped)
+        except _Stopped:
+            return
+        except BaseException as error:
+            self._failure = error
+        finally:
+            with stats._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+        # The last worker of a stage to finish, however it finished, tells every worker of the next stage to finish.
+        if last:
+            following = STAGES.index(stage) + 1
+            try:
+                for _ in range(self.workers[STAGES[following]] if following < len(STAGES) else 1):
+                    _put(output, _END, stopped)
+            except _Stopped:
+                pass
+
+    def _parse(self, order: Order):
+        fields = json.loads(order.line)
+        if isinstance(fields, dict):
+            order.id = fields.get('id', order.number)
+            order.recipe = fields.get('recipe')
+            order.args = fields.get('args', [])
+            order.kwargs = fields.get('kwargs', {})
+        else:
+            order.recipe = fields
+        if not isinstance(order.recipe, str):
+            raise KitchenException('An order needs the name of a recipe!')
+
+    def _resolve(self, order: Order):
+        recipe = self.recipes.get(order.recipe)
+        if recipe is None:
+            raise KitchenException(f'The kitchen does not know how to make {order.recipe}!')
+        order.recipe = recipe
+
+    def _cook(self, order: Order):
+        order.dish = _cook(order.recipe, tuple(order.args), order.kwargs)
+
+    def _serve(self, order: Order):
+        if self._sink is not None:
+            with self._sink_lock:
+                self._sink.write(f'{order.id}: Rosemary serves ')
+                Renderer(self._sink).render(order.dish)
+                self._sink.write('\n')
+
+    def report(self) -> str:
+        '''Returns a text report of the throughput and latency of every stage.
+
+        Returns:
+            str: the report.
+        '''
+
+        lines = [f'{"stage":<8} {"workers":>7} {"orders":>8} {"errors":>7} {"orders/s":>10} {"avg ms":>8} {"max ms":>8}']
+        for stats in self.stats.values():
+            lines.append(f'{stats.name:<8} {stats.workers:>7} {stats.orders:>8} {stats.errors:>7} '
+                         f'{stats.orders / self.seconds if self.seconds else 0:>10.1f} '
+                         f'{stats.latency * 1e3:>8.3f} {stats.slowest * 1e3:>8.3f}')
+        return '\n'.join(lines)
+
+def _put(output: queue.Queue, item: Any, stopped: threading.Event):
+    while True:
+        try:
+            output.put(item, timeout=.1)
+            return
+        except queue.Full:
+            if stopped.is_set():
+                raise _Stopped
+
+def _get(input: queue.Queue, stopped: threading.Event) -> Any:
+    while True:
+        try:
+            return input.get(timeout=.1)
+        except queue.Empty:
+            if stopped.is_set():
+                raise _Stopped
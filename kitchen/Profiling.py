@@ -0,0 +1,159 @@
+import gc
+import sys
+import time
+import tracemalloc
+from contextlib import ContextDecorator
+from typing import Dict, List, Tuple
+from kitchen.Kitchen import KitchenObject
+
+_FILTERS = (tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__))
+
+def _tree_size(root: KitchenObject) -> Tuple[int, int]:
+    seen = set()
+    pending = [root]
+    size = 0
+    while pending:
+        kitchen_object = pending.pop()
+        if id(kitchen_object) in seen:
+            continue
+        seen.add(id(kitchen_object))
+        size += sys.getsizeof(kitchen_object)
+        # Plain Ingredients keep their state in slots rather than in a dictionary.
+        state = getattr(kitchen_object, '__dict__', None)
+        if state is not None:
+            size += sys.getsizeof(state)
+        contents = getattr(kitchen_object, 'contents', None)
+        if isinstance(contents, (dict, list)):
+            size += sys.getsizeof(contents)
+        pending.extend(kitchen_object._children())
+    return len(seen), size
+
+class StepRecord:
+    '''The memory usage recorded for one named recipe step.'''
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.
+        self.allocated = 0
+        self.peak = 0
+        self.sites: List[Tuple[str, int, int]] = []
+        self.live: Dict[str, int] = {}
+        self.live_change: Dict[str, int] = {}
+        self.trees: List[Tuple[str, int, int]] = []
+
+class Step(ContextDecorator):
+    '''Marks a named recipe step for a MemoryProfile. Can be used as a context manager or as a decorator:
+
+        with profile.step('Step 1'):
+            ...
+
+        @profile.step('Step 2')
+        def mix_pastry():
+            ...
+    '''
+
+    def __init__(self, profile: 'MemoryProfile', name: str):
+        self.profile = profile
+        self.name = name
+        self._started_tracing = False
+        self._snapshot = None
+        self._live: Dict[str, int] = {}
+        self._start = 0.
+        self._before = 0
+
+    def __enter__(self) -> 'Step':
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        self._live = MemoryProfile._live()
+        self._snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        tracemalloc.reset_peak()
+        self._before = tracemalloc.get_traced_memory()[0]
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record = StepRecord(self.name)
+        record.seconds = time.perf_counter() - self._start if self._start else 0.
+        current, peak = tracemalloc.get_traced_memory()
+        record.allocated = current - self._before
+        record.peak = peak - self._before
+        # A Step exited without being entered has no snapshot to compare with.
+        if self._snapshot is not None:
+            snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+            record.sites = [(str(stat.traceback[0]), stat.size_diff, stat.count_diff) for stat in
+                            snapshot.compare_to(self._snapshot, 'lineno')[:self.profile.sites] if stat.size_diff != 0]
+        self._snapshot = None
+        if self._started_tracing:
+            tracemalloc.stop()
+        record.live = MemoryProfile._live()
+        record.live_change = {kind: record.live.get(kind, 0) - self._live.get(kind, 0)
+                              for kind in set(record.live) | set(self._live)
+                              if record.live.get(kind, 0) != self._live.get(kind, 0)}
+        record.trees = MemoryProfile._largest_trees(self.profile.trees)
+        self.profile.steps.append(record)
+        return False
+
+class MemoryProfile:
+    '''Collects the memory usage of named recipe steps: the tracemalloc deltas, the number of live KitchenObjects per
+    class, and the largest trees of KitchenObjects that are retained when each step ends.'''
+
+    def __init__(self, trees: int = 3, sites: int = 5):
+        self.trees = trees
+        self.sites = sites
+        self.steps: List[StepRecord] = []
+
+    def step(self, name: str) -> Step:
+        '''Returns a Step with the given name, to use as a context manager or decorator.
+
+        Args:
+            name (str): the name of the recipe step, e.g. 'Step 1'.
+
+        Returns:
+            Step: the Step marking the recipe step.
+        '''
+
+        return Step(self, name)
+
+    @staticmethod
+    def _live() -> Dict[str, int]:
+        live = {}
+        for kitchen_object in gc.get_objects():
+            if isinstance(kitchen_object, KitchenObject):
+                kind = type(kitchen_object).__name__
+                live[kind] = live.get(kind, 0) + 1
+        return live
+
+    @staticmethod
+    def _largest_trees(count: int) -> List[Tuple[str, int, int]]:
+        kitchen_objects = [o for o in gc.get_objects() if isinstance(o, KitchenObject)]
+        contained = set()
+        for kitchen_object in kitchen_objects:
+            contained.update(id(child) for child in kitchen_object._children())
+        trees = []
+        for root in kitchen_objects:
+            if id(root) not in contained:
+                nodes, size = _tree_size(root)
+                trees.append((f'{type(root).__name__} at {id(root):#x}', nodes, size))
+        trees.sort(key=lambda tree: -tree[2])
+        return trees[:count]
+
+    def report(self) -> str:
+        '''Returns a text report of the memory usage of every recorded step, in the order they ran.
+
+        Returns:
+            str: the per-step memory report.
+        '''
+
+        lines = []
+        for record in self.steps:
+            lines.append(f'{record.name}: {record.seconds * 1e3:.3f} ms, '
+                         f'{record.allocated / 1024:+.1f} KiB retained, {record.peak / 1024:.1f} KiB peak')
+            lines.append('  live KitchenObjects: ' + (', '.join(
+                f'{kind} {amount}' + (f' ({record.live_change[kind]:+})' if kind in record.live_change else '')
+                for kind, amount in sorted(record.live.items())) or 'none'))
+            for site, size, count in record.sites:
+                lines.append(f'  {size / 1024:+.1f} KiB in {count:+} blocks at {site}')
+            for tree, nodes, size in record.trees:
+                lines.append(f'  retained tree {tree}: {nodes} objects, {size / 1024:.1f} KiB')
+        return '\n'.join(lines)
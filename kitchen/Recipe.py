@@ -0,0 +1,207 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from kitchen.Kitchen import KitchenException
+from kitchen.utensils.Utensil import Utensil
+
+class Step:
+    '''A step of a Recipe: a function that works on the named Utensils it declares it reads and writes.'''
+
+    def __init__(self, name: str, function: Callable, reads: Iterable[str], writes: Iterable[str]):
+        self.name = name
+        self.function = function
+        self.reads = tuple(reads)
+        self.writes = tuple(writes)
+        self.dependencies: Set[str] = set()
+
+    def __repr__(self):
+        return f'Step({self.name!r})'
+
+class StepTiming:
+    '''When one Step of a Recipe ran, in seconds since the Recipe started.'''
+
+    def __init__(self, start: float, end: float):
+        self.start = start
+        self.end = end
+
+    @property
+    def seconds(self) -> float:
+        '''The time the Step took, in seconds.'''
+
+        return self.end - self.start
+
+class Recipe:
+    '''A recipe made of Steps that declare which Utensils they read and write, from which the dependencies between the
+    Steps are derived. Independent branches, such as chilling the water and preparing the filling of a pie, run
+    concurrently on a pool of threads:
+
+        recipe = Recipe()
+        recipe.use('coldwater', Bowl.use(name='coldwater'))
+        recipe.use('filling', Bowl.use(name='filling'))
+
+        @recipe.step(writes=['coldwater'])
+        def prepare_water(coldwater):
+            coldwater.add(Water.take(ml=500))
+
+    A Step depends on the last earlier Step that wrote a Utensil it uses, and a Step that writes a Utensil also depends
+    on the earlier Steps that read it since, so Steps that share a Utensil keep the order in which they were declared.
+    '''
+
+    def __init__(self):
+        self.utensils: Dict[str, Utensil] = {}
+        self.steps: Dict[str, Step] = {}
+        self._writers: Dict[str, str] = {}
+        self._readers: Dict[str, List[str]] = {}
+
+    def use(self, name: str, utensil: Utensil) -> Utensil:
+        '''Makes the given Utensil available to the Steps of the Recipe under the given name.
+
+        Args:
+            name (str): the name through which Steps refer to the Utensil.
+            utensil (Utensil): the Utensil to use.
+
+        Returns:
+            Utensil: the given Utensil.
+        '''
+
+        self.utensils[name] = utensil
+        return utensil
+
+    def step(self, name: str = None, reads: Iterable[str] = (), writes: Iterable[str] = ()) -> Callable:
+        '''Returns a decorator that adds the decorated function to the Recipe as a Step. The function is called with the
+        Utensils it reads and writes as keyword arguments.
+
+        Args:
+            name (str): the name of the Step. Defaults to the name of the function.
+            reads (Iterable[str]): the names of the Utensils the Step only reads.
+            writes (Iterable[str]): the names of the Utensils the Step changes.
+
+        Returns:
+            Callable: the decorator.
+        '''
+
+        def decorator(function: Callable) -> Callable:
+            self.add_step(Step(name or function.__name__, function, reads, writes))
+            return function
+        return decorator
+
+    def add_step(self, step: Step):
+        '''Adds the given Step to the Recipe, after the Steps already added.
+
+        Args:
+            step (Step): the Step to add.
+
+        Raises:
+            KitchenException: when a Step with the same name was already added, or the Step uses an unknown Utensil.
+        '''
+
+        if step.name in self.steps:
+            raise KitchenException(f'The recipe already has a step called {step.name}!')
+        for utensil in step.reads + step.writes:
+            if utensil not in self.utensils:
+                raise KitchenException(f'The recipe does not use a utensil called {utensil}!')
+            if utensil in self._writers:
+                step.dependencies.add(self._writers[utensil])
+        for utensil in step.writes:
+            step.dependencies.update(self._readers.pop(utensil, ()))
+            self._writers[utensil] = step.name
+        for utensil in step.reads:
+            self._readers.setdefault(utensil, []).append(step.name)
+        step.dependencies.discard(step.name)
+        self.steps[step.name] = step
+
+    def run(self, workers: Optional[int] = None) -> 'RecipeRun':
+        '''Runs every Step of the Recipe once all the Steps it depends on have finished, running independent Steps
+        concurrently.
+
+        Args:
+            workers (int): the largest number of Steps to run at once. Defaults to that of ThreadPoolExecutor.
+
+        Raises:
+            Exception: the first exception raised by a Step, after the Steps that were running have finished.
+
+        Returns:
+            RecipeRun: the results and timings of the Steps.
+        '''
+
+        recipe_run = RecipeRun(self)
+        waiting = {name: set(step.dependencies) for name, step in self.steps.items()}
+        dependents: Dict[str, List[str]] = {name: [] for name in self.steps}
+        for name, step in self.steps.items():
+            for dependency in step.dependencies:
+                dependents[dependency].append(name)
+        start = time.perf_counter()
+
+        def run_step(step: Step) -> Any:
+            started = time.perf_counter() - start
+            try:
+                arguments = {utensil: self.utensils[utensil] for utensil in step.reads + step.writes}
+                return step.function(**arguments)
+            finally:
+                recipe_run.timings[step.name] = StepTiming(started, time.perf_counter() - start)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            for name in [name for name, dependencies in waiting.items() if not dependencies]:
+                del waiting[name]
+                running[pool.submit(run_step, self.steps[name])] = name
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    recipe_run.results[name] = future.result()
+                    for dependent in dependents[name]:
+                        waiting[dependent].discard(name)
+                        if not waiting[dependent]:
+                            del waiting[dependent]
+                            running[pool.submit(run_step, self.steps[dependent])] = dependent
+        recipe_run.seconds = time.perf_counter() - start
+        return recipe_run
+
+class RecipeRun:
+    '''The results and timings of running a Recipe.'''
+
+    def __init__(self, recipe: Recipe):
+        self.recipe = recipe
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, StepTiming] = {}
+        self.seconds = 0.
+
+    def critical_path(self) -> List[str]:
+        '''Returns the chain of dependent Steps that took the longest in total, which limits how fast the Recipe can be
+        made however many Steps run at once.
+
+        Returns:
+            List[str]: the names of the Steps on the critical path, in the order they ran.
+        '''
+
+        longest: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        # Steps are declared after the Steps they depend on, so one pass in declaration order suffices.
+        for name, step in self.recipe.steps.items():
+            before = max(step.dependencies, key=lambda dependency: longest[dependency], default=None)
+            previous[name] = before
+            longest[name] = (longest[before] if before else 0.) + self.timings[name].seconds
+        path = []
+        name = max(longest, key=longest.get, default=None)
+        while name is not None:
+            path.append(name)
+            name = previous[name]
+        return path[::-1]
+
+    def report(self) -> str:
+        '''Returns a text report of when every Step ran, and of the critical path.
+
+        Returns:
+            str: the report.
+        '''
+
+        lines = [f'{"step":<24} {"start ms":>10} {"took ms":>10}  depends on']
+        for name, step in self.recipe.steps.items():
+            timing = self.timings[name]
+            lines.append(f'{name:<24} {timing.start * 1e3:>10.3f} {timing.seconds * 1e3:>10.3f}  '
+                         + (', '.join(sorted(step.dependencies)) or '-'))
+        path = self.critical_path()
+        lines.append(f'critical path ({sum(self.timings[name].seconds for name in path) * 1e3:.3f} ms of '
+                     f'{self.seconds * 1e3:.3f} ms): ' + ' -> '.join(path))
+        return '\n'.join(lines)
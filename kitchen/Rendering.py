@@ -0,0 +1,156 @@
+import heapq
+from typing import Iterator, List, Optional, Set, TextIO
+from kitchen.Kitchen import KitchenObject
+
+CACHE_LIMIT = 1 << 16
+'''The length, in characters, of the longest description that is cached on a KitchenObject.'''
+
+class Renderer:
+    '''Writes the description of a KitchenObject to a file-like sink, in chunks, without building the full description.
+
+    KitchenObjects describe themselves through _chunks(), which yields strings and the KitchenObjects they contain.
+    Descriptions of Collections and Portions up to CACHE_LIMIT characters long are cached on the object itself until it
+    is changed, unless they include a live description, which can change without the object being changed. When
+    sharing is enabled, a KitchenObject that occurs more than once is described once, labelled with #n=, and referred
+    to as #n# afterwards.
+
+    A summary can be written instead by limiting the depth, the number of nested Collections and Portions described,
+    and the width, the number of entries described per Collection. What is left out is replaced by the number of
+    entries or Ingredients it holds, which is read from their Stats, so the cost depends on the size of the summary
+    rather than on the size of the KitchenObject.
+    '''
+
+    def __init__(self, sink: Optional[TextIO], share: bool = False, buffer: int = 1 << 13,
+                 depth: int = None, width: int = None):
+        self.sink = sink
+        self.share = share
+        self.buffer = buffer
+        self.depth = depth
+        self.width = width
+        self._shared: Optional[Set[int]] = None
+        self._containing: Set[int] = set()
+        self._labels = {}
+        self._live = 0
+
+    def render(self, kitchen_object: KitchenObject):
+        '''Writes the description of the given KitchenObject to the sink.
+
+        Args:
+            kitchen_object (KitchenObject): the KitchenObject to describe.
+        '''
+
+        if self.share:
+            self._scan(kitchen_object)
+        parts = []
+        size = 0
+        for chunk in self._chunks(kitchen_object):
+            parts.append(chunk)
+            size += len(chunk)
+            if size >= self.buffer:
+                self.sink.write(''.join(parts))
+                parts.clear()
+                size = 0
+        if parts:
+            self.sink.write(''.join(parts))
+        self._shared = None
+        self._containing = set()
+        self._labels = {}
+
+    def _scan(self, root: KitchenObject):
+        seen = set()
+        shared = set()
+        pending = [root]
+        while pending:
+            kitchen_object = pending.pop()
+            if id(kitchen_object) in seen:
+                shared.add(id(kitchen_object))
+                continue
+            seen.add(id(kitchen_object))
+            pending.extend(child for child in kitchen_object._children() if hasattr(child, '_rendered'))
+        containing = set()
+        memo = {}
+
+        def contains_shared(kitchen_object: KitchenObject) -> bool:
+            key = id(kitchen_object)
+            if key not in memo:
+                memo[key] = False
+                for child in kitchen_object._children():
+                    # Every child is visited, as each one that contains a shared object has to be known.
+                    if hasattr(child, '_rendered') and (contains_shared(child) or id(child) in shared):
+                        memo[key] = True
+                if memo[key]:
+                    containing.add(key)
+            return memo[key]
+
+        contains_shared(root)
+        self._shared = shared
+        self._containing = containing
+
+    def _chunks(self, kitchen_object: KitchenObject, level: int = 0) -> Iterator[str]:
+        key = id(kitchen_object)
+        composite = hasattr(kitchen_object, '_rendered')
+        if composite and self.depth is not None and level >= self.depth:
+            yield f'[… {kitchen_object._statistics().items} items]'
+            return
+        if self._shared is not None and key in self._shared:
+            label = self._labels.get(key)
+            if label is not None:
+                yield f'#{label}#'
+                return
+            label = self._labels[key] = len(self._labels) + 1
+            yield f'#{label}='
+        cache = composite and key not in self._containing and self.depth is None and self.width is None
+        if cache and kitchen_object._rendered is not None:
+            yield kitchen_object._rendered
+            return
+        chunks = getattr(kitchen_object, '_chunks', None)
+        if chunks is None:
+            yield str(kitchen_object)
+            return
+        parts = [] if cache else None
+        size = 0
+        level += composite
+        live = self._live
+        if getattr(kitchen_object, '_live', False):
+            self._live += 1
+        for chunk in chunks(self.width):
+            for piece in ((chunk,) if isinstance(chunk, str) else self._chunks(chunk, level)):
+                if parts is not None:
+                    size += len(piece)
+                    if size > CACHE_LIMIT:
+                        parts = None
+                    else:
+                        parts.append(piece)
+                yield piece
+        # A description that includes a live one, such as that of a Collection in a Fridge, is not cached.
+        if parts is not None and self._live == live:
+            kitchen_object._rendered = ''.join(parts)
+
+def render(kitchen_object: KitchenObject) -> str:
+    '''Returns the description of the given KitchenObject, using and filling the cached descriptions of its parts.
+
+    Args:
+        kitchen_object (KitchenObject): the KitchenObject to describe.
+
+    Returns:
+        str: the description of the KitchenObject.
+    '''
+
+    rendered = getattr(kitchen_object, '_rendered', None)
+    return rendered if rendered is not None else ''.join(Renderer(None)._chunks(kitchen_object))
+
+def top_ingredients(kitchen_object: KitchenObject, top: int) -> List[str]:
+    '''Returns descriptions of the given number of kinds of Ingredient with the largest total quantity inside the given
+    KitchenObject, largest first, read from its Stats.
+
+    Args:
+        kitchen_object (KitchenObject): the KitchenObject to look inside.
+        top (int): the number of kinds of Ingredient to describe.
+
+    Returns:
+        List[str]: the descriptions, such as '300 g of flour' or '2x egg'.
+    '''
+
+    quantities = kitchen_object._statistics().quantities.items()
+    return [f'{quantity}x {name}' if unit is None else (f'{quantity} {unit} of {name}' if unit else f'{quantity} of {name}')
+            for (name, unit), quantity in heapq.nlargest(top, quantities, key=lambda entry: entry[1])]
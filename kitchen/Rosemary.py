@@ -1,22 +1,58 @@
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Iterator
 from kitchen.Kitchen import KitchenObject, KitchenException
+from kitchen.Rendering import Renderer, top_ingredients
+
+class Served(SystemExit):
+    '''Raised by Rosemary.serve instead of exiting while serving is captured, carrying the served KitchenObject. Being a
+    SystemExit, it still ends the interpreter when nothing catches it.'''
+
+    def __init__(self, dish: KitchenObject):
+        SystemExit.__init__(self)
+        self.dish = dish
 
 class Rosemary:
+    _serving = threading.local()
+
+    @staticmethod
+    @contextmanager
+    def capture() -> Iterator[None]:
+        '''Returns a context manager within which Rosemary.serve, in the current thread, does not print the dish and exit
+        the interpreter, but raises Served carrying the dish instead.'''
+
+        Rosemary._serving.captured = getattr(Rosemary._serving, 'captured', 0) + 1
+        try:
+            yield
+        finally:
+            Rosemary._serving.captured -= 1
+
     @staticmethod
-    def _print(action, kitchen_object):
+    def _print(action, kitchen_object, depth=None, width=None):
         if isinstance(kitchen_object, KitchenObject):
-            print(f'Rosemary {action}s {kitchen_object}')
+            sys.stdout.write(f'Rosemary {action}s ')
+            Renderer(sys.stdout, depth=depth, width=width).render(kitchen_object)
+            sys.stdout.write('\n')
         else:
             raise KitchenException(f'Rosemary can\'t {action} that!')
     
     @staticmethod
-    def taste(kitchen_object: KitchenObject):
-        '''Rosemary tastes the given KitchenObject, and prints her findings into the terminal.
+    def taste(kitchen_object: KitchenObject, depth: int = None, width: int = None, top: int = None):
+        '''Rosemary tastes the given KitchenObject, and prints her findings into the terminal. For huge dishes, she can
+        summarize her findings instead, by limiting how deep and how wide she describes the dish, and by naming only the
+        Ingredients it holds the most of.
 
         Args:
             kitchen_object (KitchenObject): the KitchenObject for Rosemary to taste.
+            depth (int): the number of nested Collections and Portions to describe. Optional, defaults to all.
+            width (int): the number of entries to describe per Collection. Optional, defaults to all.
+            top (int): the number of kinds of Ingredient, largest quantity first, to name afterwards. Optional.
         '''
 
-        Rosemary._print('taste', kitchen_object)
+        Rosemary._print('taste', kitchen_object, depth, width)
+        if top is not None:
+            print(f'Rosemary tastes mostly {", ".join(top_ingredients(kitchen_object, top)) or "nothing"}')
     
     @staticmethod
     def serve(kitchen_object: KitchenObject):
@@ -26,5 +62,9 @@ class Rosemary:
             kitchen_object (KitchenObject): the KitchenObject for Rosemary to serve.
         '''
 
+        if getattr(Rosemary._serving, 'captured', 0):
+            if not isinstance(kitchen_object, KitchenObject):
+                raise KitchenException('Rosemary can\'t serve that!')
+            raise Served(kitchen_object)
         Rosemary._print('serve', kitchen_object)
         exit()
@@ -0,0 +1,304 @@
+import argparse
+import importlib
+import io
+import itertools
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Optional
+from kitchen.Kitchen import KitchenException
+from kitchen.Executor import KitchenExecutor, _cook, _cook_script
+from kitchen.Rendering import Renderer
+
+def _describe(dish: Any) -> str:
+    description = io.StringIO()
+    Renderer(description).render(dish)
+    return description.getvalue()
+
+def _message(error: Exception) -> str:
+    # The message of a KitchenException is sent without the explosion, which the client adds back.
+    if isinstance(error, KitchenException):
+        return str(error)[len(str(KitchenException(''))):]
+    return f'{type(error).__name__}: {error}'
+
+def _run(recipe: Optional[Callable], script: Optional[str], args: tuple, kwargs: dict) -> str:
+    # Dishes are described where they were cooked, as the description is much smaller to send back than the dish.
+    dish = _cook_script(script) if recipe is None else _cook(recipe, args, kwargs)
+    return _describe(dish)
+
+class _Connection(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        super().setup()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._done = threading.Condition(self._lock)
+        self._replies = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        self._writer.start()
+
+    def handle(self):
+        try:
+            self._read()
+        finally:
+            # Orders still cooking are answered before the connection is closed.
+            with self._lock:
+                while self._pending:
+                    self._done.wait()
+            self._replies.put(None)
+            self._writer.join()
+
+    def _read(self):
+        kitchen = self.server.kitchen
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            number = None
+            try:
+                order = json.loads(line)
+                number = order.get('id')
+                script = kitchen._script(order['script']) if 'script' in order else None
+                recipe = None if script is not None else kitchen._resolve(order.get('recipe'))
+                arguments = (recipe, script, tuple(order.get('args', ())), order.get('kwargs', {}))
+            except Exception as error:
+                self._reply({'id': number, 'error': _message(error)})
+                continue
+            if kitchen._executor is None:
+                try:
+                    self._reply({'id': number, 'dish': _run(*arguments)})
+                except Exception as error:
+                    self._reply({'id': number, 'error': _message(error)})
+            else:
+                with self._lock:
+                    self._pending += 1
+                future = kitchen._executor.submit(_run, *arguments)
+                future.add_done_callback(lambda future, number=number: self._finish(number, future))
+
+    def _finish(self, number: Any, future: Future):
+        error = future.exception()
+        try:
+            self._reply({'id': number, 'error': _message(error)} if error else {'id': number, 'dish': future.result()})
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._done.notify_all()
+
+    def _reply(self, response: Dict[str, Any]):
+        self._replies.put((json.dumps(response) + '\n').encode())
+
+    def _write(self):
+        # Replies are sent by a thread of their own, so that a client slow to read them holds up neither the workers,
+        # which finish its orders, nor the orders of other connections. A client gone away gets no more of them.
+        sending = True
+        while True:
+            data = self._replies.get()
+            if data is None:
+                return
+            if sending:
+                try:
+                    self.connection.sendall(data)
+                except OSError:
+                    sending = False
+
+class KitchenServer:
+    '''A long-running kitchen that keeps the package imported and cooks orders sent over a local Unix socket, so that
+    running a recipe does not pay for starting an interpreter and importing the kitchen.
+
+    Orders are JSON lines, as for a Pipeline: {"id": 1, "recipe": "pancake", "args": [16]}, or {"id": 2, "script":
+    "/path/to/Pancakes.py"} for a recipe script. Only the recipes given to the server are served: recipes found by name
+    in the given dictionary, recipes imported on first use as one of the allowed 'module:function' names, and the
+    allowed recipe scripts. The socket can only be used by the user running the server. Every order is answered with a
+    JSON line holding its id and the description of the served dish, {"id": 1, "dish": "a plate with ..."}, or the
+    error that stopped it, {"id": 1, "error": "..."}.
+
+    A connection can send any number of orders without waiting for the answers, which come back as the orders are
+    done, so they are matched to orders by id. With workers, orders are cooked in a KitchenExecutor; without, they are
+    cooked right away on the thread of their connection, which is fastest for small orders.
+
+        with KitchenServer('/tmp/kitchen.sock', workers=4, allow=['recipes:pancake']) as server:
+            server.serve_forever()
+    '''
+
+    def __init__(self, path: str, workers: Optional[int] = 0, recipes: Dict[str, Callable] = None,
+                 allow: Iterable[str] = (), scripts: Iterable[str] = ()):
+        self.path = path
+        self.recipes = dict(recipes or {})
+        self.allowed = set(allow)
+        self.scripts = {os.path.realpath(script) for script in scripts}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            os.remove(path)
+        self._server = socketserver.ThreadingUnixStreamServer(path, _Connection, bind_and_activate=False)
+        self._server.daemon_threads = True
+        self._server.kitchen = self
+        try:
+            # No client can connect before the server listens, by which time only its user can use the socket.
+            self._server.server_bind()
+            os.chmod(path, 0o600)
+            self._server.server_activate()
+        except BaseException:
+            self._server.server_close()
+            raise
+        self._executor = KitchenExecutor(workers) if workers != 0 else None
+
+    def _resolve(self, name: Any) -> Callable:
+        if not isinstance(name, str):
+            raise KitchenException('An order needs the name of a recipe!')
+        recipe = self.recipes.get(name)
+        if recipe is None:
+            if name not in self.allowed:
+                raise KitchenException(f'The kitchen does not know how to make {name}!')
+            module, function = name.split(':', 1)
+            recipe = getattr(importlib.import_module(module), function)
+            with self._lock:
+                recipe = self.recipes.setdefault(name, recipe)
+        return recipe
+
+    def _script(self, path: Any) -> str:
+        # The script run is the one that was checked, even if the path is changed to lead elsewhere in between.
+        script = os.path.realpath(path) if isinstance(path, str) else None
+        if script not in self.scripts:
+            raise KitchenException(f'The kitchen does not know the recipe script {path}!')
+        return script
+
+    def serve_forever(self):
+        '''Answers orders until the server is shut down.'''
+
+        self._server.serve_forever()
+
+    def shutdown(self):
+        '''Stops serving, from another thread than the one serving, and closes the server.'''
+
+        self._server.shutdown()
+        self.close()
+
+    def close(self):
+        '''Closes the socket, removing it, and shuts the workers down.'''
+
+        self._server.server_close()
+        if self._executor is not None:
+            self._executor.shutdown()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self) -> 'KitchenServer':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class KitchenClient:
+    '''A connection to a KitchenServer, kept open between orders. Orders are sent without waiting for earlier ones to
+    be answered, and the answers are handed back through Futures.
+
+        with KitchenClient('/tmp/kitchen.sock') as client:
+            futures = [client.submit('recipes:pancake', 16) for _ in range(100)]
+            dishes = [future.result() for future in futures]
+    '''
+
+    def __init__(self, path: str):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(path)
+        self._ids = itertools.count()
+        self._futures: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._sending = threading.Lock()
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def submit(self, recipe: str, *args, **kwargs) -> 'Future[str]':
+        '''Sends an order for the given recipe with the given arguments, which have to be JSON values.
+
+        Args:
+            recipe (str): the name of the recipe, or 'module:function', as the server was given it.
+
+        Returns:
+            Future[str]: a Future for the description of the served dish.
+        '''
+
+        return self._send({'recipe': recipe, 'args': args, 'kwargs': kwargs})
+
+    def submit_script(self, path: str) -> 'Future[str]':
+        '''Sends an order for the given recipe script, as a path the server can read.
+
+        Args:
+            path (str): the path of the recipe script.
+
+        Returns:
+            Future[str]: a Future for the description of the served dish.
+        '''
+
+        return self._send({'script': os.path.abspath(path)})
+
+    def cook(self, recipe: str, *args, **kwargs) -> str:
+        '''Sends an order for the given recipe and waits for it to be served.
+
+        Args:
+            recipe (str): the name of the recipe, or 'module:function', as the server was given it.
+
+        Raises:
+            KitchenException: when the recipe failed.
+
+        Returns:
+            str: the description of the served dish.
+        '''
+
+        return self.submit(recipe, *args, **kwargs).result()
+
+    def _send(self, order: Dict[str, Any]) -> Future:
+        future = Future()
+        with self._sending:
+            order['id'] = number = next(self._ids)
+            with self._lock:
+                self._futures[number] = future
+            # Sending does not hold the lock the reader needs, or both ends could wait on full buffers forever.
+            self._socket.sendall((json.dumps(order) + '\n').encode())
+        return future
+
+    def _read(self):
+        for line in self._socket.makefile('rb'):
+            response = json.loads(line)
+            with self._lock:
+                future = self._futures.pop(response['id'], None)
+            if future is None:
+                continue
+            if 'error' in response:
+                future.set_exception(KitchenException(response['error']))
+            else:
+                future.set_result(response['dish'])
+        with self._lock:
+            futures, self._futures = self._futures, {}
+        for future in futures.values():
+            future.set_exception(KitchenException('The kitchen closed!'))
+
+    def close(self):
+        '''Closes the connection once the orders sent have been answered.'''
+
+        self._socket.shutdown(socket.SHUT_WR)
+        self._reader.join()
+        self._socket.close()
+
+    def __enter__(self) -> 'KitchenClient':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cooks the orders sent to a local Unix socket.')
+    parser.add_argument('path', help='the path of the socket')
+    parser.add_argument('workers', type=int, nargs='?', default=0, help='the number of workers, 0 to cook right away')
+    parser.add_argument('--allow', action='append', default=[], metavar='MODULE:FUNCTION',
+                        help='a recipe to serve, by the function cooking it')
+    parser.add_argument('--script', action='append', default=[], metavar='PATH', help='a recipe script to serve')
+    options = parser.parse_args()
+    with KitchenServer(options.path, workers=options.workers, allow=options.allow, scripts=options.script) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
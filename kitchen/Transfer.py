@@ -0,0 +1,292 @@
+import pickle
+import struct
+from array import array
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from kitchen.Kitchen import KitchenObject, KitchenException
+from kitchen.ingredients.Ingredient import Ingredient
+from kitchen.ingredients.Collections import CompositeIngredient, Collection
+
+_HEADER = struct.Struct('<4sIIII')
+_MAGIC = b'KDSH'
+_NODE = 4
+_EDGE = 2
+_WORD = array('I').itemsize
+
+class _Ref:
+    '''A reference, in the attributes of a node, to another node.'''
+
+    __slots__ = ('index',)
+
+    def __init__(self, index: int):
+        self.index = index
+
+    def __reduce__(self):
+        return _Ref, (self.index,)
+
+def _plain(kitchen_object: KitchenObject) -> bool:
+    return isinstance(kitchen_object, Ingredient) and not isinstance(kitchen_object, CompositeIngredient)
+
+def share(dish: KitchenObject) -> SharedMemory:
+    '''Writes the given dish into a new block of shared memory, as a flat table of nodes and a table of the entries of
+    every Collection, followed by the small things that do not fit in a table: the classes, the names, amounts and
+    states of the plain Ingredients, and the attributes of everything else. A KitchenObject that occurs more than once,
+    such as a Mixture that several Portions were taken from, is written once. Other KitchenObjects inside attributes
+    that are not contents, such as the Bowls kept in a Fridge, are pickled with the attributes.
+
+    Args:
+        dish (KitchenObject): the dish to write.
+
+    Raises:
+        KitchenException: when the dish is not a KitchenObject, or an amount in a Collection is too large for the entry
+            table.
+
+    Returns:
+        SharedMemory: the block of shared memory, which the caller closes, and which whoever reads it last unlinks.
+    '''
+
+    if not isinstance(dish, KitchenObject):
+        raise KitchenException(f'Only dishes can be shared, not {type(dish).__name__}!')
+
+    types: Dict[type, int] = {}
+    variants: Dict[tuple, int] = {}
+    records: List[dict] = []
+    nodes = array('I')
+    edges = array('I')
+    numbers: Dict[int, int] = {}
+    pending: List[Tuple[KitchenObject, int]] = []
+    kept = []
+
+    def node(kitchen_object: KitchenObject) -> int:
+        number = numbers.get(id(kitchen_object))
+        if number is None:
+            number = numbers[id(kitchen_object)] = len(nodes) // _NODE
+            kind = types.setdefault(type(kitchen_object), len(types))
+            nodes.extend((kind, 0, 0, 0))
+            pending.append((kitchen_object, number))
+            # The objects are kept alive while they are written, so that their ids stay theirs.
+            kept.append(kitchen_object)
+        return number
+
+    root = node(dish)
+    while pending:
+        kitchen_object, number = pending.pop()
+        offset = number * _NODE
+        if _plain(kitchen_object):
+            nodes[offset + 1] = variants.setdefault(kitchen_object.__getstate__(), len(variants))
+            continue
+        state = dict(kitchen_object.__getstate__() or {})
+        contents = state.get('contents')
+        if isinstance(kitchen_object, Collection):
+            del state['contents']
+            nodes[offset + 2] = len(edges) // _EDGE
+            nodes[offset + 3] = len(contents)
+            for item, amount in contents.items():
+                if not 0 <= amount < 1 << 32:
+                    raise KitchenException('Cannot share that much of one thing!')
+                edges.extend((node(item), amount))
+        for key, value in state.items():
+            if isinstance(value, KitchenObject):
+                state[key] = _Ref(node(value))
+        nodes[offset + 1] = len(records)
+        records.append(state)
+    metadata = pickle.dumps(([(kind.__module__, kind.__qualname__) for kind in types],
+                             list(variants), records), protocol=pickle.HIGHEST_PROTOCOL)
+    tables = nodes.tobytes() + edges.tobytes()
+    memory = SharedMemory(create=True, size=_HEADER.size + len(tables) + len(metadata))
+    _HEADER.pack_into(memory.buf, 0, _MAGIC, len(nodes) // _NODE, len(edges) // _EDGE, len(metadata), root)
+    memory.buf[_HEADER.size:_HEADER.size + len(tables)] = tables
+    memory.buf[_HEADER.size + len(tables):_HEADER.size + len(tables) + len(metadata)] = metadata
+    return memory
+
+def _discard(name: str):
+    # Unlinks a block handed over by another process that could not be read, which no one else will unlink.
+    try:
+        memory = SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    memory.close()
+    memory.unlink()
+
+def _hand_over(memory: SharedMemory) -> str:
+    # The block now belongs to the process that reads it, which unlinks it.
+    name = memory.name
+    memory.close()
+    resource_tracker.unregister(memory._name, 'shared_memory')
+    return name
+
+class NodeView:
+    '''A view of one node of a SharedDish, read straight from shared memory. Nothing is built until build() is called.'''
+
+    __slots__ = ('dish', 'index')
+
+    def __init__(self, dish: 'SharedDish', index: int):
+        self.dish = dish
+        self.index = index
+
+    @property
+    def type(self) -> type:
+        '''The class of the KitchenObject.'''
+
+        return self.dish._types[self.dish._nodes[self.index * _NODE]]
+
+    @property
+    def plain(self) -> bool:
+        '''Whether the node is a plain Ingredient, without contents.'''
+
+        return issubclass(self.type, Ingredient) and not issubclass(self.type, CompositeIngredient)
+
+    @property
+    def attributes(self) -> Dict[str, Any]:
+        '''The public attributes of the KitchenObject, other than its contents. References to other KitchenObjects are
+        given as NodeViews.'''
+
+        payload = self.dish._nodes[self.index * _NODE + 1]
+        if self.plain:
+            name, amount, state = self.dish._variants[payload]
+            return {'name': name, 'amount': amount} if amount is not None else {'name': name}
+        return {key: NodeView(self.dish, value.index) if isinstance(value, _Ref) else value
+                for key, value in self.dish._records[payload].items() if not key.startswith('_')}
+
+    def entries(self) -> Iterator[Tuple['NodeView', int]]:
+        '''Returns the entries of a Collection, with their amounts.
+
+        Returns:
+            Iterator[Tuple[NodeView, int]]: the entries, empty for anything but a Collection.
+        '''
+
+        offset = self.index * _NODE
+        nodes, edges = self.dish._nodes, self.dish._edges
+        first, count = nodes[offset + 2], nodes[offset + 3]
+        for edge in range(first * _EDGE, (first + count) * _EDGE, _EDGE):
+            yield NodeView(self.dish, edges[edge]), edges[edge + 1]
+
+    def build(self) -> KitchenObject:
+        '''Builds the KitchenObject, and everything inside it, once.
+
+        Returns:
+            KitchenObject: the KitchenObject.
+        '''
+
+        return self.dish._build(self.index)
+
+    def __repr__(self):
+        return f'<{self.type.__name__} node {self.index}>'
+
+class SharedDish:
+    '''A dish written into shared memory by share(), usually in another process, read without copying. The tables are
+    read in place, and the KitchenObjects are only built when the dish or one of its NodeViews is built, each of them
+    once. Used as a context manager, the shared memory is released and unlinked at the end; the built KitchenObjects
+    stay usable.
+
+        with SharedDish(name) as shared:
+            plate = shared.dish
+    '''
+
+    def __init__(self, name: str):
+        self._memory = SharedMemory(name=name)
+        magic, nodes, edges, length, root = _HEADER.unpack_from(self._memory.buf, 0)
+        if magic != _MAGIC:
+            self._memory.close()
+            raise KitchenException('That is not a shared dish!')
+        start = _HEADER.size
+        self._nodes = self._memory.buf[start:start + nodes * _NODE * _WORD].cast('I')
+        start += nodes * _NODE * _WORD
+        self._edges = self._memory.buf[start:start + edges * _EDGE * _WORD].cast('I')
+        start += edges * _EDGE * _WORD
+        try:
+            types, self._variants, self._records = pickle.loads(self._memory.buf[start:start + length])
+            self._types = [_find(module, name) for module, name in types]
+        except BaseException:
+            self._nodes.release()
+            self._edges.release()
+            self._memory.close()
+            raise
+        self._built: Dict[int, KitchenObject] = {}
+        self.root = NodeView(self, root)
+
+    def __len__(self):
+        return len(self._nodes) // _NODE
+
+    @property
+    def dish(self) -> KitchenObject:
+        '''The dish, built the first time it is used.'''
+
+        return self._build(self.root.index)
+
+    def _references(self, index: int) -> List[int]:
+        offset = index * _NODE
+        first, count = self._nodes[offset + 2], self._nodes[offset + 3]
+        found = [self._edges[edge] for edge in range(first * _EDGE, (first + count) * _EDGE, _EDGE)]
+        kind = self._types[self._nodes[offset]]
+        if not (issubclass(kind, Ingredient) and not issubclass(kind, CompositeIngredient)):
+            found.extend(value.index for value in self._records[self._nodes[offset + 1]].values()
+                         if isinstance(value, _Ref))
+        return found
+
+    def _build(self, index: int) -> KitchenObject:
+        built = self._built
+        pending = [index]
+        # Nodes are built after everything they refer to, without recursing, as dishes can be deeply nested.
+        while pending:
+            current = pending[-1]
+            if current in built:
+                pending.pop()
+                continue
+            missing = [reference for reference in self._references(current) if reference not in built]
+            if missing:
+                pending.extend(missing)
+                continue
+            pending.pop()
+            built[current] = self._make(current)
+        return built[index]
+
+    def _make(self, index: int) -> KitchenObject:
+        offset = index * _NODE
+        kind, payload, first, count = self._nodes[offset:offset + _NODE]
+        cls = self._types[kind]
+        kitchen_object = cls.__new__(cls)
+        if issubclass(cls, Ingredient) and not issubclass(cls, CompositeIngredient):
+            kitchen_object.__setstate__(self._variants[payload])
+            return kitchen_object
+        built = self._built
+        state = {key: built[value.index] if isinstance(value, _Ref) else value
+                 for key, value in self._records[payload].items()}
+        if issubclass(cls, Collection):
+            edges = self._edges
+            state['contents'] = {built[edges[edge]]: edges[edge + 1]
+                                 for edge in range(first * _EDGE, (first + count) * _EDGE, _EDGE)}
+        if hasattr(kitchen_object, '__setstate__'):
+            kitchen_object.__setstate__(state)
+        else:
+            kitchen_object.__dict__.update(state)
+        return kitchen_object
+
+    def close(self, unlink: bool = True):
+        '''Releases the shared memory, and unlinks it unless told otherwise.
+
+        Args:
+            unlink (bool): whether to also remove the block of shared memory. Defaults to True.
+        '''
+
+        if self._memory is None:
+            return
+        self._nodes.release()
+        self._edges.release()
+        self._memory.close()
+        if unlink:
+            self._memory.unlink()
+        self._memory = None
+
+    def __enter__(self) -> 'SharedDish':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _find(module: str, name: str) -> type:
+    found = __import__(module, fromlist=[name])
+    for part in name.split('.'):
+        found = getattr(found, part)
+    return found
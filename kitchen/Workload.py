@@ -0,0 +1,161 @@
+import random
+import sys
+from typing import List, Optional
+from kitchen import ingredients
+from kitchen.Kitchen import KitchenObject
+from kitchen.Executor import _cook
+from kitchen.ingredients.Ingredient import UNCOUNTABLE
+
+_UNCOUNTABLE = [row for row in UNCOUNTABLE if hasattr(ingredients, row[0])]
+_UTENSILS = ('Plate', 'Bowl', 'Pan', 'BakingTray', 'PieDish', 'Oven', 'Fridge')
+
+class Workload:
+    '''A random but valid recipe program, for stress testing the Kitchen with recipes larger than the bundled ones.
+
+    The program is generated from a seed, so the same arguments always give the same program. Every dish is an
+    Ingredient prepared up to the given depth: a Bowl, Pan, BakingTray or PieDish holding up to fanout Ingredients that
+    are prepared the same way, one level down. Bowls are mixed, chilled in the Fridge and divided into up to the given
+    number of portions, which later preparations use up. Every dish ends up on one Plate, which is served.
+
+    The program is Python source over the public API, like the bundled recipes, so it can be saved and fed to
+    Instrumentation, MemoryProfile or KitchenExecutor.submit_script, or run here:
+
+        workload = Workload(seed=7, dishes=10, depth=4, fanout=6)
+        plate = workload.run()
+        workload.save('workload.py')
+    '''
+
+    def __init__(self, seed: int = 0, dishes: int = 1, depth: int = 3, fanout: int = 4, portions: int = 4):
+        self.seed = seed
+        self.dishes = dishes
+        self.depth = depth
+        self.fanout = fanout
+        self.portions = portions
+        self.lines: List[str] = []
+        self._random = random.Random(seed)
+        self._names = 0
+        self._spare: List[str] = []
+        self._ingredients = set()
+        self._utensils = {'Plate'}
+        self.lines.append("plate = Plate.use(name='workload')")
+        for dish in range(dishes):
+            self.lines.append(f'plate.add({self._prepare(depth)})')
+        for portion in self._spare:
+            self.lines.append(f'plate.add({portion})')
+        self.lines.append('Rosemary.serve(plate)')
+
+    def to_source(self) -> str:
+        '''Returns the program as the source of a recipe script.
+
+        Returns:
+            str: the source, which serves the Plate when run.
+        '''
+
+        header = [f'# Generated by kitchen.Workload(seed={self.seed}, dishes={self.dishes}, depth={self.depth}, '
+                  f'fanout={self.fanout}, portions={self.portions})',
+                  'from kitchen import Rosemary',
+                  f'from kitchen.utensils import {", ".join(u for u in _UTENSILS if u in self._utensils)}',
+                  f'from kitchen.ingredients import {", ".join(sorted(self._ingredients))}' if self._ingredients else '']
+        return '\n'.join(header + [''] + self.lines) + '\n'
+
+    def save(self, path: str):
+        '''Writes the program to a recipe script.
+
+        Args:
+            path (str): the path of the script to write.
+        '''
+
+        with open(path, 'w') as script:
+            script.write(self.to_source())
+
+    def run(self) -> Optional[KitchenObject]:
+        '''Runs the program. Serving the Plate hands it back instead of exiting.
+
+        Returns:
+            KitchenObject: the served Plate.
+        '''
+
+        code = compile(self.to_source(), f'<workload {self.seed}>', 'exec')
+        return _cook(exec, (code, {'__name__': '__main__'}), {})
+
+    def _name(self, kind: str) -> str:
+        self._names += 1
+        return f'{kind}_{self._names}'
+
+    def _prepare(self, depth: int) -> str:
+        random = self._random
+        if self._spare and random.random() < .3:
+            return self._spare.pop(random.randrange(len(self._spare)))
+        if depth == 0 or random.random() < .2:
+            return self._take()
+        kind = random.choice(('Bowl', 'Bowl', 'Pan', 'BakingTray', 'PieDish'))
+        self._utensils.add(kind)
+        utensil = self._name(kind.lower())
+        self.lines.append(f"{utensil} = {kind}.use(name='{utensil}')")
+        for _ in range(random.randint(1, self.fanout)):
+            self.lines.append(f'{utensil}.add({self._prepare(depth - 1)})')
+        return getattr(self, f'_{kind.lower()}')(utensil)
+
+    def _bowl(self, bowl: str) -> str:
+        random = self._random
+        if random.random() < .6:
+            self.lines.append(f'{bowl}.mix()')
+        if random.random() < .25:
+            if 'Fridge' not in self._utensils:
+                self._utensils.add('Fridge')
+                self.lines.insert(0, 'fridge = Fridge.use()')
+            self.lines.append(f'fridge.add({bowl})')
+            self.lines.append(f"fridge.take('{bowl}')")
+        portions = random.randint(1, self.portions)
+        if portions == 1:
+            return f'{bowl}.take()'
+        self.lines.append(f'{bowl}_portions = {bowl}.divide({portions})')
+        self._spare.extend(f'{bowl}_portions[{index}]' for index in range(1, portions))
+        return f'{bowl}_portions[0]'
+
+    def _pan(self, pan: str) -> str:
+        for side in range(2):
+            self.lines.append(f'{pan}.cook(minutes={self._random.randint(1, 5)})')
+            self.lines.append(f'{pan}.flip()')
+        return f'{pan}.take()'
+
+    def _bakingtray(self, dish: str) -> str:
+        if 'Oven' not in self._utensils:
+            self._utensils.add('Oven')
+            self.lines.insert(0, 'oven = Oven.use()')
+        self.lines.append(f'oven.preheat(degrees={self._random.choice((160, 180, 200, 220))})')
+        self.lines.append(f'oven.add({dish})')
+        self.lines.append(f'oven.bake(minutes={self._random.randint(10, 60)})')
+        self.lines.append('oven.take()')
+        return f'{dish}.take()'
+
+    _piedish = _bakingtray
+
+    def _take(self) -> str:
+        random = self._random
+        choice = random.randrange(len(_UNCOUNTABLE) + 3)
+        if choice < len(_UNCOUNTABLE):
+            kind, _, _, keyword, _ = _UNCOUNTABLE[choice]
+            self._ingredients.add(kind)
+            return f'{kind}.take({keyword}={random.randint(1, 500)})'
+        kind = ('Egg', 'Apple', 'Lemon')[choice - len(_UNCOUNTABLE)]
+        self._ingredients.add(kind)
+        item = self._name(kind.lower())
+        self.lines.append(f'{item} = {kind}.take()')
+        if kind == 'Egg':
+            self.lines.append(f'{item}.crack()')
+        elif kind == 'Apple':
+            for action in ('peel', 'slice'):
+                if random.random() < .5:
+                    self.lines.append(f'{item}.{action}()')
+        elif random.random() < .5:
+            self.lines.append(f'{item}_zest = {item}.zest()')
+            return f"{item}_zest.take('1/2')"
+        return item
+
+if __name__ == '__main__':
+    arguments = [int(argument) for argument in sys.argv[1:]]
+    if len(arguments) > 5:
+        print('usage: python -m kitchen.Workload [seed] [dishes] [depth] [fanout] [portions] > workload.py')
+        sys.exit(2)
+    sys.stdout.write(Workload(*arguments).to_source())
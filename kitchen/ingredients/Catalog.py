@@ -0,0 +1,117 @@
+import csv
+import sys
+from typing import Dict, List, Optional, Tuple, Union
+from kitchen.Kitchen import KitchenException
+from kitchen.ingredients import Ingredient as ingredients
+from kitchen.ingredients.Ingredient import Ingredient, UncountableIngredient, uncountable
+
+ALIASES = {
+    'eggs': 'egg',
+    'apples': 'apple',
+    'lemons': 'lemon',
+    'cornflour': 'cornstarch',
+    'chocolate chip': 'chocolate chips',
+    'lemon peel': 'lemon zest',
+}
+'''Other names that orders may use for Ingredients, by the name of the Ingredient.'''
+
+_index: Dict[str, Tuple[type, Optional[str]]] = {}
+
+def _key(name: str) -> str:
+    return ' '.join(name.lower().split())
+
+def register(ingredient: type, *aliases: str):
+    '''Makes the given kind of Ingredient available by its name, its class name and the given aliases.
+
+    Args:
+        ingredient (type): the Ingredient class.
+        aliases (str): other names for the Ingredient.
+    '''
+
+    if issubclass(ingredient, UncountableIngredient):
+        entry = (ingredient, ingredient.unit)
+        name = ingredient('1').name
+    else:
+        entry = (ingredient, None)
+        name = ingredient().name
+    for alias in (name, ingredient.__name__, *aliases):
+        _index[_key(alias)] = entry
+
+def find(name: str) -> type:
+    '''Returns the kind of Ingredient with the given name or alias, ignoring case and extra spaces.
+
+    Args:
+        name (str): the name or alias, e.g. 'flour' or 'Eggs'.
+
+    Raises:
+        KitchenException: when no Ingredient has that name.
+
+    Returns:
+        type: the Ingredient class.
+    '''
+
+    return _entry(name)[0]
+
+def _entry(name: str) -> Tuple[type, Optional[str]]:
+    entry = _index.get(name)
+    if entry is None:
+        entry = _index.get(_key(name))
+        if entry is None:
+            raise KitchenException(f'The kitchen has no {name}!')
+    return entry
+
+def take_by_name(name: str, quantity: Union[str, int] = 1) -> Union[Ingredient, List[Ingredient]]:
+    '''Returns the Ingredient with the given name or alias, in the given quantity, as its take method would.
+
+    Args:
+        name (str): the name or alias of the Ingredient, e.g. 'flour'.
+        quantity (Union[str, int]): the amount as a string, e.g. '50 g' or 'pinch', or a number: of units, e.g. grams,
+            for uncountable Ingredients, or of pieces for countable ones. Defaults to 1.
+
+    Raises:
+        KitchenException: when no Ingredient has that name, or the quantity does not suit it.
+
+    Returns:
+        Union[Ingredient, List[Ingredient]]: the Ingredient, or a list of countable Ingredients.
+    '''
+
+    ingredient, unit = _entry(name)
+    if unit is None:
+        if not isinstance(quantity, int):
+            raise KitchenException(f'Can only take a number of {name}!')
+        return Ingredient._take(ingredient, quantity)
+    return ingredient(quantity if isinstance(quantity, str) else f'{quantity} {unit}')
+
+def load(path: str) -> List[type]:
+    '''Adds the kinds of UncountableIngredient listed in the given CSV file to the catalog. The file has a header and
+    the columns class, name, unit, keyword, aliases and description, with the aliases separated by semicolons:
+
+        class,name,unit,keyword,aliases,description
+        Honey,honey,g,grams,runny honey,A sweet fluid made by bees.
+
+    The classes are placed in this module, so that the Ingredients can be pickled like the built-in ones.
+
+    Args:
+        path (str): the path of the CSV file.
+
+    Returns:
+        List[type]: the new Ingredient classes.
+    '''
+
+    loaded = []
+    with open(path, newline='') as file:
+        for row in csv.DictReader(file):
+            ingredient = uncountable(row['class'], row['name'], row['unit'], row['keyword'],
+                                     row.get('description') or None, module=__name__)
+            setattr(sys.modules[__name__], ingredient.__name__, ingredient)
+            register(ingredient, *filter(None, (row.get('aliases') or '').split(';')))
+            loaded.append(ingredient)
+    return loaded
+
+for _ingredient in (ingredients.Egg, ingredients.Apple, ingredients.Lemon):
+    register(_ingredient)
+for _row in ingredients.UNCOUNTABLE:
+    register(getattr(ingredients, _row[0]))
+for _alias, _name in ALIASES.items():
+    _index[_alias] = _index[_name]
+del _ingredient, _row, _alias, _name
@@ -1,24 +1,139 @@
+import weakref
 from fractions import Fraction
-from typing import Union
-from kitchen.Kitchen import KitchenException
-from kitchen.ingredients.Ingredient import Ingredient
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+from kitchen.Kitchen import DIGEST_MASK, KitchenObject, KitchenException, Stats
+from kitchen.ingredients.Ingredient import Ingredient, MutableIngredient
+from kitchen.Rendering import render
 
-class Portion(Ingredient):
+class CompositeIngredient(Ingredient):
+    '''An Ingredient made of other Ingredients, such as a Collection or a Portion.
+
+    A CompositeIngredient keeps weak references to the CompositeIngredients containing it, so that changing it can
+    invalidate what is cached about them, such as their descriptions, Stats and the digests of their contents.
+    MutableIngredients keep them as well.
+    '''
+
+    def __init__(self):
+        self._parents = []
+        self._rendered = None
+        self._stats = None
+        self._digest = None
+
+    def _adopt(self, item: Ingredient):
+        if isinstance(item, CompositeIngredient):
+            parents = item._parents
+        elif isinstance(item, MutableIngredient):
+            parents = item._parents
+            if parents is None:
+                parents = item._parents = []
+        else:
+            return
+        if len(parents) >= 64 and len(parents) & (len(parents) - 1) == 0:
+            parents[:] = [parent for parent in parents if parent() is not None]
+        parents.append(weakref.ref(self))
+
+    def _changed(self, counts: bool = False, delta: Stats = None):
+        # When the counts change by a known delta, it is applied to the Stats, here and in every parent, instead of
+        # dropping them, so that they need not be counted again.
+        self._rendered = None
+        self._digest = None
+        if counts:
+            if delta is None:
+                self._stats = None
+            elif self._stats is not None:
+                self._stats._merge(delta)
+        # A parent holding this more than once, under several entries, is told once, as it scales by the total.
+        notified = set() if len(self._parents) > 1 else None
+        for reference in self._parents:
+            parent = reference()
+            if parent is None:
+                continue
+            if notified is not None:
+                if id(parent) in notified:
+                    continue
+                notified.add(id(parent))
+            parent._invalidate(counts, self, delta)
+
+    def _invalidate(self, counts: bool, child: 'CompositeIngredient' = None, delta: Stats = None):
+        # A parent with nothing cached has had its own parents invalidated already, so the walk can stop there.
+        if self._rendered is not None or self._digest is not None or counts and self._stats is not None:
+            self._changed(counts, self._scale(child, delta) if delta is not None else None)
+
+    def _scale(self, child: 'CompositeIngredient', delta: Stats) -> Optional[Stats]:
+        # Returns the change to these Stats for the given change to the Stats of a child, or None when it is not known.
+        return None
+
+    def _fingerprint(self) -> int:
+        if self._digest is None:
+            self._digest = sum(child._fingerprint() * amount for child, amount in self._entries()) & DIGEST_MASK
+        return hash((type(self).__name__, self._state(), self._digest))
+
+    def _statistics(self) -> Stats:
+        if self._stats is None:
+            self._stats = self._compute_stats()
+        return self._stats
+
+    def _compute_stats(self) -> Stats:
+        return Stats()
+
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        yield from ()
+
+    def __str__(self):
+        return render(self)
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_parents'], state['_rendered'], state['_stats'], state['_digest']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._parents = []
+        self._rendered = None
+        self._stats = None
+        self._digest = None
+        for child in self._children():
+            self._adopt(child)
+
+class Portion(CompositeIngredient):
     '''A Portion of a Mixture of Ingredients, usually the product of mixing Ingredients in a Bowl.'''
     
     def __init__(self, ingredient: 'Mixture', portion: Union[Fraction, int] = 1):
+        super().__init__()
         self.contents = ingredient
         self.portion = Fraction(portion)
+        self._adopt(ingredient)
     
     def _take(self, portion: str) -> 'Portion':
         portion_unit = Fraction(portion)
         if portion_unit > self.portion:
             raise KitchenException('Not enough left!')
         self.portion -= portion_unit
+        self._changed(counts=True, delta=_scaled(self.contents._statistics(), -portion_unit, 0))
         return Portion(self.contents, portion_unit)
+
+    def _children(self) -> Iterable[Ingredient]:
+        return (self.contents,)
+
+    def _compute_stats(self) -> Stats:
+        stats = Stats()
+        stats._include(self.contents._statistics(), self.portion)
+        return stats
+
+    def _scale(self, child: CompositeIngredient, delta: Stats) -> Optional[Stats]:
+        return _scaled(delta, self.portion, 1)
     
-    def __str__(self):
-        return (f'{self.portion} portion of ' if self.portion < 1 else '') + str(self.contents) if self.portion > 0 else 'nothing'
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        if self.portion > 0:
+            if self.portion < 1:
+                yield f'{self.portion} portion of '
+            yield self.contents
+        else:
+            yield 'nothing'
     
     def __eq__(self, other):
         return isinstance(other, Portion) and other.contents == self.contents and other.portion == self.portion
@@ -26,30 +141,158 @@ class Portion(Ingredient):
     def __hash__(self):
         return super().__hash__()
 
-class Collection(Ingredient):
+def _scaled(delta: Stats, times: Union[Fraction, int], items: int) -> Stats:
+    # The change to the Stats of a parent for a change to the Stats of a child inside it.
+    return Stats(0, delta.items * items, {key: quantity * times for key, quantity in delta.quantities.items()},
+                 {kind: count * times for kind, count in delta.counts.items()})
+
+def _tally(stats: Stats, item: Ingredient, amount: int):
+    if isinstance(item, CompositeIngredient):
+        stats._include(item._statistics(), amount, amount)
+    else:
+        name, unit, quantity = item._quantity()
+        stats.entries += amount
+        stats.items += amount
+        stats.quantities[name, unit] = stats.quantities.get((name, unit), 0) + quantity * amount
+        kind = type(item)
+        stats.counts[kind] = stats.counts.get(kind, 0) + amount
+
+class Collection(CompositeIngredient):
     '''A Collection of Ingredients.'''
     
     def __init__(self, name: str = None):
+        super().__init__()
         self.contents = {}
         self.name = name
+        self._stats = Stats()
+        # The amounts of the CompositeIngredients inside, by identity, to scale the changes they report without looking
+        # them up by their hashes, which the changes have made stale. None when it has to be found again.
+        self._held: Optional[Dict[int, int]] = {}
 
-    def _add(self, item: Ingredient):
+    def _add(self, item: Ingredient, amount: int = 1):
         if isinstance(item, Ingredient):
             if item == self:
                 raise KitchenException('Cannot add something to itself')
-            if item in self.contents:
-                self.contents[item] += 1
+            added = item not in self.contents
+            if added:
+                self.contents[item] = amount
+                self._adopt(item)
             else:
-                self.contents[item] = 1
+                self.contents[item] += amount
+            if isinstance(item, CompositeIngredient):
+                self._hold(item, amount, added)
+            digest = self._digest
+            self._count(((item, amount),))
+            if digest is not None:
+                self._digest = (digest + item._fingerprint() * amount) & DIGEST_MASK
         else:
             raise KitchenException('Can only add edible things')
+
+    def _add_many(self, items: Iterable[Ingredient]):
+        # The items are all checked first, and then added without any checks, in one change.
+        items = items if isinstance(items, (list, tuple)) else list(items)
+        for item in items:
+            if not isinstance(item, Ingredient):
+                raise KitchenException('Can only add edible things')
+        amounts = {}
+        for item in items:
+            amounts[item] = amounts.get(item, 0) + 1
+        for item in amounts:
+            if isinstance(item, CompositeIngredient) and item == self:
+                raise KitchenException('Cannot add something to itself')
+        contents = self.contents
+        for item, amount in amounts.items():
+            if item in contents:
+                contents[item] += amount
+                added = False
+            else:
+                contents[item] = amount
+                self._adopt(item)
+                added = True
+            if isinstance(item, CompositeIngredient):
+                self._hold(item, amount, added)
+        digest = self._digest
+        self._count(amounts.items())
+        if digest is not None:
+            self._digest = (digest + sum(item._fingerprint() * amount for item, amount in amounts.items())) & DIGEST_MASK
+
+    def _count(self, amounts: Iterable[Tuple[Ingredient, int]]):
+        if self._parents:
+            delta = Stats()
+            for item, amount in amounts:
+                _tally(delta, item, amount)
+            self._changed(counts=True, delta=delta)
+        else:
+            # Nothing holds this Collection, so the added items are counted into its own Stats directly.
+            self._changed()
+            stats = self._stats
+            if stats is not None:
+                for item, amount in amounts:
+                    _tally(stats, item, amount)
+
+    def _hold(self, item: CompositeIngredient, amount: int, added: bool):
+        held = self._held
+        if held is None:
+            return
+        if added or id(item) in held:
+            # A CompositeIngredient changed after it was added is found under another hash, and added again.
+            held[id(item)] = held.get(id(item), 0) + amount
+        else:
+            # An equal CompositeIngredient was added before, and which one is only found again when it is needed.
+            self._held = None
+
+    def _scale(self, child: CompositeIngredient, delta: Stats) -> Optional[Stats]:
+        held = self._held
+        if held is None:
+            held = self._held = {}
+            for item, amount in self.contents.items():
+                if isinstance(item, CompositeIngredient):
+                    held[id(item)] = held.get(id(item), 0) + amount
+        amount = held.get(id(child))
+        return _scaled(delta, amount, amount) if amount is not None else None
+
+    def _children(self) -> Iterable[Ingredient]:
+        return self.contents.keys()
+
+    def _entries(self) -> Iterable[Tuple[Ingredient, int]]:
+        return self.contents.items()
+
+    def _compute_stats(self) -> Stats:
+        stats = Stats()
+        for item, amount in self.contents.items():
+            stats._include(item._statistics(), amount, amount)
+        return stats
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        del state['_held']
+        return state
+
+    def __setstate__(self, state):
+        self._held = None
+        super().__setstate__(state)
     
-    def __str__(self):
-        return (f'"{self.name}", containing ' if self.name is not None else '') \
-            + ('(' if len(self.contents) > 1 else '') \
-            + (', '.join((f'{amount}x {content}' if amount > 1 else str(content)) for content, amount in self.contents.items())
-                if len(self.contents) > 0 else 'nothing') \
-            + (')' if len(self.contents) > 1 else '')
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        if self.name is not None:
+            yield f'"{self.name}", containing '
+        if len(self.contents) > 1:
+            yield '('
+        if len(self.contents) > 0:
+            separator = ''
+            shown = shown_amount = 0
+            for content, amount in self.contents.items():
+                if shown == width:
+                    yield f'{separator}[… {self._statistics().entries - shown_amount} more]'
+                    break
+                yield f'{separator}{amount}x ' if amount > 1 else separator
+                yield content
+                separator = ', '
+                shown += 1
+                shown_amount += amount
+        else:
+            yield 'nothing'
+        if len(self.contents) > 1:
+            yield ')'
     
     def __eq__(self, other):
         return isinstance(other, Collection) and other.contents == self.contents and other.name == self.name
@@ -60,8 +303,10 @@ class Collection(Ingredient):
 class Stack(Collection):
     '''A Stack of Ingredients.'''
     
-    def __str__(self):
-        return 'stacked ' + super().__str__() if len(self.contents) > 1 else super().__str__()
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        if len(self.contents) > 1:
+            yield 'stacked '
+        yield from super()._chunks(width)
     
     def __hash__(self):
         return super().__hash__()
@@ -75,9 +320,11 @@ class Mixture(Collection):
 
     def _mix(self):
         self.mixed = True
+        self._changed()
 
-    def __str__(self):
-        return ('mixed ' if self.mixed else ('unmixed ' if len(self.contents) > 1 else '')) + super().__str__()
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        yield 'mixed ' if self.mixed else ('unmixed ' if len(self.contents) > 1 else '')
+        yield from super()._chunks(width)
     
     def __eq__(self, other):
         return super().__eq__(other) and isinstance(other, Mixture) and self.mixed == other.mixed
@@ -95,12 +342,20 @@ class CookedCollection(Collection):
 
     def _cook(self, minutes: float = 1):
         self.cooked[self.side] += minutes
+        self._changed()
 
     def _flip(self):
         self.side = (self.side + 1) % 2
 
-    def __str__(self):
-        return f'cooked (for {self.cooked[0]}/{self.cooked[1]} minutes) ' + super().__str__()
+    def _attributes(self) -> Dict[str, Any]:
+        # The side facing the pan is where the Collection is in its cooking, not part of what it is.
+        attributes = super()._attributes()
+        del attributes['side']
+        return attributes
+
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        yield f'cooked (for {self.cooked[0]}/{self.cooked[1]} minutes) '
+        yield from super()._chunks(width)
     
     def __eq__(self, other):
         return super().__eq__(other) and isinstance(other, CookedCollection) and self.cooked == other.cooked
@@ -114,6 +369,22 @@ class TemperatureCollection(Collection):
     def __init__(self, name: str = None, temperature: int = 20):
         super().__init__(name)
         self.temperature = temperature
+
+    @property
+    def temperature(self) -> int:
+        '''The temperature the Collection has been kept at.'''
+
+        return self._temperature
+
+    @temperature.setter
+    def temperature(self, temperature: int):
+        self._temperature = temperature
+        self._changed()
+
+    def _attributes(self) -> Dict[str, Any]:
+        attributes = super()._attributes()
+        attributes['temperature'] = self.temperature
+        return attributes
     
     def __eq__(self, other):
         return super().__eq__(other) and isinstance(other, TemperatureCollection) and self.temperature == other.temperature
@@ -122,13 +393,52 @@ class TemperatureCollection(Collection):
         return super().__hash__()
 
 class ChilledCollection(TemperatureCollection):
-    '''A chilled Collection of Ingredients.'''
+    '''A chilled Collection of Ingredients.
+
+    While it is in a Fridge, its temperature is the Fridge's, read when it is needed, so changing the temperature of
+    the Fridge does not have to visit what is inside. Its description is then live, so neither it nor anything it is
+    part of caches its description until it is released from the Fridge, which fixes its temperature.
+    '''
     
-    def __init__(self, temperature: int = 5):
+    def __init__(self, temperature: int = 5, fridge=None):
         super().__init__(None, temperature=temperature)
+        self._fridge = fridge
 
-    def __str__(self):
-        return f'chilled (to {self.temperature} degrees) ' + super().__str__()
+    @property
+    def temperature(self) -> int:
+        '''The temperature the Collection has been kept at.'''
+
+        fridge = self._fridge
+        return fridge.temperature if fridge is not None else self._temperature
+
+    @temperature.setter
+    def temperature(self, temperature: int):
+        self._temperature = temperature
+        self._changed()
+
+    @property
+    def _live(self) -> bool:
+        return self._fridge is not None
+
+    def _state(self) -> tuple:
+        # The temperature of a Fridge changes without telling what is inside, so the Fridge stands in for it.
+        return super()._state() if self._fridge is None else (('fridge', id(self._fridge)),)
+
+    def _release(self):
+        self._temperature = self.temperature
+        self._fridge = None
+        self._changed()
+
+    def __getstate__(self):
+        # A copy is taken out of the Fridge, at the temperature it has now.
+        state = super().__getstate__()
+        state['_temperature'] = self.temperature
+        state['_fridge'] = None
+        return state
+
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        yield f'chilled (to {self.temperature} degrees) '
+        yield from super()._chunks(width)
     
     def __eq__(self, other):
         return super().__eq__(other) and isinstance(other, ChilledCollection) and self.temperature == other.temperature
@@ -145,9 +455,11 @@ class BakedCollection(TemperatureCollection):
 
     def _bake(self, minutes: float = 1):
         self.baked += minutes
+        self._changed()
 
-    def __str__(self):
-        return ('unbaked ' if self.baked == 0 else f'baked (at {self.temperature} degrees for {self.baked} minutes) ') + super().__str__()
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        yield 'unbaked ' if self.baked == 0 else f'baked (at {self.temperature} degrees for {self.baked} minutes) '
+        yield from super()._chunks(width)
     
     def __eq__(self, other):
         return super().__eq__(other) and isinstance(other, BakedCollection) and self.baked == other.baked and self.temperature == other.temperature
@@ -161,8 +473,9 @@ class PieCollection(BakedCollection):
     def __init__(self, name: str = None):
         super().__init__(name)
 
-    def __str__(self):
-        return 'pie of ' + super().__str__()
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        yield 'pie of '
+        yield from super()._chunks(width)
     
     def __eq__(self, other):
         return super().__eq__(other) and isinstance(other, PieCollection)
@@ -1,9 +1,84 @@
+import inspect
+import re
+import threading
 from copy import copy
-from typing import List, Optional, Union
-from kitchen.Kitchen import KitchenObject, KitchenException
+from fractions import Fraction
+from typing import Dict, List, Optional, Tuple, Union
+from kitchen.Kitchen import KitchenObject, KitchenException, Stats
+
+_QUANTITY = re.compile(r'\s*(\d+(?:/\d+|\.\d+)?)\s*(.*)')
+
+STATE_BITS = 4
+'''The number of low bits of the key of an Ingredient that hold its state, such as whether an Egg is cracked.'''
+
+AMOUNT_BITS = 32
+'''The number of bits of the key of an Ingredient, above its state, that hold the number of its amount.'''
+
+_kinds: Dict[str, int] = {}
+_names: List[str] = []
+_numbers: Dict[str, int] = {}
+_amounts: List[Tuple[Optional[str], Optional[str], Union[Fraction, int]]] = [(None, None, 1)]
+_numbering = threading.Lock()
+
+def _parse_amount(amount: str) -> Tuple[str, Union[Fraction, int]]:
+    match = _QUANTITY.fullmatch(amount)
+    if match is None:
+        return amount, 1
+    quantity = match.group(1)
+    return match.group(2), int(quantity) if quantity.isdigit() else Fraction(quantity)
+
+def _pack(name: str, amount: Optional[str] = None, state: int = 0) -> int:
+    # Names and amounts are numbered in the order they are first seen, so keys are only meaningful in this process.
+    kind = _kinds.get(name)
+    if kind is None:
+        kind = _number_name(name)
+    number = 0
+    if amount is not None:
+        number = _numbers.get(amount)
+        if number is None:
+            number = _number_amount(amount)
+    return (kind << AMOUNT_BITS | number) << STATE_BITS | state
+
+def _number_name(name: str) -> int:
+    # New names and amounts are numbered under the lock, and only looked up without it once they are stored, so two
+    # threads never give the same number to different names or amounts.
+    with _numbering:
+        kind = _kinds.get(name)
+        if kind is None:
+            kind = len(_names)
+            _names.append(name)
+            _kinds[name] = kind
+        return kind
+
+def _number_amount(amount: str) -> int:
+    with _numbering:
+        number = _numbers.get(amount)
+        if number is None:
+            if len(_amounts) >= 1 << AMOUNT_BITS:
+                raise KitchenException('The kitchen has run out of numbers for amounts!')
+            number = len(_amounts)
+            _amounts.append((amount, *_parse_amount(amount)))
+            _numbers[amount] = number
+        return number
+
+def _flag(bit: int, doc: str) -> property:
+    def get(self) -> bool:
+        return bool(self._key & bit)
+
+    def set(self, value: bool):
+        self._key = self._key | bit if value else self._key & ~bit
+        self._changed()
+    return property(get, set, doc=doc)
 
 class Ingredient(KitchenObject):
-    '''An Ingredient in Rosemary's Kitchen.'''
+    '''An Ingredient in Rosemary's Kitchen.
+
+    A plain Ingredient is identified by an integer key, which packs a number for its name, a number for its amount and
+    its state, such as whether an Egg is cracked, into one int. Hashing, comparing and sorting Ingredients only look at
+    their keys, and the key is all an Ingredient stores. CompositeIngredients are identified by their contents instead.
+    '''
+
+    __slots__ = ('_key',)
 
     @staticmethod
     def _take(ingredient: type, amount: int):
@@ -12,24 +87,46 @@ class Ingredient(KitchenObject):
         return [ingredient() for i in range(amount)] if amount > 1 else ingredient()
 
     def __init__(self):
-        self.name = 'unknown'
-        self.amount = -1
         raise KitchenException('Cannot initiate abstract ingredient!')
 
     def __str__(self):
         return self.name
 
     def __hash__(self):
-        return hash(str(self))
+        return self._key
     
     def __eq__(self, other):
-        return isinstance(other, Ingredient) and self.name == other.name
+        return isinstance(other, Ingredient) and self._key == getattr(other, '_key', None)
+
+    def __lt__(self, other: 'Ingredient') -> bool:
+        return self._key < other._key
+
+    def __getstate__(self):
+        # The numbers in the key are only known to this process, so the Ingredient is stored by name and amount.
+        key = self._key
+        return _names[key >> AMOUNT_BITS + STATE_BITS], _amounts[key >> STATE_BITS & (1 << AMOUNT_BITS) - 1][0], \
+               key & (1 << STATE_BITS) - 1
+
+    def __setstate__(self, state):
+        self._key = _pack(*state)
     
     def __iter__(self):
         return iter([self])
 
+    def _quantity(self) -> Tuple[str, Optional[str], Union[Fraction, int]]:
+        return self.name, None, 1
+
+    def _fingerprint(self) -> int:
+        return hash((type(self).__name__, self._key))
+
+    def _statistics(self) -> Stats:
+        name, unit, quantity = self._quantity()
+        return Stats(1, 1, {(name, unit): quantity}, {type(self): 1})
+
 class UncountableIngredient(Ingredient):
     '''An uncountable Ingredient in Rosemary's Kitchen.'''
+
+    __slots__ = ()
     
     @staticmethod
     def _take(ingredient: type, unit: str, amount: Optional[str], units: Optional[int]):
@@ -44,18 +141,26 @@ class UncountableIngredient(Ingredient):
         if not isinstance(amount, str):
             raise KitchenException('Cannot take scalar amount of uncountable ingredient!')
         
-        self.name = name
-        self.amount = amount
+        self._key = _pack(name, amount)
+
+    @property
+    def name(self) -> str:
+        '''The name of the Ingredient, e.g. 'flour'.'''
+
+        return _names[self._key >> AMOUNT_BITS + STATE_BITS]
+
+    @property
+    def amount(self) -> str:
+        '''The amount of the Ingredient, as taken, e.g. '50 g' or 'pinch'.'''
+
+        return _amounts[self._key >> STATE_BITS & (1 << AMOUNT_BITS) - 1][0]
 
     def __str__(self):
-        return f'{self.amount} of {self.name}' if isinstance(self.amount, str) else \
-               f'{self.amount} {self.name}' + ('s' if self.amount > 1 else '')
-    
-    def __hash__(self):
-        return super().__hash__()
+        return f'{self.amount} of {self.name}'
 
-    def __eq__(self, other):
-        return isinstance(other, UncountableIngredient) and self.name == other.name and self.amount == other.amount
+    def _quantity(self) -> Tuple[str, Optional[str], Union[Fraction, int]]:
+        _, unit, quantity = _amounts[self._key >> STATE_BITS & (1 << AMOUNT_BITS) - 1]
+        return self.name, unit, quantity
     
     def times(self, amount: int) -> List['UncountableIngredient']:
         '''Returns a list containing the given number of times the current amount of this uncountable Ingredient.
@@ -69,30 +174,26 @@ class UncountableIngredient(Ingredient):
         
         return [copy(self) for i in range(amount)]
 
-class Butter(UncountableIngredient):
-    '''A pale yellow edible fatty substance made by churning cream and used as a spread or in cooking.'''
+class MutableIngredient(Ingredient):
+    '''An Ingredient that can still be changed after it has been taken, such as an Egg that can be cracked.
 
-    @staticmethod
-    def take(amount: str = None, grams: int = None) -> 'Butter':
-        '''Returns a given amount of Butter.
+    Like a CompositeIngredient, it keeps weak references to the CompositeIngredients containing it, so that changing it
+    invalidates what is cached about them. The list is only made once it is first added to one.
+    '''
 
-        Args:
-            amount (str): the amount, specified as a string.
-            grams (int): the amount, specified in number of grams.
+    __slots__ = ('_parents',)
 
-        Returns:
-            Butter: the given amount of Butter.
-        '''
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._parents = None
 
-        return UncountableIngredient._take(__class__, 'g', amount, grams)
-    
-    def __init__(self, amount: str):
-        super().__init__('butter', amount)
-    
-    def __hash__(self):
-        return super().__hash__()
-    
-class Egg(Ingredient):
+    def _changed(self):
+        for reference in self._parents or ():
+            parent = reference()
+            if parent is not None:
+                parent._invalidate(False)
+
+class Egg(MutableIngredient):
     '''An oval object laid by a female bird, usually containing a developing embryo enclosed in a chalky shell.'''
 
     @staticmethod
@@ -108,9 +209,13 @@ class Egg(Ingredient):
         
         return Ingredient._take(__class__, amount)
     
+    __slots__ = ()
+    name = 'egg'
+    cracked = _flag(1, '''Whether the Egg is cracked.''')
+
     def __init__(self):
-        self.name = 'egg'
-        self.cracked = False
+        self._key = _pack('egg')
+        self._parents = None
 
     def crack(self):
         '''Cracks the current egg.'''
@@ -119,14 +224,8 @@ class Egg(Ingredient):
     
     def __str__(self):
         return ('cracked ' if self.cracked else '') + self.name
-    
-    def __eq__(self, other):
-        return isinstance(other, Egg) and self.cracked == other.cracked
-    
-    def __hash__(self):
-        return super().__hash__()
 
-class Apple(Ingredient):
+class Apple(MutableIngredient):
     '''The round fruit of a tree of the rose family, which typically has thin green or red skin and crisp flesh.'''
     
     @staticmethod
@@ -142,10 +241,14 @@ class Apple(Ingredient):
         
         return Ingredient._take(__class__, amount)
     
+    __slots__ = ()
+    name = 'apple'
+    peeled = _flag(1, '''Whether the Apple is peeled.''')
+    sliced = _flag(2, '''Whether the Apple is sliced.''')
+
     def __init__(self):
-        self.name = 'apple'
-        self.peeled = False
-        self.sliced = False
+        self._key = _pack('apple')
+        self._parents = None
 
     def peel(self):
         '''Peels the current Apple.
@@ -166,14 +269,8 @@ class Apple(Ingredient):
     
     def __str__(self):
         return ('sliced ' if self.sliced else '') + ('peeled ' if self.peeled else '') + self.name
-    
-    def __eq__(self, other):
-        return isinstance(other, Apple) and self.sliced == other.sliced and self.peeled == other.peeled
-    
-    def __hash__(self):
-        return super().__hash__()
 
-class Lemon(Ingredient):
+class Lemon(MutableIngredient):
     '''A pale yellow oval citrus fruit with thick skin and fragrant, acidic juice.'''
     
     @staticmethod
@@ -189,10 +286,14 @@ class Lemon(Ingredient):
 
         return Ingredient._take(__class__, amount)
     
+    __slots__ = ()
+    name = 'lemon'
+    zested = _flag(1, '''Whether the Lemon is zested.''')
+    squeezed = _flag(2, '''Whether the Lemon is squeezed.''')
+
     def __init__(self):
-        self.name = 'lemon'
-        self.zested = False
-        self.squeezed = False
+        self._key = _pack('lemon')
+        self._parents = None
 
     def zest(self) -> 'LemonZest':
         '''Zests the current Lemon, and returns the LemonZest.
@@ -216,262 +317,81 @@ class Lemon(Ingredient):
     
     def __str__(self):
         return ('squeezed ' if self.squeezed else '') + ('zested ' if self.zested else '') + self.name
-    
-    def __eq__(self, other):
-        return isinstance(other, Lemon) and self.squeezed == other.squeezed and self.zested == other.zested
-    
-    def __hash__(self):
-        return super().__hash__()
 
-class LemonZest(UncountableIngredient):
-    '''The outer part of the peel of a Lemon, used as flavouring.'''
-    
-    @staticmethod
-    def take(amount: str = None, grams: int = None) -> 'LemonZest':
-        '''Returns a given amount of LemonZest.
-
-        Args:
-            amount (str): the amount, specified as a string.
-            grams (int): the amount, specified in number of grams.
+# The kinds of UncountableIngredient that differ only in name and unit: class name, name, unit, keyword of take.
+UNCOUNTABLE = [
+    ('Butter', 'butter', 'g', 'grams',
+     'A pale yellow edible fatty substance made by churning cream and used as a spread or in cooking.'),
+    ('LemonZest', 'lemon zest', 'g', 'grams',
+     'The outer part of the peel of a Lemon, used as flavouring.'),
+    ('LemonJuice', 'lemon juice', 'ml', 'ml',
+     'The liquid obtained from a Lemon.'),
+    ('Salt', 'salt', 'g', 'grams',
+     'A white crystalline substance that gives seawater its characteristic taste and is used for seasoning or preserving food.'),
+    ('Flour', 'flour', 'g', 'grams',
+     'A powder obtained by grinding grain, typically wheat, and used to make bread, cakes, and pastry.'),
+    ('Sugar', 'sugar', 'g', 'grams',
+     'A sweet crystalline substance obtained from various plants, especially sugar cane and sugar beet, consisting essentially of sucrose.'),
+    ('Cinnamon', 'cinnamon', 'g', 'grams',
+     'An aromatic spice made from the peeled, dried, and rolled bark of a south-east Asian tree.'),
+    ('Cornstarch', 'cornstarch', 'g', 'grams',
+     'Finely ground maize flour, used as a thickener in cooking; cornflour.'),
+    ('BakingPowder', 'baking powder', 'g', 'grams',
+     'A mixture of sodium bicarbonate and cream of tartar, used instead of yeast in baking.'),
+    ('ChocolateChips', 'chocolate chips', 'g', 'grams',
+     'Small pieces of chocolate used in biscuits, cakes, and ice cream.'),
+    ('Milk', 'milk', 'ml', 'ml',
+     'An opaque white fluid rich in fat and protein, secreted by female mammals for the nourishment of their young.'),
+    ('Water', 'water', 'ml', 'ml',
+     'A colourless, transparent, odourless liquid that forms the seas, lakes, rivers, and rain and is the basis of the fluids of living organisms.'),
+]
+
+def uncountable(class_name: str, name: str, unit: str, keyword: str, description: str = None,
+                module: str = __name__) -> type:
+    '''Returns a new kind of UncountableIngredient, which differs from the others only in its name and in the unit it
+    is taken in.
+
+    Args:
+        class_name (str): the name of the class, e.g. 'Flour'.
+        name (str): the name of the Ingredient, e.g. 'flour'.
+        unit (str): the unit a number of units is taken in, e.g. 'g'.
+        keyword (str): the keyword argument of take for a number of units, e.g. 'grams'.
+        description (str): the docstring of the class.
+        module (str): the module the class is placed in, from which it can be unpickled.
+
+    Returns:
+        type: the new UncountableIngredient subclass.
+    '''
+
+    def take(amount: str = None, units: int = None, **named: int) -> UncountableIngredient:
+        if named:
+            if len(named) > 1 or keyword not in named:
+                raise KitchenException(f'Can only take {name} in {keyword}!')
+            units = named[keyword]
+        return UncountableIngredient._take(cls, unit, amount, units)
 
-        Returns:
-            LemonZest: the given amount of LemonZest.
-        '''
-
-        return UncountableIngredient._take(__class__, 'g', amount, grams)
-    
-    def __init__(self, amount: str):
-        super().__init__('lemon zest', amount)
-    
-    def __hash__(self):
-        return super().__hash__()
-
-class LemonJuice(UncountableIngredient):
-    '''The liquid obtained from a Lemon.'''
-    
-    @staticmethod
-    def take(amount: str = None, ml: int = None) -> 'LemonJuice':
-        '''Returns a given amount of LemonJuice.
-
-        Args:
-            amount (str): the amount, specified as a string.
-            ml (int): the amount, specified in number of millilitres.
-
-        Returns:
-            LemonJuice: the given amount of LemonJuice.
-        '''
-
-        return UncountableIngredient._take(__class__, 'ml', amount, ml)
-    
-    def __init__(self, amount: str):
-        super().__init__('lemon juice', amount)
-    
-    def __hash__(self):
-        return super().__hash__()
-
-class Salt(UncountableIngredient):
-    '''A white crystalline substance that gives seawater its characteristic taste and is used for seasoning or preserving food.'''
-   
-    @staticmethod
-    def take(amount: str = None, grams: int = None) -> 'Salt':
-        '''Returns a given amount of Salt.
-
-        Args:
-            amount (str): the amount, specified as a string.
-            grams (int): the amount, specified in number of grams.
-
-        Returns:
-            Salt: the given amount of Salt.
-        '''
-
-        return UncountableIngredient._take(__class__, 'g', amount, grams)
-    
     def __init__(self, amount: str):
-        super().__init__('salt', amount)
-    
-    def __hash__(self):
-        return super().__hash__()
+        UncountableIngredient.__init__(self, name, amount)
 
-class Flour(UncountableIngredient):
-    '''A powder obtained by grinding grain, typically wheat, and used to make bread, cakes, and pastry.'''
-    
-    @staticmethod
-    def take(amount: str = None, grams: int = None) -> 'Flour':
-        '''Returns a given amount of Flour.
+    take.__doc__ = f'''Returns a given amount of {class_name}.
 
         Args:
             amount (str): the amount, specified as a string.
-            grams (int): the amount, specified in number of grams.
+            {keyword} (int): the amount, specified in {unit}.
 
         Returns:
-            Flour: the given amount of Flour.
+            {class_name}: the given amount of {class_name}.
         '''
-
-        return UncountableIngredient._take(__class__, 'g', amount, grams)
-    
-    def __init__(self, amount: str):
-        super().__init__('flour', amount)
-    
-    def __hash__(self):
-        return super().__hash__()
-
-class Sugar(UncountableIngredient):
-    '''A sweet crystalline substance obtained from various plants, especially sugar cane and sugar beet, consisting essentially of sucrose.'''
-    
-    @staticmethod
-    def take(amount: str = None, grams: int = None) -> 'Sugar':
-        '''Returns a given amount of Sugar.
-
-        Args:
-            amount (str): the amount, specified as a string.
-            grams (int): the amount, specified in number of grams.
-
-        Returns:
-            Sugar: the given amount of Sugar.
-        '''
-
-        return UncountableIngredient._take(__class__, 'g', amount, grams)
-    
-    def __init__(self, amount: str):
-        super().__init__('sugar', amount)
-    
-    def __hash__(self):
-        return super().__hash__()
-
-class Cinnamon(UncountableIngredient):
-    '''An aromatic spice made from the peeled, dried, and rolled bark of a south-east Asian tree.'''
-    
-    @staticmethod
-    def take(amount: str = None, grams: int = None) -> 'Cinnamon':
-        '''Returns a given amount of Cinnamon.
-
-        Args:
-            amount (str): the amount, specified as a string.
-            grams (int): the amount, specified in number of grams.
-
-        Returns:
-            Cinnamon: the given amount of Cinnamon.
-        '''
-
-        return UncountableIngredient._take(__class__, 'g', amount, grams)
-    
-    def __init__(self, amount: str):
-        super().__init__('cinnamon', amount)
-    
-    def __hash__(self):
-        return super().__hash__()
-
-class Cornstarch(UncountableIngredient):
-    '''Finely ground maize flour, used as a thickener in cooking; cornflour.'''
-    
-    @staticmethod
-    def take(amount: str = None, grams: int = None) -> 'Cornstarch':
-        '''Returns a given amount of Cornstarch.
-
-        Args:
-            amount (str): the amount, specified as a string.
-            grams (int): the amount, specified in number of grams.
-
-        Returns:
-            Cornstarch: the given amount of Cornstarch.
-        '''
-
-        return UncountableIngredient._take(__class__, 'g', amount, grams)
-    
-    def __init__(self, amount: str):
-        super().__init__('cornstarch', amount)
-    
-    def __hash__(self):
-        return super().__hash__()
-
-class BakingPowder(UncountableIngredient):
-    '''A mixture of sodium bicarbonate and cream of tartar, used instead of yeast in baking.'''
-    
-    @staticmethod
-    def take(amount: str = None, grams: int = None) -> 'BakingPowder':
-        '''Returns a given amount of BakingPowder.
-
-        Args:
-            amount (str): the amount, specified as a string.
-            grams (int): the amount, specified in number of grams.
-
-        Returns:
-            BakingPowder: the given amount of BakingPowder.
-        '''
-
-        return UncountableIngredient._take(__class__, 'g', amount, grams)
-    
-    def __init__(self, amount: str):
-        super().__init__('baking powder', amount)
-    
-    def __hash__(self):
-        return super().__hash__()
-
-class ChocolateChips(UncountableIngredient):
-    '''Small pieces of chocolate used in biscuits, cakes, and ice cream.'''
-    
-    @staticmethod
-    def take(amount: str = None, grams: int = None) -> 'ChocolateChips':
-        '''Returns a given amount of ChocolateChips.
-
-        Args:
-            amount (str): the amount, specified as a string.
-            grams (int): the amount, specified in number of grams.
-
-        Returns:
-            ChocolateChips: the given amount of ChocolateChips.
-        '''
-
-        return UncountableIngredient._take(__class__, 'g', amount, grams)
-    
-    def __init__(self, amount: str):
-        super().__init__('chocolate chips', amount)
-    
-    def __hash__(self):
-        return super().__hash__()
-
-class Milk(UncountableIngredient):
-    '''An opaque white fluid rich in fat and protein, secreted by female mammals for the nourishment of their young.'''
-    
-    @staticmethod
-    def take(amount: str = None, ml: int = None) -> 'Milk':
-        '''Returns a given amount of Milk.
-
-        Args:
-            amount (str): the amount, specified as a string.
-            ml (int): the amount, specified in number of millilitres.
-
-        Returns:
-            Milk: the given amount of Milk.
-        '''
-
-        return UncountableIngredient._take(__class__, 'ml', amount, ml)
-    
-    def __init__(self, amount: str):
-        super().__init__('milk', amount)
-    
-    def __hash__(self):
-        return super().__hash__()
-
-class Water(UncountableIngredient):
-    '''A colourless, transparent, odourless liquid that forms the seas, lakes, rivers, and rain and is the basis of the fluids of living organisms.'''
-    
-    @staticmethod
-    def take(amount: str = None, ml: int = None) -> 'Water':
-        '''Returns a given amount of Water.
-
-        Args:
-            amount (str): the amount, specified as a string.
-            ml (int): the amount, specified in number of millilitres.
-
-        Returns:
-            Water: the given amount of Water.
-        '''
-
-        return UncountableIngredient._take(__class__, 'ml', amount, ml)
-    
-    def __init__(self, amount: str):
-        super().__init__('water', amount)
-    
-    def __hash__(self):
-        return super().__hash__()
+    take.__signature__ = inspect.Signature([
+        inspect.Parameter('amount', inspect.Parameter.POSITIONAL_OR_KEYWORD, default=None, annotation=str),
+        inspect.Parameter(keyword, inspect.Parameter.POSITIONAL_OR_KEYWORD, default=None, annotation=int)])
+    cls = type(class_name, (UncountableIngredient,), {
+        '__doc__': description, '__module__': module, '__qualname__': class_name,
+        '__slots__': (), '__init__': __init__, 'take': staticmethod(take),
+        'unit': unit, 'keyword': keyword,
+    })
+    return cls
+
+for _row in UNCOUNTABLE:
+    globals()[_row[0]] = uncountable(*_row)
+del _row
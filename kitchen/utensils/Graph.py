@@ -0,0 +1,160 @@
+from collections.abc import Sequence
+from fractions import Fraction
+from typing import Dict, List, Union
+from kitchen.ingredients.Ingredient import Ingredient
+from kitchen.ingredients.Collections import CompositeIngredient, Mixture, Portion
+
+class Operation:
+    '''An operation on the contents of a lazy Bowl, recorded in its expression graph until the contents are used.'''
+
+    def _apply(self, bowl):
+        raise NotImplementedError
+
+class Add(Operation):
+    '''Adds an Ingredient, a given number of times, to the Mixture.'''
+
+    def __init__(self, item: Ingredient, amount: int = 1):
+        self.item = item
+        self.amount = amount
+
+    def _apply(self, bowl):
+        bowl._mixture._add(self.item, self.amount)
+
+class AddMany(Operation):
+    '''Adds a batch of Ingredients to the Mixture at once.'''
+
+    def __init__(self, items: List[Ingredient]):
+        self.items = items
+
+    def _apply(self, bowl):
+        bowl._mixture._add_many(self.items)
+
+class Mix(Operation):
+    '''Mixes the Mixture.'''
+
+    def _apply(self, bowl):
+        bowl._mixture._mix()
+
+class Take(Operation):
+    '''Takes a Portion from the Mixture.'''
+
+    def __init__(self, portion: Fraction):
+        self.portion = portion
+
+    def _apply(self, bowl):
+        bowl._portion()._take(self.portion)
+
+class Divide(Operation):
+    '''Divides the whole Mixture into a number of equal Portions.'''
+
+    def __init__(self, portions: int):
+        self.portions = portions
+
+    def _apply(self, bowl):
+        # The Portions themselves were handed out when dividing, so only the Bowl needs emptying.
+        bowl._portion()._take(1)
+
+class MixDivide(Divide):
+    '''Mixes the Mixture and divides it into a number of equal Portions, as one operation.'''
+
+    def _apply(self, bowl):
+        bowl._mixture._mix()
+        super()._apply(bowl)
+
+def optimize(operations: List[Operation]) -> List[Operation]:
+    '''Returns an equivalent, shorter list of operations. Mixing commutes with adding Ingredients, so every Mix is moved
+    to just before the first use of the Mixture, after which equal additions that have become consecutive are merged
+    into one, and a Mix followed by a Divide is fused into a MixDivide.
+
+    Args:
+        operations (List[Operation]): the operations, in the order they were recorded.
+
+    Returns:
+        List[Operation]: the optimized operations.
+    '''
+
+    optimized = []
+    mixing = False
+    for operation in operations:
+        if isinstance(operation, Mix):
+            mixing = True
+        elif isinstance(operation, Add):
+            last = optimized[-1] if optimized else None
+            if isinstance(last, Add) and last.item == operation.item:
+                optimized[-1] = Add(last.item, last.amount + operation.amount)
+            else:
+                optimized.append(operation)
+        elif isinstance(operation, AddMany):
+            optimized.append(operation)
+        else:
+            if mixing and isinstance(operation, Divide):
+                operation = MixDivide(operation.portions)
+            elif mixing:
+                optimized.append(Mix())
+            mixing = False
+            optimized.append(operation)
+    if mixing:
+        optimized.append(Mix())
+    return optimized
+
+class LazyPortion(Portion):
+    '''A Portion taken from a lazy Bowl, which materializes the Bowl's pending operations when its contents are used.'''
+
+    def __init__(self, bowl, mixture: Mixture, portion: Union[Fraction, int] = 1):
+        CompositeIngredient.__init__(self)
+        self._bowl = bowl
+        self._mixture = mixture
+        self.portion = Fraction(portion)
+        self._adopt(mixture)
+
+    @property
+    def contents(self) -> Mixture:
+        if self._bowl is not None:
+            self._bowl._materialize()
+            self._bowl = None
+        return self._mixture
+
+    @contents.setter
+    def contents(self, contents: Mixture):
+        self._bowl = None
+        self._mixture = contents
+
+    def _children(self):
+        return (self._mixture,)
+
+    def __getstate__(self):
+        # Observing the contents applies the Bowl's pending operations, and lets go of the Bowl.
+        self.contents
+        return super().__getstate__()
+
+    def __hash__(self):
+        return super().__hash__()
+
+class Portions(Sequence):
+    '''The equal Portions a lazy Bowl was divided into. Each Portion is only created when it is first accessed, and is
+    the same Portion every time after that.'''
+
+    def __init__(self, bowl, portions: int):
+        self._bowl = bowl
+        self._mixture = bowl._mixture
+        self._portions = portions
+        self._portion = Fraction(1, portions)
+        self._created: Dict[int, LazyPortion] = {}
+
+    def __len__(self):
+        return self._portions
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._portions))]
+        if index < 0:
+            index += self._portions
+        if not 0 <= index < self._portions:
+            raise IndexError('portion index out of range')
+        portion = self._created.get(index)
+        if portion is None:
+            portion = self._created[index] = LazyPortion(self._bowl, self._mixture, self._portion)
+        return portion
+
+    def __repr__(self):
+        return repr(list(self))
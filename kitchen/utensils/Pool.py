@@ -0,0 +1,116 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+from kitchen.Kitchen import KitchenException
+from kitchen.utensils.Utensil import Utensil
+
+class PoolStats:
+    '''The counters of one kind of Utensil in a UtensilPool: acquisitions served from the pool and by making a new
+    Utensil, releases, and the number of Utensils in use, now and at most.'''
+
+    def __init__(self, kind: type):
+        self.kind = kind
+        self.hits = 0
+        self.misses = 0
+        self.releases = 0
+        self.in_use = 0
+        self.high_water = 0
+
+class UtensilPool:
+    '''A pool of Utensils that are used again instead of being thrown away, for workloads that use a Plate, Bowl or Pan
+    for every order. Acquiring gives a Utensil in the state use() would give it: a released Utensil is reset, which
+    gives it new contents where its old contents may still be in use, such as a served Stack or a Mixture that Portions
+    were taken from, and reuses them otherwise. Up to size Utensils of every kind are kept for later.
+
+    A released Utensil must no longer be used, and neither must its contents, unless they were taken from it first.
+    Acquiring and releasing are safe to use from several threads at once.
+
+        pool = UtensilPool()
+        with pool.borrow(Pan, name='pancakes') as pan:
+            ...
+            plate.add(pan.take())
+    '''
+
+    def __init__(self, size: int = 64):
+        self.size = size
+        self.stats: Dict[type, PoolStats] = {}
+        self._free: Dict[type, List[Utensil]] = {}
+        self._in_use = set()
+        self._lock = threading.Lock()
+
+    def acquire(self, kind: type, *args, **kwargs) -> Utensil:
+        '''Returns a Utensil of the given kind, with the same arguments as creating it.
+
+        Args:
+            kind (type): the Utensil class, e.g. Bowl.
+
+        Returns:
+            Utensil: the Utensil, from the pool if one is free.
+        '''
+
+        with self._lock:
+            stats = self.stats.get(kind)
+            if stats is None:
+                stats = self.stats[kind] = PoolStats(kind)
+            free = self._free.get(kind)
+            if free:
+                utensil = free.pop()
+                utensil._reset(*args, **kwargs)
+                stats.hits += 1
+            else:
+                utensil = kind(*args, **kwargs)
+                stats.misses += 1
+            stats.in_use += 1
+            if stats.in_use > stats.high_water:
+                stats.high_water = stats.in_use
+            self._in_use.add(id(utensil))
+        return utensil
+
+    def release(self, utensil: Utensil):
+        '''Gives the given Utensil back to the pool.
+
+        Args:
+            utensil (Utensil): a Utensil acquired from this pool.
+
+        Raises:
+            KitchenException: when the Utensil was not acquired from this pool, or was already released.
+        '''
+
+        with self._lock:
+            if id(utensil) not in self._in_use:
+                raise KitchenException('That utensil is not in use from this pool!')
+            self._in_use.remove(id(utensil))
+            stats = self.stats[type(utensil)]
+            stats.releases += 1
+            stats.in_use -= 1
+            free = self._free.setdefault(type(utensil), [])
+            if len(free) < self.size:
+                free.append(utensil)
+
+    @contextmanager
+    def borrow(self, kind: type, *args, **kwargs) -> Iterator[Utensil]:
+        '''Returns a context manager giving a Utensil of the given kind, which is released when the context ends.
+
+        Args:
+            kind (type): the Utensil class, e.g. Bowl.
+        '''
+
+        utensil = self.acquire(kind, *args, **kwargs)
+        try:
+            yield utensil
+        finally:
+            self.release(utensil)
+
+    def report(self) -> str:
+        '''Returns a text report of the counters of every kind of Utensil.
+
+        Returns:
+            str: the report.
+        '''
+
+        lines = [f'{"utensil":<12} {"hits":>8} {"misses":>8} {"hit rate":>8} {"in use":>7} {"most in use":>11}']
+        for stats in self.stats.values():
+            acquired = stats.hits + stats.misses
+            lines.append(f'{stats.kind.__name__:<12} {stats.hits:>8} {stats.misses:>8} '
+                         f'{stats.hits / acquired if acquired else 0:>8.1%} {stats.in_use:>7} {stats.high_water:>11}')
+        return '\n'.join(lines)
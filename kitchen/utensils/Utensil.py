@@ -1,11 +1,82 @@
-from typing import List, Optional
+import threading
+from fractions import Fraction
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from kitchen.ingredients.Ingredient import Ingredient
 from kitchen.Kitchen import KitchenObject, KitchenException
 from kitchen.ingredients.Collections import Stack, Mixture, Portion, CookedCollection, BakedCollection, PieCollection, ChilledCollection
+from kitchen.ingredients.Collections import Collection
+from kitchen.Rendering import render
+from kitchen.utensils.Graph import Add, AddMany, Mix, Take, Divide, LazyPortion, Portions, optimize
 
 class Utensil(KitchenObject):
     '''A Kitchen Utensil to modify or combine Ingredients in specific ways.'''
-    pass
+
+    def _children(self) -> Iterable[KitchenObject]:
+        return (self.contents,) if isinstance(self.contents, KitchenObject) else ()
+
+    def _reset(self, *args, **kwargs):
+        # Puts a Utensil that is used again, such as from a UtensilPool, in the state use() would give it.
+        self.__init__(*args, **kwargs)
+
+    def __str__(self):
+        return render(self)
+
+_hooks = threading.local()
+_hooked = 0
+_hooking = threading.Lock()
+
+class UtensilHook:
+    '''A hook into the Utensils used by the current thread. While it is active, as a context manager, Bowl.use first
+    asks it for the Bowl to use, and it is told whenever a Pan cooks, an Oven bakes, either is taken from, or a Bowl is
+    put in a Fridge, before that is done. Hooks are kept per thread, so other threads using the Kitchen at the same
+    time are not affected, and a hook that is entered stands in for the one before it until it is exited.
+
+        with MyHook():
+            dish = recipe()
+    '''
+
+    def _use_bowl(self, name: Optional[str], lazy: bool) -> Optional['Bowl']:
+        # Returns the Bowl to use instead of a new one, or None for a new one.
+        return None
+
+    def _used(self, utensil: Utensil, action: str, minutes: float = 0):
+        # The action is 'cook', 'bake', 'take' or 'chill', with the minutes it takes when they are given.
+        pass
+
+    def __enter__(self) -> 'UtensilHook':
+        global _hooked
+        self._previous = getattr(_hooks, 'active', None)
+        _hooks.active = self
+        with _hooking:
+            _hooked += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        global _hooked
+        _hooks.active = self._previous
+        with _hooking:
+            _hooked -= 1
+
+def _hook() -> Optional[UtensilHook]:
+    # Most of the time no thread has a hook, which is told without looking up the hooks of this one.
+    return getattr(_hooks, 'active', None) if _hooked else None
+
+def _used(utensil: Utensil, action: str, minutes: float = 0):
+    hook = _hook()
+    if hook is not None:
+        hook._used(utensil, action, minutes)
+
+def _renew(contents: Union[CookedCollection, BakedCollection],
+           name: Optional[str]) -> Union[CookedCollection, BakedCollection]:
+    # Taking from a Pan or BakingUtensil leaves it an empty collection, which can be renamed rather than replaced, as
+    # long as nothing has been done with it since.
+    if contents.contents or contents._parents \
+            or isinstance(contents, CookedCollection) and (contents.cooked != [0., 0.] or contents.side) \
+            or isinstance(contents, BakedCollection) and (contents.baked or contents.temperature != 20):
+        return type(contents)(name=name)
+    contents.name = name
+    contents._changed()
+    return contents
 
 class Plate(Utensil):
     '''A Kitchen Utensil to serve and/or collect Ingredients.'''
@@ -25,6 +96,10 @@ class Plate(Utensil):
     
     def __init__(self, name: str = None):
         self.contents = Stack(name=name)
+
+    def _reset(self, name: str = None):
+        # The Stack on the Plate was served with it, so the Plate gets a new one.
+        self.contents = Stack(name=name)
     
     def add(self, item: Ingredient):
         '''Adds the given item onto the Plate.
@@ -34,28 +109,74 @@ class Plate(Utensil):
         '''
 
         self.contents._add(item)
+
+    def add_many(self, items: Iterable[Ingredient]):
+        '''Adds the given items onto the Plate, checking them all first and then adding them at once.
+
+        Args:
+            items (Iterable[Ingredient]): the items, which should be Ingredients, to add onto the Plate.
+        '''
+
+        self.contents._add_many(items)
     
-    def __str__(self):
-        return f'a plate with {self.contents}'
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        yield 'a plate with '
+        yield self.contents
 
 class Bowl(Utensil):
-    '''A Kitchen Utensil for mixing Ingredients and dividing this mixture into other Utensils.'''
+    '''A Kitchen Utensil for mixing Ingredients and dividing this mixture into other Utensils.
+
+    Mixing is deferred: mix() only records that the contents should be mixed, and the Mixture is mixed once, the first
+    time the contents of the Bowl are observed (through contents, take, divide or str). The result is the same as
+    mixing straight away, but a long series of additions followed by mixes only mixes once.
+    '''
     
     @staticmethod
-    def use(name: str = None) -> 'Bowl':
+    def use(name: str = None, lazy: bool = False) -> 'Bowl':
         '''Returns a Bowl object with the given name.
 
         Args:
             name (str): the name to assign to the contents of the Bowl.
+            lazy (bool): whether to return a LazyBowl, which only builds its Mixture once it is used. Defaults to False.
 
         Returns:
             Bowl: a new Bowl object with the given name.
         '''
 
-        return Bowl(name=name)
+        hook = _hook()
+        if hook is not None:
+            bowl = hook._use_bowl(name, lazy)
+            if bowl is not None:
+                return bowl
+        return LazyBowl(name=name) if lazy else Bowl(name=name)
     
     def __init__(self, name: str = None):
+        self._contents = Mixture(name=name)
+        self._mixing = False
+
+    def _reset(self, name: str = None):
+        # Portions taken from the Bowl still hold its Mixture, so the Bowl gets a new one.
         self.contents = Mixture(name=name)
+
+    @property
+    def contents(self):
+        '''The current contents of the Bowl, with any pending mix applied.'''
+
+        if self._mixing:
+            self._mixing = False
+            if not self._contents.mixed:
+                self._contents._mix()
+        return self._contents
+
+    @contents.setter
+    def contents(self, contents):
+        self._contents = contents
+        self._mixing = False
+
+    def __getstate__(self):
+        # Observing the contents applies anything pending, which then need not be stored.
+        self.contents
+        return self.__dict__.copy()
     
     def add(self, item: Ingredient):
         '''Adds the given item to the Bowl.
@@ -67,20 +188,35 @@ class Bowl(Utensil):
             KitchenException: when you try to add anything after using your mixture.
         '''
 
-        if isinstance(self.contents, Mixture):
-            self.contents._add(item)
+        if isinstance(self._contents, Mixture):
+            self._contents._add(item)
+        else:
+            raise KitchenException('You can only add ingredients before using your mixture!')
+
+    def add_many(self, items: Iterable[Ingredient]):
+        '''Adds the given items to the Bowl, checking them all first and then adding them at once.
+
+        Args:
+            items (Iterable[Ingredient]): the items, which should be Ingredients, to add to the Bowl.
+
+        Raises:
+            KitchenException: when you try to add anything after using your mixture, in which case nothing is added.
+        '''
+
+        if isinstance(self._contents, Mixture):
+            self._contents._add_many(items)
         else:
             raise KitchenException('You can only add ingredients before using your mixture!')
     
     def mix(self):
-        '''Mixes the current contents of the Bowl.
+        '''Mixes the current contents of the Bowl. The mix is applied when the contents are next observed.
 
         Raises:
             KitchenException: when you try to mix after using your mixture.
         '''
         
-        if isinstance(self.contents, Mixture):
-            self.contents._mix()
+        if isinstance(self._contents, Mixture):
+            self._mixing = True
         else:
             raise KitchenException('You can only mix ingredients before using your mixture!')
 
@@ -116,8 +252,154 @@ class Bowl(Utensil):
         else:
             raise KitchenException('You can only divide bowl contents before using your mixture in another way!')
 
-    def __str__(self):
-        return f'a bowl with {self.contents}'
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        yield 'a bowl with '
+        yield self.contents
+
+class LazyBowl(Bowl):
+    '''A Bowl that records add, mix, take and divide as an expression graph instead of changing its Mixture right away.
+
+    The graph is optimized and applied to the Mixture only when a result is used: when the contents of the Bowl or of
+    one of the Portions taken from it are observed. Mistakes, such as adding after taking or taking too much, still
+    raise straight away. Dividing takes constant time: the Portions are only created when they are accessed.
+    '''
+
+    def __init__(self, name: str = None):
+        super().__init__(name)
+        self._mixture = self._contents
+        self._operations = []
+        self._remaining = None
+
+    @property
+    def contents(self):
+        '''The current contents of the Bowl, with all recorded operations applied.'''
+
+        if self._operations:
+            self._materialize()
+        return self._contents
+
+    @contents.setter
+    def contents(self, contents):
+        self._contents = contents
+        self._mixture = contents
+        self._operations = []
+        self._remaining = None
+
+    def _reset(self, name: str = None):
+        # Portions taken from the Bowl may still wait on its recorded operations.
+        if self._operations:
+            self._materialize()
+        super()._reset(name)
+
+    def _materialize(self):
+        operations, self._operations = optimize(self._operations), []
+        for operation in operations:
+            operation._apply(self)
+
+    def _portion(self) -> Portion:
+        if isinstance(self._contents, Mixture):
+            self._contents = Portion(self._contents)
+        return self._contents
+
+    def add(self, item: Ingredient):
+        '''Adds the given item to the Bowl.
+
+        Args:
+            item (Ingredient): the item, which should be an Ingredient, to add to the Bowl.
+
+        Raises:
+            KitchenException: when you try to add anything after using your mixture.
+        '''
+
+        if self._remaining is not None or not isinstance(self._contents, Mixture):
+            raise KitchenException('You can only add ingredients before using your mixture!')
+        if not isinstance(item, Ingredient):
+            raise KitchenException('Can only add edible things')
+        if self._is_mixture(item):
+            raise KitchenException('Cannot add something to itself')
+        self._operations.append(Add(item))
+
+    def add_many(self, items: Iterable[Ingredient]):
+        '''Adds the given items to the Bowl, checking them all first and then recording them as one addition.
+
+        Args:
+            items (Iterable[Ingredient]): the items, which should be Ingredients, to add to the Bowl.
+
+        Raises:
+            KitchenException: when you try to add anything after using your mixture, in which case nothing is added.
+        '''
+
+        if self._remaining is not None or not isinstance(self._contents, Mixture):
+            raise KitchenException('You can only add ingredients before using your mixture!')
+        items = list(items)
+        for item in items:
+            if not isinstance(item, Ingredient):
+                raise KitchenException('Can only add edible things')
+            if self._is_mixture(item):
+                raise KitchenException('Cannot add something to itself')
+        self._operations.append(AddMany(items))
+
+    def _is_mixture(self, item: Ingredient) -> bool:
+        # Only a Collection can be equal to the Mixture, which is then brought up to date to compare them as Bowl.add
+        # would, so that adding a Portion, as recipes do, does not apply the pending operations.
+        return item is self._mixture or isinstance(item, Collection) and item == self.contents
+
+    def mix(self):
+        '''Mixes the current contents of the Bowl.
+
+        Raises:
+            KitchenException: when you try to mix after using your mixture.
+        '''
+
+        if self._remaining is not None or not isinstance(self._contents, Mixture):
+            raise KitchenException('You can only mix ingredients before using your mixture!')
+        self._operations.append(Mix())
+
+    def take(self, portion: str = '1') -> Portion:
+        '''Returns a given portion of the current contents of the Bowl. The Mixture cannot be further altered after having taken part of it.
+
+        Args:
+            portion (str): the fraction of the current contents of the Bowl to return, as a string (e.g. '1/4'). Defaults to '1'.
+
+        Raises:
+            KitchenException: when there is not enough left in the Bowl.
+
+        Returns:
+            Portion: the given portion of the current contents of the Bowl.
+        '''
+
+        portion_unit = Fraction(portion)
+        if self._remaining is None:
+            self._remaining = self._contents.portion if isinstance(self._contents, Portion) else Fraction(1)
+        if portion_unit > self._remaining:
+            raise KitchenException('Not enough left!')
+        self._remaining -= portion_unit
+        self._operations.append(Take(portion_unit))
+        return LazyPortion(self, self._mixture, portion_unit)
+
+    def divide(self, portions: int) -> Union[Portions, List[Portion]]:
+        '''Returns a sequence with a given number of equally divided portions of the current contents of the Bowl, in constant time.
+
+        Args:
+            portions (int): the number of desired portions to divide the current contents of the Bowl into.
+
+        Raises:
+            KitchenException: when you try to divide the contents after having already taken part of them.
+
+        Returns:
+            Portions: a sequence of equally divided portions of the current contents of the Bowl.
+        '''
+
+        if not isinstance(self._contents, Mixture):
+            raise KitchenException('You can only divide bowl contents before using your mixture in another way!')
+        # As with a Bowl, dividing into no portions takes nothing.
+        if portions < 1:
+            return []
+        if self._remaining is not None:
+            raise KitchenException('You can only divide bowl contents before using your mixture in another way!')
+        self._remaining = Fraction(0)
+        self._operations.append(Divide(portions))
+        return Portions(self, portions)
 
 class Pan(Utensil):
     '''A Kitchen Utensil for cooking Ingredients.'''
@@ -137,6 +419,9 @@ class Pan(Utensil):
     
     def __init__(self, name: str = None):
         self.contents = CookedCollection(name=name)
+
+    def _reset(self, name: str = None):
+        self.contents = _renew(self.contents, name)
     
     def add(self, item: Ingredient):
         '''Adds the given item to the Pan.
@@ -146,6 +431,15 @@ class Pan(Utensil):
         '''
 
         self.contents._add(item)
+
+    def add_many(self, items: Iterable[Ingredient]):
+        '''Adds the given items to the Pan, checking them all first and then adding them at once.
+
+        Args:
+            items (Iterable[Ingredient]): the items, which should be Ingredients, to add to the Pan.
+        '''
+
+        self.contents._add_many(items)
     
     def cook(self, minutes: float = 1):
         '''Cooks the current contents of the Pan, on the current side, for the given number of minutes.
@@ -154,6 +448,7 @@ class Pan(Utensil):
             minutes (float): the number of minutes for which to cook the current contents of the Pan.
         '''
         
+        _used(self, 'cook', minutes)
         self.contents._cook(minutes)
 
     def flip(self):
@@ -168,12 +463,14 @@ class Pan(Utensil):
             CookedCollection: the current contents of the Pan, as a CookedCollection.
         '''
 
+        _used(self, 'take')
         contents = self.contents
         self.contents = CookedCollection(name=contents.name)
         return contents
 
-    def __str__(self):
-        return f'a pan with {self.contents}'
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        yield 'a pan with '
+        yield self.contents
 
 class BakingUtensil(Utensil):
     '''A Kitchen Utensil to collect Ingredients for baking.'''
@@ -181,6 +478,9 @@ class BakingUtensil(Utensil):
     def __init__(self, name: str = None):
         self.contents = BakedCollection(name=name)
 
+    def _reset(self, name: str = None):
+        self.contents = _renew(self.contents, name)
+
     def add(self, item: Ingredient):
         '''Adds the given item to the BakingUtensil container.
 
@@ -189,6 +489,15 @@ class BakingUtensil(Utensil):
         '''
 
         self.contents._add(item)
+
+    def add_many(self, items: Iterable[Ingredient]):
+        '''Adds the given items to the BakingUtensil container, checking them all first and then adding them at once.
+
+        Args:
+            items (Iterable[Ingredient]): the items, which should be Ingredients, to add to the BakingUtensil container.
+        '''
+
+        self.contents._add_many(items)
     
     def _bake(self, temperature: int = 20, minutes: float = 1):
         self.contents.temperature = temperature
@@ -224,8 +533,9 @@ class BakingTray(BakingUtensil):
     def __init__(self, name: str = None):
         super().__init__(name)
 
-    def __str__(self):
-        return f'a tray with {self.contents}'
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        yield 'a tray with '
+        yield self.contents
 
 class PieDish(BakingUtensil):
     '''A Kitchen Utensil to collect Ingredients for baking.'''
@@ -257,8 +567,9 @@ class PieDish(BakingUtensil):
         self.contents = PieCollection(name=contents.name)
         return contents
 
-    def __str__(self):
-        return f'a pie dish containing {self.contents}'
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        yield 'a pie dish containing '
+        yield self.contents
 
 class Oven(Utensil):
     '''A Kitchen Utensil to bake Ingredients in using a BakingUtensil, for instance a BakingTray or PieDish.'''
@@ -280,6 +591,10 @@ class Oven(Utensil):
         self.contents = None
         self.degrees = degrees
 
+    def _reset(self, degrees: int = 20):
+        self.contents = None
+        self.degrees = degrees
+
     def preheat(self, degrees: int = 20):
         '''Preheats the Oven to the given temperature.
 
@@ -317,6 +632,7 @@ class Oven(Utensil):
 
         if self.contents is None:
             raise KitchenException('Cannot bake nothing!')
+        _used(self, 'bake', minutes)
         self.contents._bake(self.degrees, minutes)
     
     def take(self) -> Optional[BakingUtensil]:
@@ -326,15 +642,23 @@ class Oven(Utensil):
             BakingUtensil: the most recent BackingUtensil that was put in the Oven.
         '''
 
+        _used(self, 'take')
         contents = self.contents
         self.contents = None
         return contents
 
-    def __str__(self):
-        return f'an oven with {self.contents}'
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        yield 'an oven with '
+        yield self.contents if self.contents is not None else 'None'
 
 class Fridge(Utensil):
-    '''A Kitchen Utensil to cool Ingredients before use.'''
+    '''A Kitchen Utensil to cool Ingredients before use.
+
+    Bowls in the Fridge are kept by name as well as in the order they were added, so a Bowl can be taken out by name
+    straight away. They are numbered by the Fridge as they are added, so the numbers stay the same when the Fridge is
+    pickled or sent to another process. What is inside takes the temperature of the Fridge when it is looked at, so
+    setting the temperature takes the same time however full the Fridge is.
+    '''
     
     @staticmethod
     def use(degrees: int = 5) -> 'Fridge':
@@ -351,7 +675,32 @@ class Fridge(Utensil):
     
     def __init__(self, degrees: int = 5):
         self.temperature = degrees
-        self.contents = []
+        self.bowls: Dict[int, Bowl] = {}
+        self._added = 0
+        self._named: Dict[Optional[str], Dict[int, Bowl]] = {}
+        self._stored: Dict[int, Tuple[Optional[str], ChilledCollection]] = {}
+
+    @property
+    def contents(self) -> Tuple[Bowl, ...]:
+        '''The Bowls in the Fridge, in the order they were added. Bowls are put in and taken out with add and take.'''
+
+        return tuple(self.bowls.values())
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # What is inside is pickled at the temperature it had, and follows the Fridge again once it is back in it.
+        for _, chilled_contents in self._stored.values():
+            chilled_contents._fridge = self
+            chilled_contents._changed()
+
+    def _reset(self, degrees: int = 5):
+        # Bowls left in the Fridge keep the temperature they had.
+        for _, chilled_contents in self._stored.values():
+            chilled_contents._release()
+        self.temperature = degrees
+        self.bowls.clear()
+        self._named.clear()
+        self._stored.clear()
     
     def add(self, item: Bowl):
         '''Adds the given item to the Fridge.
@@ -365,12 +714,18 @@ class Fridge(Utensil):
 
         if not isinstance(item, Bowl):
             raise KitchenException('You can only add a bowl to the fridge!')
+        _used(self, 'chill')
         contents = item.contents
-        chilled_contents = ChilledCollection(temperature=self.temperature)
+        name = getattr(contents, 'name', None)
+        chilled_contents = ChilledCollection(fridge=self)
         chilled_contents._add(contents)
         item.contents = Mixture(None)
         item.contents._add(chilled_contents)
-        self.contents.append(item)
+        key = self._added
+        self._added += 1
+        self.bowls[key] = item
+        self._named.setdefault(name, {})[key] = item
+        self._stored[key] = (name, chilled_contents)
     
     def set_temperature(self, degrees: int = 5):
         '''Sets the Fridge to the given temperature.
@@ -379,16 +734,49 @@ class Fridge(Utensil):
             degrees (int): the temperature to set the Fridge to. Defaults to 5.
         '''
 
-        for item in self.contents:
-            item.contents.contents[0].temperature = degrees
+        self.temperature = degrees
+
+    def take(self, name: str = None) -> Bowl:
+        '''Returns the last Bowl with the given name that was added to the Fridge, or the last Bowl if no name is given.
 
-    def take(self) -> Bowl:
-        '''Returns the last item that was added to the Fridge.
+        Args:
+            name (str): the name of the contents of the Bowl, as given to Bowl.use. Optional.
+
+        Raises:
+            KitchenException: when there is no such Bowl in the Fridge.
 
         Returns:
-            Bowl: the last item, which will be a Bowl, that was added to the Fridge.
+            Bowl: the last item, which will be a Bowl, that was added to the Fridge with the given name.
         '''
-        return self.contents.pop()
 
-    def __str__(self):
-        return f'a fridge with {self.contents}'
+        if name is None:
+            if not self.bowls:
+                raise KitchenException('The fridge is empty!')
+            key, item = self.bowls.popitem()
+            name = self._stored[key][0]
+            del self._named[name][key]
+        else:
+            bowls = self._named.get(name)
+            if not bowls:
+                raise KitchenException(f'There is no {name} in the fridge!')
+            key, item = bowls.popitem()
+            del self.bowls[key]
+        if not self._named[name]:
+            del self._named[name]
+        self._stored.pop(key)[1]._release()
+        return item
+
+    def _children(self) -> Iterable[KitchenObject]:
+        return self.bowls.values()
+
+    def _chunks(self, width: int = None) -> Iterator[Union[str, KitchenObject]]:
+        yield 'a fridge with ['
+        separator = ''
+        for shown, item in enumerate(self.bowls.values()):
+            if width is not None and shown == width:
+                yield f'{separator}[… {len(self.bowls) - width} more]'
+                break
+            yield separator
+            yield item
+            separator = ', '
+        yield ']'
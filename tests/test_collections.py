@@ -0,0 +1,73 @@
+import unittest
+from kitchen.utensils import Bowl, Plate
+from kitchen.ingredients import Apple, Egg, Flour, Lemon
+from kitchen.ingredients.Collections import Collection, Mixture, Portion, Stack
+
+class LeafChangeTest(unittest.TestCase):
+
+    def test_changing_an_added_ingredient_updates_the_description(self):
+        egg, apple, lemon = Egg.take(), Apple.take(), Lemon.take()
+        bowl = Bowl.use(name='filling')
+        for item in (egg, apple, lemon):
+            bowl.add(item)
+        bowl.mix()
+        plate = Plate.use()
+        plate.add(bowl.take())
+        self.assertEqual(str(plate), 'a plate with mixed "filling", containing (egg, apple, lemon)')
+        egg.crack()
+        apple.peel()
+        apple.slice()
+        lemon.zest()
+        self.assertEqual(str(plate), 'a plate with mixed "filling", containing (cracked egg, sliced peeled apple, '
+                                     'zested lemon)')
+
+    def test_changing_an_ingredient_in_a_nested_portion_updates_the_description(self):
+        egg = Egg.take()
+        bowl = Bowl.use(name='batter')
+        bowl.add(egg)
+        portions = bowl.divide(2)
+        plate = Plate.use()
+        plate.add(portions[0])
+        self.assertIn('egg', str(plate))
+        self.assertNotIn('cracked', str(plate))
+        egg.crack()
+        self.assertIn('cracked egg', str(plate))
+
+def recount(item, kind):
+    # Counts the Ingredients of the given kind by walking the contents, without any Stats kept along the way.
+    if isinstance(item, Portion):
+        return recount(item.contents, kind) * item.portion
+    if isinstance(item, Collection):
+        return sum(recount(child, kind) * amount for child, amount in item.contents.items())
+    return int(isinstance(item, kind))
+
+class CountTest(unittest.TestCase):
+
+    def test_count_follows_changes_to_nested_collections(self):
+        batter, stack = Mixture('batter'), Stack()
+        batter._add(Egg.take(), 2)
+        stack._add(batter, 3)
+        portion = Portion(batter)
+        stack._add(portion)
+        self.assertEqual(stack.count(Egg), 8)
+        batter._add(Egg.take())
+        batter._add(Flour.take(grams=100))
+        self.assertEqual(stack.count(Egg), 12)
+        portion._take('1/2')
+        self.assertEqual(stack.count(Egg), recount(stack, Egg))
+        self.assertEqual(stack.count(Flour), recount(stack, Flour))
+
+    def test_count_follows_a_changed_collection_added_again(self):
+        batter, stack = Mixture('batter'), Stack()
+        batter._add(Egg.take())
+        stack._add(batter, 2)
+        batter._add(Egg.take())
+        # The changed batter hashes differently, so it is added again under another entry.
+        stack._add(batter)
+        self.assertEqual(stack.count(Egg), recount(stack, Egg))
+        batter._add(Egg.take())
+        self.assertEqual(stack.count(Egg), recount(stack, Egg))
+        self.assertEqual(stack.count(Egg), 9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+from kitchen.Diff import Difference, diff
+from kitchen.utensils import Plate
+from kitchen.ingredients import Egg
+
+class DiffTest(unittest.TestCase):
+
+    def test_changing_an_added_ingredient_is_a_difference(self):
+        before, after = Plate.use(), Plate.use()
+        before.add(Egg.take())
+        egg = Egg.take()
+        after.add(egg)
+        self.assertEqual(diff(before, after), [])
+        egg.crack()
+        self.assertEqual([repr(difference) for difference in diff(before, after)],
+                         ['changed Plate[0]/Stack[0]/egg[0]: egg -> cracked egg'])
+
+    def test_equal_differences_hash_equally(self):
+        first = Difference('changed', 'Plate[0]/pancakes[0].cooked', [1., 0.], [2., 0.])
+        second = Difference('changed', 'Plate[0]/pancakes[0].cooked', [1., 0.], [2., 0.])
+        self.assertEqual(hash(first), hash(second))
+        self.assertEqual(len({first, second}), 1)
+
+if __name__ == '__main__':
+    unittest.main()
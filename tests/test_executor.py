@@ -0,0 +1,48 @@
+import unittest
+from kitchen import Rosemary
+from kitchen.Executor import KitchenExecutor
+from kitchen.Kitchen import KitchenException
+from kitchen.utensils import Bowl, Plate
+from kitchen.ingredients import Egg, Flour
+
+def pancakes(number: int):
+    bowl = Bowl.use(name='batter')
+    bowl.add(Egg.take())
+    bowl.add(Flour.take(grams=100))
+    bowl.mix()
+    plate = Plate.use()
+    for portion in bowl.divide(number):
+        plate.add(portion)
+    Rosemary.serve(plate)
+
+def nothing():
+    return None
+
+def burnt():
+    raise KitchenException('Burnt!')
+
+class SharedDishTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = KitchenExecutor(1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.shutdown()
+
+    def test_a_shared_dish_is_the_dish_served(self):
+        expected = str(self.executor.submit(pancakes, 3).result(timeout=60))
+        with self.executor.submit_shared(pancakes, 3).result(timeout=60) as shared:
+            self.assertEqual(str(shared.dish), expected)
+
+    def test_a_recipe_serving_nothing_fails_the_future(self):
+        with self.assertRaises(KitchenException):
+            self.executor.submit_shared(nothing).result(timeout=60)
+
+    def test_a_failing_recipe_fails_the_future(self):
+        with self.assertRaises(KitchenException):
+            self.executor.submit_shared(burnt).result(timeout=60)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import sys
+import threading
+import unittest
+from kitchen.ingredients import Flour
+
+class NumberingTest(unittest.TestCase):
+
+    def setUp(self):
+        # Switching threads as often as possible makes two threads numbering new amounts at once likely.
+        self._interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self._interval)
+
+    def test_amounts_taken_from_several_threads_keep_their_quantities(self):
+        wrong = []
+
+        def take(thread: int):
+            for number in range(3000):
+                grams = 1_000_000 + thread * 3000 + number
+                flour = Flour.take(grams=grams)
+                if flour._quantity()[2] != grams:
+                    wrong.append((grams, flour._quantity()))
+
+        threads = [threading.Thread(target=take, args=(thread,)) for thread in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(wrong, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from kitchen import Rosemary
+from kitchen.Executor import _cook
+from kitchen.Menu import MenuPlanner
+from kitchen.utensils import Bowl, Pan, Plate
+from kitchen.ingredients import Butter, Egg, Flour
+
+def pancakes(number: int):
+    bowl = Bowl.use(name='batter')
+    for egg in Egg.take(2):
+        egg.crack()
+        bowl.add(egg)
+    bowl.add(Flour.take(grams=100))
+    bowl.mix()
+    plate = Plate.use()
+    pan = Pan.use(name='pancakes')
+    for _ in range(number):
+        pan.add(Butter.take('slice'))
+        pan.add(bowl.take(f'1/{number}'))
+        pan.cook(minutes=2)
+        plate.add(pan.take())
+    Rosemary.serve(plate)
+
+class MenuPlannerTest(unittest.TestCase):
+
+    def test_a_planned_dish_is_described_as_the_dish_cooked_alone(self):
+        planner = MenuPlanner()
+        dishes = planner.cook([(pancakes, 2)] * 3 + [(pancakes, 3)])
+        self.assertEqual([str(dish) for dish in dishes],
+                         [str(_cook(pancakes, (number,), {})) for number in (2, 2, 2, 3)])
+        self.assertEqual([dish.count(Egg) for dish in dishes], [2, 2, 2, 2])
+
+    def test_the_report_counts_the_orders_sharing_a_preparation(self):
+        planner = MenuPlanner()
+        planner.cook([(pancakes, 2)] * 3)
+        self.assertIn('batter: 2 kinds of ingredient, shared by 2 orders', planner.report())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+from kitchen.Kitchen import KitchenException
+from kitchen.Pantry import Pantry
+from kitchen.ingredients import Egg, Flour
+
+class PantryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pantry = Pantry()
+        self.pantry.stock(Flour, 1000, 'g', low=200)
+        self.pantry.stock(Egg, 12, low=4)
+
+    def test_amounts_that_are_not_positive_cannot_be_reserved(self):
+        for quantities in ({Flour: 0}, {Egg: -2}, {Flour: 250, 'flour': -250}):
+            with self.assertRaises(KitchenException):
+                self.pantry.reserve(quantities)
+        self.assertEqual((self.pantry.level(Flour), self.pantry.level(Egg)), (1000, 12))
+
+    def test_negative_levels_cannot_be_stocked(self):
+        with self.assertRaises(KitchenException):
+            self.pantry.stock(Egg, -12)
+        with self.assertRaises(KitchenException):
+            self.pantry.stock(Flour, 500, 'g', low=-1)
+        self.assertEqual((self.pantry.level(Flour), self.pantry.level(Egg)), (1000, 12))
+
+    def test_a_reservation_returns_what_was_not_taken(self):
+        with self.pantry.reserve({Flour: 250, Egg: 2}) as reservation:
+            reservation.take(Flour, grams=100)
+        self.assertEqual((self.pantry.level(Flour), self.pantry.level(Egg)), (900, 12))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import io
+import threading
+import unittest
+from kitchen import Rosemary
+from kitchen.Pipeline import Pipeline
+from kitchen.utensils import Plate
+from kitchen.ingredients import Egg
+
+def eggs(number: int):
+    plate = Plate.use()
+    for _ in range(number):
+        plate.add(Egg.take())
+    Rosemary.serve(plate)
+
+def walk_out():
+    raise SystemExit('The cook walked out!')
+
+def lines(count: int, error: Exception = None):
+    for number in range(count):
+        yield f'{{"id": {number}, "recipe": "eggs", "args": [{number + 1}]}}'
+    if error is not None:
+        raise error
+
+class PipelineTest(unittest.TestCase):
+
+    def consume(self, pipeline: Pipeline, orders) -> dict:
+        # The orders are consumed in another thread, so that a Pipeline that hangs fails the test instead.
+        outcome = {'orders': []}
+
+        def run():
+            try:
+                for order in pipeline.stream(orders, io.StringIO()):
+                    outcome['orders'].append(order)
+            except BaseException as error:
+                outcome['error'] = error
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(10)
+        self.assertFalse(thread.is_alive(), 'the pipeline hangs')
+        return outcome
+
+    def test_every_order_is_served_or_has_an_error(self):
+        pipeline = Pipeline({'eggs': eggs}, workers={'cook': 3})
+        outcome = self.consume(pipeline, list(lines(20)) + ['{"recipe": "toast"}', 'not json'])
+        self.assertNotIn('error', outcome)
+        served = [order for order in outcome['orders'] if order.error is None]
+        self.assertEqual(sorted(order.id for order in served), list(range(20)))
+        self.assertEqual(sorted(str(order.dish) for order in served if order.id == 1), ['a plate with 2x egg'])
+        self.assertEqual(len([order for order in outcome['orders'] if order.error is not None]), 2)
+        self.assertEqual(pipeline.stats['cook'].orders, 20)
+
+    def test_an_error_reading_the_lines_is_raised_after_the_orders_before_it(self):
+        outcome = self.consume(Pipeline({'eggs': eggs}), lines(5, OSError('The order printer jammed!')))
+        self.assertIsInstance(outcome.get('error'), OSError)
+        self.assertEqual(sorted(order.id for order in outcome['orders']), list(range(5)))
+
+    def test_a_stage_stopped_by_a_base_exception_stops_the_pipeline(self):
+        pipeline = Pipeline({'eggs': eggs, 'walk_out': walk_out}, workers={'cook': 2})
+        outcome = self.consume(pipeline, list(lines(3)) + ['{"recipe": "walk_out"}'] + list(lines(3)))
+        self.assertIsInstance(outcome.get('error'), SystemExit)
+
+    def test_stopping_early_stops_the_pipeline(self):
+        pipeline = Pipeline({'eggs': eggs}, queue_size=2)
+        orders = pipeline.stream(lines(1000))
+        next(orders)
+        orders.close()
+        self.assertGreater(pipeline.seconds, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import threading
+import unittest
+from kitchen import Rosemary
+from kitchen.Kitchen import KitchenException
+from kitchen.Server import KitchenClient, KitchenServer, _run
+from kitchen.utensils import Plate
+from kitchen.ingredients import Egg
+
+def eggs(number: int):
+    plate = Plate.use()
+    for _ in range(number):
+        plate.add(Egg.take())
+    Rosemary.serve(plate)
+
+class ServerTest(unittest.TestCase):
+
+    def serve(self, workers: int, scripts=()):
+        directory = tempfile.mkdtemp()
+        server = KitchenServer(os.path.join(directory, 'kitchen.sock'), workers=workers, recipes={'eggs': eggs},
+                               scripts=scripts)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 10)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_every_order_is_answered_with_workers(self):
+        server = self.serve(2)
+        with KitchenClient(server.path) as client:
+            futures = [client.submit('eggs', number) for number in range(1, 50)]
+            failed = client.submit('toast')
+            self.assertEqual([future.result(timeout=60) for future in futures],
+                             [_run(eggs, None, (number,), {}) for number in range(1, 50)])
+            with self.assertRaises(KitchenException):
+                failed.result(timeout=60)
+
+    def test_a_script_is_run_from_the_path_that_was_checked(self):
+        script = os.path.realpath('Pancakes.py')
+        link = os.path.join(tempfile.mkdtemp(), 'recipe.py')
+        os.symlink(script, link)
+        server = self.serve(0, scripts=[script])
+        self.assertEqual(server._script(link), script)
+        with self.assertRaises(KitchenException):
+            server._script(os.path.realpath('Bonus_Challenge.py'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import pickle
+import unittest
+from kitchen.Kitchen import KitchenException
+from kitchen.utensils import Bowl, Fridge, Plate
+from kitchen.ingredients import Egg, Flour, Sugar
+from kitchen.ingredients.Collections import Mixture
+
+class FridgeTest(unittest.TestCase):
+
+    def test_bowls_follow_the_temperature_of_an_unpickled_fridge(self):
+        fridge = Fridge.use(4)
+        bowl = Bowl.use(name='batter')
+        bowl.add(Egg.take())
+        fridge.add(bowl)
+        fridge = pickle.loads(pickle.dumps(fridge))
+        fridge.set_temperature(1)
+        self.assertEqual(str(fridge), 'a fridge with [a bowl with chilled (to 1 degrees) "batter", containing egg]')
+        bowl = fridge.take('batter')
+        fridge.set_temperature(9)
+        self.assertEqual(str(bowl), 'a bowl with chilled (to 1 degrees) "batter", containing egg')
+
+    def test_contents_cannot_be_changed_from_outside(self):
+        fridge = Fridge.use()
+        fridge.add(Bowl.use())
+        self.assertIsInstance(fridge.contents, tuple)
+        self.assertEqual(len(fridge.contents), 1)
+
+def batter(lazy: bool) -> Plate:
+    bowl = Bowl.use(name='batter', lazy=lazy)
+    for _ in range(3):
+        bowl.add(Egg.take())
+        bowl.mix()
+    bowl.add_many([Flour.take(grams=50), Flour.take(grams=50), Sugar.take(grams=10)])
+    bowl.mix()
+    plate = Plate.use()
+    portions = bowl.divide(3)
+    plate.add_many(portions[:2])
+    plate.add(portions[-1])
+    return plate
+
+class LazyBowlTest(unittest.TestCase):
+
+    def test_a_lazy_bowl_makes_the_same_dish_as_a_bowl(self):
+        eager, lazy = batter(False), batter(True)
+        self.assertEqual(str(lazy), str(eager))
+        self.assertEqual(lazy.contents, eager.contents)
+        self.assertEqual([lazy.count(kind) for kind in (Egg, Flour, Sugar)],
+                         [eager.count(kind) for kind in (Egg, Flour, Sugar)])
+
+    def test_the_portions_of_a_lazy_bowl_are_the_same_every_time(self):
+        bowl = Bowl.use(lazy=True)
+        bowl.add(Egg.take())
+        portions = bowl.divide(4)
+        self.assertIs(portions[1], portions[1])
+        self.assertIs(portions[-1], portions[3])
+        self.assertEqual(list(portions)[2:], portions[2:])
+
+    def test_neither_bowl_takes_a_mixture_equal_to_its_own(self):
+        for lazy in (False, True):
+            bowl = Bowl.use(name='batter', lazy=lazy)
+            bowl.add(Egg.take())
+            twin = Mixture('batter')
+            twin._add(Egg.take())
+            with self.assertRaises(KitchenException):
+                bowl.add(twin)
+            with self.assertRaises(KitchenException):
+                bowl.add_many([twin])
+            bowl.add(Bowl.use().take())
+
+if __name__ == '__main__':
+    unittest.main()